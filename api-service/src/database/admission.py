@@ -0,0 +1,57 @@
+"""
+Admission control for Flux queries.
+
+Sync routes run in a bounded threadpool. When InfluxDB slows down, every request used to
+sit in a query until the pool was exhausted, so even routes that don't need InfluxDB
+queued behind them. Now at most INFLUX_MAX_QUERIES queries run at once. A query that
+can't get a slot within INFLUX_QUEUE_SECONDS raises ``Overloaded``. Routes answer that
+with their last good response (see ``utils/stale.py``) or a 503 with Retry-After.
+
+Exports (see ``export.py``) stream their rows to the client while the query is still
+open, so a slow download holds its slot for as long as it takes. They get their own
+pool of EXPORT_MAX_QUERIES slots so they can't starve the dashboard routes.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from src.utils.config import Config
+from src.utils.metrics import INFLUX_QUERIES_IN_FLIGHT, INFLUX_QUERIES_SHED
+
+
+class Overloaded(Exception):
+    """No query slot freed up within the queue deadline."""
+
+    def __init__(self, measurement: str):
+        super().__init__(f"InfluxDB is busy, {measurement} query not started")
+        self.retry_after = Config.RETRY_AFTER_SECONDS
+
+
+class Admission:
+    def __init__(self, name: str, limit: int, queue_seconds: float):
+        self.name = name
+        self.queue_seconds = queue_seconds
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    @contextmanager
+    def slot(self, measurement: str):
+        """Hold one query slot, or raise Overloaded if none frees up in time."""
+        if not self._slots.acquire(timeout=self.queue_seconds):
+            INFLUX_QUERIES_SHED.labels(measurement).inc()
+            raise Overloaded(measurement)
+        with self._lock:
+            self.in_flight += 1
+            INFLUX_QUERIES_IN_FLIGHT.labels(self.name).set(self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                INFLUX_QUERIES_IN_FLIGHT.labels(self.name).set(self.in_flight)
+            self._slots.release()
+
+
+admission = Admission("queries", Config.INFLUX_MAX_QUERIES, Config.INFLUX_QUEUE_SECONDS)
+export_admission = Admission("export", Config.EXPORT_MAX_QUERIES, Config.INFLUX_QUEUE_SECONDS)
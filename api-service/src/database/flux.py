@@ -0,0 +1,214 @@
+"""
+Flux query builder and annotated CSV decoder.
+
+Every route builds its Flux through ``FluxQuery`` so that column projection (``keep()``)
+and field pivoting (``pivot()``) are pushed down to InfluxDB, which then returns one
+row per timestamp with only the requested columns. Results are decoded straight from
+the annotated CSV stream into plain dict rows, skipping the ``FluxTable``/``FluxRecord``
+object model entirely.
+"""
+
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from src.utils.config import Config
+
+# Columns Flux adds to every table that callers never need
+_META_COLUMNS = {"result", "table"}
+
+
+class FluxQueryError(RuntimeError):
+    """InfluxDB reported an error in the middle of a query's CSV response."""
+
+
+def flux_string(value) -> str:
+    """Quote a value as a Flux string literal."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("${", "\\${")
+    return f'"{escaped}"'
+
+
+def flux_time(value) -> str:
+    """Render a range bound: relative durations (``-1h``) pass through, datetimes become RFC3339."""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%SZ") if value.tzinfo is None else value.isoformat()
+    return str(value)
+
+
+class FluxQuery:
+    """
+    Small chainable builder for the Flux pipelines used by the API.
+
+    Example:
+        FluxQuery("metar").range("-1h").tags(station_id="ENZV")
+            .fields(["temp_c", "wind_speed_kt"]).last().pivot().build()
+    """
+
+    def __init__(self, measurement: str, bucket: str = None):
+        self.measurement = measurement
+        self.bucket = bucket or Config.INFLUX_BUCKET
+        self._start = "-1h"
+        self._stop = None
+        self._tags = {}
+        self._tag_sets = {}
+        self._fields = []
+        self._stages = []
+
+    def range(self, start, stop=None):
+        self._start = start
+        self._stop = stop
+        return self
+
+    def tags(self, tags: dict = None, **kwargs):
+        """Filter on exact tag values."""
+        self._tags.update(tags or {}, **kwargs)
+        return self
+
+    def tag_in(self, tag: str, values: Iterable[str]):
+        """Filter on a tag matching any of ``values``."""
+        self._tag_sets[tag] = list(values)
+        return self
+
+    def fields(self, fields: Iterable[str]):
+        self._fields = list(fields)
+        return self
+
+    def last(self):
+        self._stages.append("last()")
+        return self
+
+    def first(self):
+        self._stages.append("first()")
+        return self
+
+    def pivot(self):
+        """
+        One row per timestamp with a column per field. Tag columns other than the ones
+        filtered on are dropped first so all series collapse into a single table.
+        """
+        keep = ["_time", "_field", "_value", *self._tags, *self._tag_sets]
+        self._stages.append(f"keep(columns: [{', '.join(flux_string(c) for c in keep)}])")
+        self._stages.append("group()")
+        self._stages.append('pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")')
+        return self
+
+    def pivot_series(self):
+        """
+        One row per series and timestamp with a column per field, keeping every tag
+        column (unlike ``pivot()``, which collapses series into one table).
+        """
+        self._stages.append('drop(columns: ["_start", "_stop", "_measurement"])')
+        self._stages.append('pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")')
+        self._stages.append("group()")
+        return self
+
+    def keep(self, columns: Iterable[str]):
+        self._stages.append(f"keep(columns: [{', '.join(flux_string(c) for c in columns)}])")
+        return self
+
+    def group(self, columns: Iterable[str] = ()):
+        cols = ", ".join(flux_string(c) for c in columns)
+        self._stages.append(f"group(columns: [{cols}])" if cols else "group()")
+        return self
+
+    def sort(self, columns: Iterable[str] = ("_time",), desc: bool = False):
+        cols = ", ".join(flux_string(c) for c in columns)
+        self._stages.append(f"sort(columns: [{cols}], desc: {'true' if desc else 'false'})")
+        return self
+
+    def limit(self, n: int):
+        self._stages.append(f"limit(n: {int(n)})")
+        return self
+
+    def _predicate(self) -> str:
+        clauses = [f"r._measurement == {flux_string(self.measurement)}"]
+        for k, v in self._tags.items():
+            clauses.append(f"r[{flux_string(k)}] == {flux_string(v)}")
+        for k, values in self._tag_sets.items():
+            clauses.append("(" + " or ".join(f"r[{flux_string(k)}] == {flux_string(v)}" for v in values) + ")")
+        if self._fields:
+            clauses.append("(" + " or ".join(f"r._field == {flux_string(f)}" for f in self._fields) + ")")
+        return " and ".join(clauses)
+
+    def build(self) -> str:
+        bounds = f"start: {flux_time(self._start)}"
+        if self._stop is not None:
+            bounds += f", stop: {flux_time(self._stop)}"
+        lines = [
+            f"from(bucket: {flux_string(self.bucket)})",
+            f"  |> range({bounds})",
+            f"  |> filter(fn: (r) => {self._predicate()})",
+        ]
+        lines.extend(f"  |> {stage}" for stage in self._stages)
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.build()
+
+
+def _to_bool(value: str) -> bool:
+    return value == "true"
+
+
+# Annotated CSV datatypes -> converters. dateTime values are left as RFC3339 strings,
+# which is what the API returns anyway; use ``to_epoch`` where arithmetic is needed.
+_CONVERTERS = {
+    "double": float,
+    "long": int,
+    "unsignedLong": int,
+    "boolean": _to_bool,
+}
+
+
+def decode_annotated_csv(lines: Iterable[list[str]]) -> Iterator[dict]:
+    """
+    Decode an annotated CSV result stream (already split into cells) into one dict per
+    row. Handles multiple tables with differing schemas and raises on Flux errors.
+    """
+    datatypes = []
+    defaults = []
+    header = None
+    columns = []
+    error_column = None
+
+    for cells in lines:
+        if not cells or cells == [""]:
+            # Blank line: the next table starts with a fresh set of annotations
+            header = None
+            continue
+        first = cells[0]
+        if first == "#datatype":
+            datatypes = cells
+            header = None
+            continue
+        if first == "#default":
+            defaults = cells
+            continue
+        if first.startswith("#"):
+            continue
+        if header is None:
+            header = cells
+            error_column = cells.index("error") if "error" in cells and "reference" in cells else None
+            columns = [
+                (i, name, _CONVERTERS.get(datatypes[i] if i < len(datatypes) else ""))
+                for i, name in enumerate(cells)
+                if i > 0 and name and name not in _META_COLUMNS
+            ]
+            continue
+        if error_column is not None:
+            raise FluxQueryError(f"Flux query failed: {cells[error_column]}")
+
+        row = {}
+        for i, name, convert in columns:
+            value = cells[i] if i < len(cells) else ""
+            if value == "" and i < len(defaults):
+                value = defaults[i]
+            if value == "":
+                row[name] = None
+            else:
+                row[name] = convert(value) if convert else value
+        yield row
+
+
+def to_epoch(rfc3339: str) -> float:
+    """Convert an RFC3339 timestamp from a CSV result to epoch seconds."""
+    return datetime.fromisoformat(rfc3339.replace("Z", "+00:00")).timestamp()
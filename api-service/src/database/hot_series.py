@@ -0,0 +1,256 @@
+"""
+Hot tier for recent series.
+
+Most chart traffic asks for the last day of a handful of series (ENZV temperature,
+Netatmo indoor values, today's prices). Each series listed in HOT_SERIES gets a fixed-size
+ring buffer of (epoch seconds, value) pairs backed by ``array('d')``. The buffer is
+seeded with the last HOT_WINDOW_HOURS from InfluxDB at startup. After that, only points
+newer than the last one held are fetched, at most every HOT_REFRESH_SECONDS.
+Range requests that fall inside what the buffer covers are answered from memory.
+Anything older goes to InfluxDB as before.
+
+HOT_SERIES is a comma-separated list of ``measurement:field[:tag=value[;tag=value]]``,
+for example ``metar:temp_c:station_id=ENZV,netatmo:temperature_c``.
+"""
+
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+
+from src.database.flux import FluxQuery, to_epoch
+from src.database.influx_client import query_rows
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import CACHE_LOOKUPS
+
+HOUR = 3600
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of time-ordered (time, value) pairs. Once full, every append
+    overwrites the oldest point.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _physical(self, i: int) -> int:
+        return (self._start + i) % self.capacity
+
+    def time_at(self, i: int) -> float:
+        return self._times[self._physical(i)]
+
+    @property
+    def last_time(self):
+        return self.time_at(self.count - 1) if self.count else None
+
+    def append(self, t: float, value: float):
+        """
+        Add a point newer than the last one held. Returns the time of the point it
+        evicted, or None if nothing was evicted.
+        """
+        evicted = None
+        if self.count < self.capacity:
+            i = self._physical(self.count)
+            self.count += 1
+        else:
+            i = self._start
+            evicted = self._times[i]
+            self._start = (self._start + 1) % self.capacity
+        self._times[i] = t
+        self._values[i] = value
+        return evicted
+
+    def _bisect(self, t: float) -> int:
+        """Index of the first point at or after ``t``."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time_at(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def between(self, start: float, stop: float):
+        """Points with ``start <= time < stop``, oldest first."""
+        times, values = self._times, self._values
+        points = []
+        for i in range(self._bisect(start), self._bisect(stop)):
+            j = self._physical(i)
+            points.append((times[j], values[j]))
+        return points
+
+
+class HotSeries:
+    """One hot series: its ring buffer and the Influx query that keeps it current."""
+
+    def __init__(self, measurement: str, field: str, tags: dict = None, capacity: int = None):
+        self.measurement = measurement
+        self.field = field
+        self.tags = dict(tags or {})
+        self.buffer = RingBuffer(capacity or Config.HOT_SERIES_CAPACITY)
+        # Points from covered_from onwards are all in the buffer; None until seeded
+        self.covered_from = None
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+        self._poll_lock = threading.RLock()
+
+    @property
+    def key(self):
+        return (self.measurement, self.field, tuple(sorted(self.tags.items())))
+
+    def _fetch(self, start):
+        query = (
+            FluxQuery(self.measurement)
+            .range(start)
+            .tags(self.tags)
+            .fields([self.field])
+            .keep(["_time", "_value"])
+            .group()
+            .sort()
+        )
+        return [(to_epoch(row["_time"]), row["_value"]) for row in query_rows(query) if row["_value"] is not None]
+
+    def seed(self, now: float = None):
+        """Load the last HOT_WINDOW_HOURS from InfluxDB."""
+        now = time.time() if now is None else now
+        window_start = now - Config.HOT_WINDOW_HOURS * HOUR
+        with self._poll_lock:
+            points = self._fetch(datetime.fromtimestamp(window_start, tz=timezone.utc))
+            buffer = RingBuffer(self.buffer.capacity)
+            with self._lock:
+                self.buffer = buffer
+                self.covered_from = window_start
+                self._append(points)
+            self._last_poll = now
+
+    def _append(self, points):
+        last = self.buffer.last_time
+        for t, value in points:
+            if last is not None and t <= last:
+                continue
+            evicted = self.buffer.append(t, float(value))
+            if evicted is not None:
+                self.covered_from = max(self.covered_from, evicted + 1e-6)
+            last = t
+
+    def refresh(self, now: float = None):
+        """
+        Seed the buffer if it hasn't been seeded yet. Otherwise fetch the points written
+        since the last one held, at most every HOT_REFRESH_SECONDS.
+        """
+        now = time.time() if now is None else now
+        if self.covered_from is not None and now - self._last_poll < Config.HOT_REFRESH_SECONDS:
+            return
+        # Readers only wait on _lock, which is never held across a query
+        with self._poll_lock:
+            if self.covered_from is None:
+                self.seed(now)
+                return
+            if now - self._last_poll < Config.HOT_REFRESH_SECONDS:
+                return
+            self._last_poll = now
+            last = self.buffer.last_time
+            start = last if last is not None else self.covered_from
+            points = self._fetch(datetime.fromtimestamp(start, tz=timezone.utc))
+            with self._lock:
+                self._append(points)
+
+    def covers(self, start: float) -> bool:
+        return self.covered_from is not None and start >= self.covered_from
+
+    def between(self, start: float, stop: float):
+        with self._lock:
+            return self.buffer.between(start, stop)
+
+
+def parse_hot_series(spec: str):
+    """Parse HOT_SERIES into HotSeries objects, skipping malformed entries."""
+    series = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split(":", 2)
+        if len(parts) < 2 or not parts[0] or not parts[1]:
+            logger.warning(f"[hot_series] Ignoring malformed HOT_SERIES entry: {entry!r}")
+            continue
+        tags = {}
+        if len(parts) == 3:
+            for pair in parts[2].split(";"):
+                name, _, value = pair.partition("=")
+                if name and value:
+                    tags[name] = value
+        series.append(HotSeries(parts[0], parts[1], tags))
+    return series
+
+
+class HotTier:
+    """The configured hot series, with an Influx fallback for anything they don't cover."""
+
+    def __init__(self, series):
+        self._series = {s.key: s for s in series}
+
+    def get(self, measurement: str, field: str, tags: dict = None):
+        return self._series.get((measurement, field, tuple(sorted((tags or {}).items()))))
+
+    def seed(self):
+        """Seed every series; failures are logged and the series seeds on first use instead."""
+        for series in self._series.values():
+            try:
+                series.seed()
+            except Exception as e:
+                logger.error(f"[hot_series] Failed to seed {series.measurement}.{series.field} {series.tags}: {e}")
+        logger.info(f"[hot_series] Seeded {len(self._series)} hot series")
+
+    def history(self, measurement: str, field: str, tags: dict = None, start: float = None,
+                stop: float = None) -> list[dict]:
+        """
+        Values of one series between ``start`` and ``stop`` (epoch seconds; default the
+        last HOT_WINDOW_HOURS up to now). Served from memory when a hot series covers
+        the range, else queried from InfluxDB.
+        """
+        now = time.time()
+        stop = now if stop is None else stop
+        start = now - Config.HOT_WINDOW_HOURS * HOUR if start is None else start
+
+        series = self.get(measurement, field, tags)
+        points = None
+        if series is not None:
+            try:
+                series.refresh(now)
+            except Exception as e:
+                logger.error(f"[hot_series] Refresh of {measurement}.{field} failed, serving held points: {e}")
+            if series.covers(start):
+                CACHE_LOOKUPS.labels("hot_series", "hit").inc()
+                points = series.between(start, stop)
+        if points is None:
+            CACHE_LOOKUPS.labels("hot_series", "miss").inc()
+            query = (
+                FluxQuery(measurement)
+                .range(datetime.fromtimestamp(start, tz=timezone.utc), datetime.fromtimestamp(stop, tz=timezone.utc))
+                .tags(tags)
+                .fields([field])
+                .keep(["_time", "_value"])
+                .group()
+                .sort()
+            )
+            points = [(to_epoch(row["_time"]), row["_value"]) for row in query_rows(query)]
+
+        return [
+            {"time": datetime.fromtimestamp(t, tz=timezone.utc).isoformat(), field: value}
+            for t, value in points
+        ]
+
+
+hot_tier = HotTier(parse_hot_series(Config.HOT_SERIES))
@@ -1,14 +1,48 @@
 from influxdb_client import InfluxDBClient
+from src.database.admission import Admission, admission
+from src.database.flux import FluxQuery, decode_annotated_csv
 from src.utils.config import Config
+from src.utils.metrics import INFLUX_QUERY_ERRORS, INFLUX_QUERY_SECONDS
+from src.utils.tracing import span
+import time
 
 def get_influx_client():
     return InfluxDBClient(
-        url=f"http://{Config.INFLUX_HOST}:8086",
+        url=Config.INFLUX_URL,
         token=Config.INFLUX_TOKEN,
-        org=Config.INFLUX_ORG
+        org=Config.INFLUX_ORG,
+        timeout=int(Config.INFLUX_TIMEOUT_SECONDS * 1000)
     )
 
-def query_influx(flux_query: str):
-    with get_influx_client() as client:
-        query_api = client.query_api()
-        return list(query_api.query(org=Config.INFLUX_ORG, query=flux_query))
\ No newline at end of file
+def iter_rows(query: FluxQuery | str, pool: Admission = admission):
+    """
+    Stream a Flux query result as one dict per row, decoded directly from the annotated
+    CSV response (no FluxTable/FluxRecord objects are created). The query holds a slot
+    of ``pool`` until the rows are consumed; raises ``admission.Overloaded`` if no slot
+    frees up in time.
+    """
+    measurement = query.measurement if isinstance(query, FluxQuery) else "raw"
+    with pool.slot(measurement):
+        start = time.perf_counter()
+        try:
+            with span(f"query.{measurement}"), get_influx_client() as client:
+                query_api = client.query_api()
+                lines = query_api.query_csv(str(query), org=Config.INFLUX_ORG)
+                yield from decode_annotated_csv(lines)
+        except Exception:
+            INFLUX_QUERY_ERRORS.labels(measurement).inc()
+            raise
+        finally:
+            INFLUX_QUERY_SECONDS.labels(measurement).observe(time.perf_counter() - start)
+
+def query_rows(query: FluxQuery | str) -> list[dict]:
+    return list(iter_rows(query))
+
+def query_columns(query: FluxQuery | str, columns: list[str]) -> dict[str, list]:
+    """Run a Flux query and return the requested columns as parallel lists."""
+    result = {c: [] for c in columns}
+    appenders = [(c, result[c].append) for c in columns]
+    for row in iter_rows(query):
+        for c, append in appenders:
+            append(row.get(c))
+    return result
@@ -0,0 +1,182 @@
+"""
+In-memory day-ahead energy price table.
+
+Day-ahead prices change at most once a day (tomorrow's curve is published around
+13:00 local time), so instead of running a Flux query on every request the curve is
+loaded once into a sorted table and reloaded only when a new day starts or when
+tomorrow's prices are expected but not loaded yet. If a reload fails while the held
+curve still covers the current hour, that curve keeps being served and the reload is
+retried every MISSING_CURVE_RETRY_SECONDS.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from src.database.flux import FluxQuery, to_epoch
+from src.database.influx_client import query_rows
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import CACHE_LOOKUPS
+
+HOUR = 3600
+
+# How long to wait between reload attempts while tomorrow's prices are still missing,
+# or after a failed reload
+MISSING_CURVE_RETRY_SECONDS = 600
+
+
+class PriceTable:
+    """
+    Sorted table of hourly prices (epoch seconds -> øre per kWh) for one region.
+
+    ``version`` increases every time a new curve is loaded, which lets derived results
+    (such as the cheapest window) be cached per curve.
+    """
+
+    def __init__(self, region: str):
+        self.region = region
+        self.version = 0
+        self._times = []
+        self._prices = []
+        self._loaded_day = None
+        self._last_load = 0.0
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self._cheapest_cache = {}
+
+    def _load(self):
+        query = (
+            FluxQuery("energy_prices")
+            .range("-1d", "2d")
+            .tags(region=self.region)
+            .fields(["price_per_kwh_ore"])
+            .keep(["_time", "_value"])
+            .group()
+            .sort()
+        )
+        rows = {}
+        for row in query_rows(query):
+            rows[int(to_epoch(row["_time"]))] = row["_value"]
+
+        times = sorted(rows)
+        self._times = times
+        self._prices = [rows[t] for t in times]
+        self._cheapest_cache = {}
+        self.version += 1
+
+    def _covers(self, now: float) -> bool:
+        return bool(self._times) and self._times[0] <= now < self._times[-1] + HOUR
+
+    def _needs_reload(self, now: float) -> bool:
+        retry_due = now - self._last_load > MISSING_CURVE_RETRY_SECONDS
+        if self._load_failed and self._covers(now) and not retry_due:
+            return False
+        today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+        if today != self._loaded_day:
+            return True
+        # Tomorrow's curve is published during the afternoon; keep checking for it
+        # (rate-limited) until the table reaches at least 12 hours ahead.
+        covered_until = self._times[-1] + HOUR if self._times else 0
+        return covered_until < now + 12 * HOUR and retry_due
+
+    def refresh(self, now: float = None):
+        """
+        Reload the curve from InfluxDB if a new day has arrived or data is missing. A
+        failed reload raises only if the held curve doesn't cover ``now``.
+        """
+        now = time.time() if now is None else now
+        if not self._needs_reload(now):
+            CACHE_LOOKUPS.labels("price_table", "hit").inc()
+            return
+        CACHE_LOOKUPS.labels("price_table", "miss").inc()
+        with self._lock:
+            if not self._needs_reload(now):
+                return
+            self._last_load = now
+            try:
+                self._load()
+            except Exception as e:
+                self._load_failed = True
+                if not self._covers(now):
+                    raise
+                logger.error(f"[price_table] Reload of {self.region} prices failed, serving the held curve: {e}")
+                return
+            self._load_failed = False
+            self._loaded_day = datetime.fromtimestamp(now, tz=timezone.utc).date()
+
+    def _entry(self, i: int) -> dict:
+        return {
+            "time": datetime.fromtimestamp(self._times[i], tz=timezone.utc).isoformat(),
+            "price_per_kwh_ore": self._prices[i]
+        }
+
+    def current(self, now: float = None):
+        """Return the price for the hour containing ``now``, or None if not loaded."""
+        now = time.time() if now is None else now
+        self.refresh(now)
+        times = self._times
+        i = bisect_right(times, now) - 1
+        if i < 0 or now - times[i] >= HOUR:
+            return None
+        return self._entry(i)
+
+    def future(self, now: float = None, hours: int = 48) -> list[dict]:
+        """Return all prices starting at or after ``now`` within the next ``hours``."""
+        now = time.time() if now is None else now
+        self.refresh(now)
+        start = bisect_left(self._times, now)
+        stop = bisect_left(self._times, now + hours * HOUR)
+        return [self._entry(i) for i in range(start, stop)]
+
+    def cheapest_window(self, hours: int, now: float = None):
+        """
+        Find the cheapest run of ``hours`` contiguous hourly prices starting from the
+        current hour, using a single O(n) sliding-window pass over the curve.
+        Results are cached per curve version and current hour.
+        """
+        now = time.time() if now is None else now
+        self.refresh(now)
+        times, prices = self._times, self._prices
+        start = max(bisect_right(times, now) - 1, 0)
+        if start < len(times) and now - times[start] >= HOUR:
+            start += 1
+
+        key = (self.version, hours, start)
+        cached = self._cheapest_cache.get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels("cheapest_window", "hit").inc()
+            return cached
+        CACHE_LOOKUPS.labels("cheapest_window", "miss").inc()
+
+        best_sum = None
+        best_start = None
+        window_sum = 0
+        run_start = start
+        for i in range(start, len(times)):
+            # A gap in the curve breaks contiguity, so restart the window after it
+            if i > run_start and times[i] - times[i - 1] != HOUR:
+                run_start = i
+                window_sum = 0
+            window_sum += prices[i]
+            if i - run_start + 1 > hours:
+                window_sum -= prices[i - hours]
+            if i - run_start + 1 >= hours and (best_sum is None or window_sum < best_sum):
+                best_sum = window_sum
+                best_start = i - hours + 1
+
+        result = None
+        if best_start is not None:
+            result = {
+                "start": datetime.fromtimestamp(times[best_start], tz=timezone.utc).isoformat(),
+                "end": datetime.fromtimestamp(times[best_start] + hours * HOUR, tz=timezone.utc).isoformat(),
+                "hours": hours,
+                "average_price_per_kwh_ore": best_sum / hours,
+                "prices": [self._entry(i) for i in range(best_start, best_start + hours)]
+            }
+        self._cheapest_cache[key] = result
+        return result
+
+
+price_table = PriceTable(Config.ENERGY_REGION)
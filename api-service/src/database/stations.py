@@ -0,0 +1,147 @@
+"""
+Station catalog with a spatial index for nearest-station lookups.
+
+Stations are read once from STATION_CATALOG_FILE, a CSV with a header row. Two layouts
+are accepted:
+
+* ``icao,name,lat,lon,elevation_m``: the file shipped in ``data/stations.csv``.
+* OurAirports' ``airports.csv`` (ident, icao_code/gps_code, latitude_deg,
+  longitude_deg, elevation_ft). It can be dropped in for the full global catalog; rows
+  without a four-letter ICAO code are skipped.
+
+Each station is stored as a point on the unit sphere, and the points are indexed in a
+3-d KD-tree built once at load. Straight-line (chord) distance between points on the
+sphere orders them the same way as great-circle distance. A k-nearest query is
+therefore an ordinary Euclidean KD-tree search, with no special cases at the poles or
+the antimeridian. It visits O(log n) nodes, so it takes microseconds even for a catalog
+of tens of thousands of stations.
+"""
+
+import csv
+import heapq
+import math
+import threading
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+
+EARTH_RADIUS_KM = 6371.0088
+FT_TO_M = 0.3048
+
+
+def unit_vector(lat: float, lon: float):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def chord_to_km(chord_squared: float) -> float:
+    """Great-circle distance in km for a squared chord length on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class KDTree:
+    """
+    Static 3-d KD-tree over a list of points. Nodes are tuples of (point index, split
+    axis, left subtree, right subtree), with None for an empty subtree.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indices, axis):
+        if not indices:
+            return None
+        indices.sort(key=lambda i: self.points[i][axis])
+        mid = len(indices) // 2
+        next_axis = (axis + 1) % 3
+        return (indices[mid], axis, self._build(indices[:mid], next_axis), self._build(indices[mid + 1:], next_axis))
+
+    def nearest(self, target, k: int):
+        """The ``k`` nearest points as (squared distance, point index), nearest first."""
+        best = []  # max-heap of (-squared distance, index)
+        if k > 0:
+            self._search(self.root, target, k, best)
+        return sorted((-negative, index) for negative, index in best)
+
+    def _search(self, node, target, k, best):
+        if node is None:
+            return
+        index, axis, left, right = node
+        point = self.points[index]
+        dx, dy, dz = point[0] - target[0], point[1] - target[1], point[2] - target[2]
+        distance = dx * dx + dy * dy + dz * dz
+        if len(best) < k:
+            heapq.heappush(best, (-distance, index))
+        elif distance < -best[0][0]:
+            heapq.heapreplace(best, (-distance, index))
+
+        diff = target[axis] - point[axis]
+        near, far = (left, right) if diff < 0 else (right, left)
+        self._search(near, target, k, best)
+        # The far side can only hold a nearer point if the splitting plane is closer
+        # than the current k-th best
+        if len(best) < k or diff * diff < -best[0][0]:
+            self._search(far, target, k, best)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_row(row):
+    """A catalog row as a station dict, or None if it has no ICAO id or coordinates."""
+    icao = row.get("icao") or row.get("icao_code") or row.get("gps_code") or row.get("ident") or ""
+    icao = icao.strip().upper()
+    lat = _float(row.get("lat", row.get("latitude_deg")))
+    lon = _float(row.get("lon", row.get("longitude_deg")))
+    if len(icao) != 4 or not icao.isalpha() or lat is None or lon is None:
+        return None
+    elevation = _float(row.get("elevation_m"))
+    if elevation is None and _float(row.get("elevation_ft")) is not None:
+        elevation = round(_float(row.get("elevation_ft")) * FT_TO_M)
+    return {"station_id": icao, "name": row.get("name") or None, "lat": lat, "lon": lon, "elevation_m": elevation}
+
+
+class StationCatalog:
+    def __init__(self, path: str):
+        self.path = path
+        self.stations = []
+        self._tree = None
+        self._lock = threading.Lock()
+
+    def load(self, stations=None):
+        """Read the catalog file (or take ``stations``) and build the index."""
+        if stations is None:
+            stations = {}
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    station = _parse_row(row)
+                    if station is not None:
+                        stations.setdefault(station["station_id"], station)
+            stations = list(stations.values())
+        tree = KDTree([unit_vector(s["lat"], s["lon"]) for s in stations])
+        self.stations, self._tree = stations, tree
+        logger.info(f"Indexed {len(stations)} stations from {self.path}")
+
+    def ensure_loaded(self):
+        """Load the catalog unless it is loaded already; returns the index."""
+        if self._tree is None:
+            with self._lock:
+                if self._tree is None:
+                    self.load()
+        return self._tree
+
+    def nearest(self, lat: float, lon: float, k: int = 1):
+        """The ``k`` stations nearest to (lat, lon), nearest first, with ``distance_km``."""
+        tree = self.ensure_loaded()
+        return [
+            {**self.stations[index], "distance_km": round(chord_to_km(distance), 1)}
+            for distance, index in tree.nearest(unit_vector(lat, lon), k)
+        ]
+
+
+catalog = StationCatalog(Config.STATION_CATALOG_FILE)
@@ -0,0 +1,222 @@
+"""
+Columnar export of a measurement's time range as Parquet or Arrow IPC.
+
+    python -m src.export metar --start 2024-01-01 --stop 2024-02-01 [--format parquet] [-o metar.parquet]
+
+The range is read from InfluxDB one EXPORT_WINDOW_HOURS window at a time. Each window's
+rows are streamed from the annotated CSV response and collected into batches of
+EXPORT_BATCH_ROWS, and each batch becomes one Parquet row group or Arrow record batch.
+Memory therefore stays bounded by the batch size, however long the range is.
+
+The schema is fixed before any data is read. A ``first()`` query over the range
+collects every tag and field column and a sample value for each. That gives:
+
+* ``time``: a UTC timestamp
+* tags and string fields: strings
+* booleans: bool
+* other numbers: float64, since InfluxDB fields can switch between integer and float
+  writes
+
+Parquet output is zstd-compressed and has per-row-group column statistics, so readers
+such as DuckDB and pandas can skip row groups by time or station.
+
+The same generator serves ``/api/export/{measurement}``, which streams the file as it is
+written.
+"""
+
+import argparse
+import io
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.database.admission import export_admission
+from src.database.flux import FluxQuery
+from src.database.influx_client import iter_rows
+from src.utils.config import Config
+from src.utils.logging_config import logger
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+_RELATIVE = re.compile(r"^-(\d+)([smhdw])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_time(value: str, now: datetime = None) -> datetime:
+    """An absolute UTC datetime from an ISO date/time or a relative duration like ``-7d``."""
+    now = now or datetime.now(timezone.utc)
+    value = value.strip()
+    if value == "now":
+        return now
+    match = _RELATIVE.match(value)
+    if match:
+        return now - timedelta(seconds=int(match.group(1)) * _UNITS[match.group(2)])
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are handed out (and dropped) piece by piece."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class NoData(LookupError):
+    """The measurement has no points (for the tags and fields asked for) in the range."""
+
+
+def _query(measurement, start, stop, tags, fields):
+    query = FluxQuery(measurement).range(start, stop).tags(tags)
+    if fields:
+        query.fields(fields)
+    return query
+
+
+def discover_schema(measurement: str, start: datetime, stop: datetime, tags: dict = None, fields=None):
+    """
+    Arrow schema for the export, from the first point of every series and field in the
+    range. Raises NoData if there is none.
+    """
+    samples = {}
+    for row in iter_rows(_query(measurement, start, stop, tags, fields).first().pivot_series(), export_admission):
+        for name, value in row.items():
+            if name != "_time" and value is not None:
+                samples.setdefault(name, value)
+    if not samples:
+        raise NoData(f"No {measurement} data between {start.isoformat()} and {stop.isoformat()}")
+
+    columns = [pa.field("time", pa.timestamp("ns", tz="UTC"), nullable=False)]
+    for name in sorted(samples):
+        value = samples[name]
+        if isinstance(value, bool):
+            arrow_type = pa.bool_()
+        elif isinstance(value, (int, float)):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        columns.append(pa.field(name, arrow_type))
+    return pa.schema(columns, metadata={"measurement": measurement})
+
+
+def _windows(start: datetime, stop: datetime):
+    step = timedelta(hours=Config.EXPORT_WINDOW_HOURS)
+    while start < stop:
+        yield start, min(start + step, stop)
+        start += step
+
+
+def _batch(schema, rows):
+    arrays = [pa.array([row["_time"] for row in rows], pa.string()).cast(schema.field("time").type)]
+    for field in list(schema)[1:]:
+        values = [row.get(field.name) for row in rows]
+        try:
+            arrays.append(pa.array(values, field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # A value of another type than the column's sample; keep what converts
+            arrays.append(pa.array([_coerce(v, field.type) for v in values], field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _coerce(value, arrow_type):
+    if value is None:
+        return None
+    try:
+        if arrow_type == pa.float64():
+            return float(value)
+        if arrow_type == pa.string():
+            return str(value)
+        return bool(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_export(measurement: str, start: datetime, stop: datetime, fmt: str = "parquet", tags: dict = None,
+                fields=None):
+    """
+    Yield the export file in pieces as it is written: one piece per batch of
+    EXPORT_BATCH_ROWS rows, plus the footer. The schema query and the first window's
+    query run when the first piece is requested, so their errors (NoData, Overloaded,
+    query failures) surface there.
+    """
+    started = time.perf_counter()
+    schema = discover_schema(measurement, start, stop, tags, fields)
+    sink = _Drain()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd", write_statistics=True)
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    total = 0
+    rows = []
+    try:
+        for window_start, window_stop in _windows(start, stop):
+            query = _query(measurement, window_start, window_stop, tags, fields).pivot_series().sort()
+            for row in iter_rows(query, export_admission):
+                rows.append(row)
+                if len(rows) >= Config.EXPORT_BATCH_ROWS:
+                    writer.write_batch(_batch(schema, rows))
+                    total += len(rows)
+                    rows = []
+                    yield sink.take()
+        if rows:
+            writer.write_batch(_batch(schema, rows))
+            total += len(rows)
+    finally:
+        writer.close()
+    yield sink.take()
+    logger.info(f"[export] {measurement} {start.isoformat()}..{stop.isoformat()}: {total} rows as {fmt} "
+                f"in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("measurement")
+    parser.add_argument("--start", default="-7d", help="ISO date/time or relative duration (default -7d)")
+    parser.add_argument("--stop", default="now", help="ISO date/time or relative duration (default now)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--tag", action="append", default=[], metavar="KEY=VALUE", help="filter on a tag value")
+    parser.add_argument("--field", action="append", default=[], help="only export these fields")
+    parser.add_argument("-o", "--output", help="output file (default <measurement>.<format>)")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    tags = dict(tag.split("=", 1) for tag in args.tag)
+    output = args.output or f"{args.measurement}.{FORMATS[args.format][1]}"
+    pieces = iter_export(args.measurement, parse_time(args.start, now), parse_time(args.stop, now),
+                         args.format, tags, args.field)
+    try:
+        first = next(pieces)
+    except NoData as e:
+        raise SystemExit(str(e))
+    with open(output, "wb") as f:
+        f.write(first)
+        for piece in pieces:
+            f.write(piece)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,89 @@
-from fastapi import FastAPI
-from src.routes import weather, energy
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from src.database.admission import Overloaded
+from src.database.hot_series import hot_tier
+from src.database.stations import catalog
+from src.routes import admin, weather, energy, export
+from src.utils.logging_config import logger
+from src.utils.metrics import CONTENT_TYPE, REGISTRY, REQUEST_SECONDS
+from src.utils.tracing import trace
+import threading
+import time
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Seed the hot tier in the background so a slow or unreachable InfluxDB doesn't hold
+    # up startup; series that aren't seeded yet seed themselves on first request
+    threading.Thread(target=hot_tier.seed, name="hot-tier-seed", daemon=True).start()
+    # Build the station index up front rather than on the first nearest-station request
+    try:
+        catalog.ensure_loaded()
+    except OSError as e:
+        logger.error(f"Station catalog {catalog.path} not loaded: {e}")
+    yield
+
 
 app = FastAPI(
     title="Weather & Energy API",
     description="API to access METAR, forecast, and Netatmo data",
-    version="0.5.0"
+    version="0.5.0",
+    lifespan=lifespan
 )
 
 app.include_router(weather.router, prefix="/api/weather", tags=["weather"])
-app.include_router(energy.router, prefix="/api/energy", tags=["energy"])
\ No newline at end of file
+app.include_router(energy.router, prefix="/api/energy", tags=["energy"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(admin.router, prefix="/admin", include_in_schema=False)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Routes without a stale fallback (see utils/stale.py) shed load here
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+
+def _route_template(request: Request) -> str:
+    """
+    Full route template for a request. Routes inside an included router only know their
+    own path (/metar/{station_id}), so the router prefix is recovered from the part of
+    the raw path in front of the suffix the route matched.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    raw = request.scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is None:
+        return route.path
+    for i, char in enumerate(raw):
+        if char == "/" and regex.match(raw[i:]):
+            return raw[:i] + route.path
+    return route.path
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    path = "unmatched"
+    request_trace = trace(request.method)
+    try:
+        with request_trace:
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                return response
+            finally:
+                # Label by route template (/api/weather/metar/{station_id}) rather than raw
+                # path to keep cardinality bounded
+                path = _route_template(request)
+                request_trace.rename(f"{request.method} {path}")
+    finally:
+        REQUEST_SECONDS.labels(request.method, path, status).observe(time.perf_counter() - start)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
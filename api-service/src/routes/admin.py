@@ -0,0 +1,25 @@
+import hmac
+from fastapi import APIRouter, Header, HTTPException, Query
+from src.utils.config import Config
+from src.utils.profiling import start_profile
+
+router = APIRouter()
+
+def require_admin(token: str):
+    # Admin routes are off unless ADMIN_TOKEN is set
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, Config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/profile")
+def capture_profile(
+    seconds: float = Query(None, gt=0, le=600),
+    x_admin_token: str = Header(None)
+):
+    # Start a sampling profile of this worker process; the file is written when it finishes
+    require_admin(x_admin_token)
+    path = start_profile(seconds=seconds)
+    if path is None:
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+    return {"path": path, "seconds": seconds or Config.PROFILE_SECONDS}
@@ -1,58 +1,40 @@
-from fastapi import APIRouter, HTTPException
-from src.database.influx_client import query_influx
+from fastapi import APIRouter, HTTPException, Query
+from src.database.hot_series import HOUR, hot_tier
+from src.database.price_table import price_table
 from src.utils.config import Config
-from datetime import datetime, timedelta
+from src.utils.stale import serve_stale
+import time
 
 router = APIRouter()
 
 @router.get("/current")
+@serve_stale
 def get_current_energy_price():
-    # Get the current hour's price
-    # We find the last record that is at or before now
-    now = datetime.utcnow().isoformat() + "Z"
-    flux = f'''
-from(bucket: "{Config.INFLUX_BUCKET}")
-  |> range(start: -1d)
-  |> filter(fn: (r) => r._measurement == "energy_prices" and r._field == "eur_per_kwh" and r.region == "NO2")
-  |> filter(fn: (r) => r._time <= now())
-  |> last()
-'''
-    tables = query_influx(flux)
-    if not tables or not tables[0].records:
+    # Get the current hour's price from the in-memory day-ahead table
+    price = price_table.current()
+    if price is None:
         raise HTTPException(status_code=404, detail="No current energy price found")
-
-    record = tables[0].records[0]
-    return {
-        "time": record.get_time().isoformat(),
-        "eur_per_kwh": record.get_value()
-    }
+    return price
 
 @router.get("/future")
+@serve_stale
 def get_future_energy_prices():
-    # Return future hours from now
-    # Query data for next 36 hours or so, to cover today + tomorrow
-    now = datetime.utcnow()
-    flux = f'''
-from(bucket: "{Config.INFLUX_BUCKET}")
-  |> range(start: {now.isoformat()}Z, stop: { (now + timedelta(hours=48)).isoformat()}Z)
-  |> filter(fn: (r) => r._measurement == "energy_prices" and r._field == "eur_per_kwh" and r.region == "NO2")
-  |> group(columns: ["_time"])
-  |> sort(columns: ["_time"], desc: false)
-'''
-    tables = query_influx(flux)
-    if not tables:
-        return []
+    # Return future hours from now, covering today + tomorrow when published
+    return price_table.future(hours=48)
 
-    # Flatten results
-    results = []
-    for table in tables:
-        for record in table.records:
-            results.append({
-                "time": record.get_time().isoformat(),
-                "eur_per_kwh": record.get_value()
-            })
+@router.get("/cheapest")
+@serve_stale
+def get_cheapest_energy_window(hours: int = Query(1, ge=1, le=48)):
+    # Cheapest contiguous window of N hours from the current hour onwards
+    window = price_table.cheapest_window(hours)
+    if window is None:
+        raise HTTPException(status_code=404, detail=f"No {hours}-hour window of energy prices found")
+    return window
 
-    # If multiple results are returned, it's because we didn't limit by region or measure.
-    # We did, so it should be unique. Just return them sorted.
-    results.sort(key=lambda x: x["time"])
-    return results
\ No newline at end of file
+@router.get("/history")
+@serve_stale
+def get_energy_price_history(hours: float = Query(24, gt=0, le=24 * 31)):
+    # Past prices for the configured region over the last N hours
+    now = time.time()
+    return hot_tier.history("energy_prices", "price_per_kwh_ore", {"region": Config.ENERGY_REGION},
+                            start=now - hours * HOUR, stop=now)
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import itertools
+from src.database.admission import Overloaded
+from src.export import FORMATS, NoData, iter_export, parse_time
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.stale import BACKEND_ERRORS
+
+router = APIRouter()
+
+@router.get("/{measurement}")
+def export_measurement(measurement: str, start: str = "-1d", stop: str = "now",
+                       format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+                       station_id: str = None, field: list[str] = Query(None)):
+    # A measurement's time range as a Parquet or Arrow IPC file, streamed one row
+    # group / record batch at a time (see export.py)
+    now = datetime.now(timezone.utc)
+    try:
+        range_start, range_stop = parse_time(start, now), parse_time(stop, now)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and stop must be ISO times or durations like -7d")
+    if range_start >= range_stop:
+        raise HTTPException(status_code=400, detail="start must be before stop")
+    if (range_stop - range_start).total_seconds() > Config.EXPORT_MAX_DAYS * 86400:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {Config.EXPORT_MAX_DAYS:g} days")
+
+    tags = {"station_id": station_id.upper()} if station_id else None
+    media_type, extension = FORMATS[format]
+    filename = f"{measurement}_{range_start:%Y%m%dT%H%M}_{range_stop:%Y%m%dT%H%M}.{extension}"
+    # The status and headers go out with the first piece, so the schema query and the
+    # first rows are fetched before the response starts: a failure there is still a
+    # 404 or 503 rather than a 200 with an empty or truncated file
+    pieces = iter_export(measurement, range_start, range_stop, format, tags, field)
+    try:
+        first = next(pieces)
+    except NoData as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Overloaded:
+        raise
+    except BACKEND_ERRORS as e:
+        logger.error(f"[export] {measurement} export failed to start: {e}")
+        raise HTTPException(status_code=503, detail="Data temporarily unavailable",
+                            headers={"Retry-After": str(Config.RETRY_AFTER_SECONDS)})
+    return StreamingResponse(
+        itertools.chain([first], pieces),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
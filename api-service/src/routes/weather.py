@@ -1,34 +1,36 @@
-from fastapi import APIRouter, HTTPException
-from src.database.influx_client import query_influx
+from fastapi import APIRouter, HTTPException, Query
+from src.database.flux import FluxQuery
+from src.database.hot_series import HOUR, hot_tier
+from src.database.influx_client import query_rows
+from src.database.stations import catalog
 from src.utils.config import Config
+from src.utils.stale import serve_stale
+import time
 
 router = APIRouter()
 
 def get_latest_point(measurement: str, fields: list[str], tags: dict[str, str] = None):
-    # Build a Flux query to get the latest data point for given measurement and fields.
-    # If tags are provided, filter by them.
-    tag_filters = ""
-    if tags:
-        for k, v in tags.items():
-            tag_filters += f' and r["{k}"] == "{v}"'
-    fields_filter = ' or '.join([f'r._field == "{f}"' for f in fields])
-    flux = f'''
-from(bucket: "{Config.INFLUX_BUCKET}")
-  |> range(start: -1h)
-  |> filter(fn: (r) => r._measurement == "{measurement}" {tag_filters} and ({fields_filter}))
-  |> last()
-'''
-    tables = query_influx(flux)
-    if not tables:
-        return {}
-    # Convert tables to a dict {field: value}
+    # Latest value of each field, pivoted by Influx into rows of {_time, field: value}.
+    # Fields may have been written at different times, so merge rows oldest-first.
+    query = (
+        FluxQuery(measurement)
+        .range("-1h")
+        .tags(tags)
+        .fields(fields)
+        .last()
+        .pivot()
+        .sort()
+    )
     data = {}
-    for table in tables:
-        for record in table.records:
-            data[record.get_field()] = record.get_value()
+    for row in query_rows(query):
+        for field in fields:
+            value = row.get(field)
+            if value is not None:
+                data[field] = value
     return data
 
 @router.get("/metar/{station_id}")
+@serve_stale
 def get_metar(station_id: str):
     fields = ["temp_c", "dewpoint_c", "wind_dir_deg", "wind_speed_kt", "altim_in_hg", "visibility_statute_mi", "wx_string"]
     data = get_latest_point("metar", fields, tags={"station_id": station_id})
@@ -37,14 +39,17 @@ def get_metar(station_id: str):
     return data
 
 @router.get("/forecast")
-def get_forecast():
+@serve_stale
+def get_forecast(location: str = None):
+    # Latest yr.no forecast for one location (DEFAULT_FORECAST_LOCATION unless ?location=)
     fields = ["temp_c", "wind_speed_m_s", "cloud_fraction_percent", "pressure_hpa", "relative_humidity_percent", "precip_1h_mm", "precip_6h_mm", "precip_12h_mm"]
-    data = get_latest_point("yr_forecast", fields)
+    data = get_latest_point("yr_forecast", fields, tags={"location": location or Config.DEFAULT_FORECAST_LOCATION})
     if not data:
         raise HTTPException(status_code=404, detail="No forecast data found")
     return data
 
 @router.get("/netatmo")
+@serve_stale
 def get_netatmo():
     fields = ["temperature_c", "humidity_percent", "pressure_hpa", "rain_mm", "wind_strength_kmh", "wind_angle_deg"]
     data = get_latest_point("netatmo", fields)
@@ -52,14 +57,56 @@ def get_netatmo():
         raise HTTPException(status_code=404, detail="No Netatmo data found")
     return data
 
+def get_latest_metars(station_ids: list[str], fields: list[str]):
+    # Latest METAR of several stations in one query: {station_id: {"observed": ..., field: value}}
+    query = (
+        FluxQuery("metar")
+        .range("-1h")
+        .tag_in("station_id", station_ids)
+        .fields(fields)
+        .last()
+        .pivot_series()
+        .sort()
+    )
+    metars = {}
+    for row in query_rows(query):
+        metar = metars.setdefault(row.get("station_id"), {})
+        metar["observed"] = row["_time"]
+        for field in fields:
+            value = row.get(field)
+            if value is not None:
+                metar[field] = value
+    return metars
+
+@router.get("/nearest")
+@serve_stale
+def get_nearest(lat: float = Query(ge=-90, le=90), lon: float = Query(ge=-180, le=180),
+                k: int = Query(5, ge=1, le=Config.NEAREST_MAX_K)):
+    # The k catalog stations nearest to lat/lon, nearest first, each with its latest
+    # METAR (null if it hasn't reported in the last hour)
+    stations = catalog.nearest(lat, lon, k)
+    fields = ["temp_c", "dewpoint_c", "wind_dir_deg", "wind_speed_kt", "altim_hpa", "visibility_statute_mi", "wx_string"]
+    metars = get_latest_metars([s["station_id"] for s in stations], fields) if stations else {}
+    return {
+        "lat": lat,
+        "lon": lon,
+        "stations": [{**station, "metar": metars.get(station["station_id"])} for station in stations]
+    }
+
 @router.get("/current")
-def get_current():
-    # Example: get a default station's METAR, plus forecast, plus netatmo
-    # Change the default station as desired.
-    default_station = "ENZV"
-    metar_data = get_latest_point("metar", ["temp_c", "wind_speed_kt", "altim_hpa", "wx_string"], tags={"station_id":
-                                                                                                            default_station})
-    forecast_data = get_latest_point("yr_forecast", ["temp_c", "precip_1h_mm", "wind_speed_m_s"])
+@serve_stale
+def get_current(station: str = None, lat: float = Query(None, ge=-90, le=90),
+                lon: float = Query(None, ge=-180, le=180), location: str = None):
+    # The station's METAR (?station=, else the catalog station nearest to ?lat=&lon=,
+    # else DEFAULT_STATION), plus the forecast for ?location= (else
+    # DEFAULT_FORECAST_LOCATION), plus netatmo
+    if not station and lat is not None and lon is not None:
+        station = next((s["station_id"] for s in catalog.nearest(lat, lon, 1)), None)
+    station_id = (station or Config.DEFAULT_STATION).upper()
+    metar_data = get_latest_point("metar", ["temp_c", "wind_speed_kt", "altim_hpa", "wx_string"],
+                                  tags={"station_id": station_id})
+    forecast_data = get_latest_point("yr_forecast", ["temp_c", "precip_1h_mm", "wind_speed_m_s"],
+                                     tags={"location": location or Config.DEFAULT_FORECAST_LOCATION})
     netatmo_data = get_latest_point("netatmo", ["temperature_c", "humidity_percent", "rain_mm"])
 
     # Merge data into one response
@@ -67,4 +114,36 @@ def get_current():
         "metar": metar_data,
         "forecast": forecast_data,
         "netatmo": netatmo_data
-    }
\ No newline at end of file
+    }
+
+@router.get("/history/{measurement}/{field}")
+@serve_stale
+def get_history(measurement: str, field: str, hours: float = Query(24, gt=0, le=24 * 31), station_id: str = None):
+    # One field's values over the last N hours; served from the in-memory hot tier when
+    # the series is configured in HOT_SERIES and the range falls inside it
+    tags = {"station_id": station_id.upper()} if station_id else None
+    now = time.time()
+    return hot_tier.history(measurement, field, tags, start=now - hours * HOUR, stop=now)
+
+@router.get("/verification")
+@serve_stale
+def get_verification(location: str = "Home"):
+    # Running forecast error statistics (forecast minus observed) kept by the fetcher,
+    # by source and variable, one entry per lead-time bucket
+    query = (
+        FluxQuery("forecast_verification")
+        .range("-365d")
+        .tags({"location": location})
+        .last()
+        .pivot_series()
+    )
+    sources = {}
+    for row in query_rows(query):
+        stats = {key: row.get(key) for key in ("lead", "count", "bias", "mae", "rmse")}
+        sources.setdefault(row.get("source"), {}).setdefault(row.get("variable"), []).append(stats)
+    if not sources:
+        raise HTTPException(status_code=404, detail="No forecast verification data found")
+    for variables in sources.values():
+        for buckets in variables.values():
+            buckets.sort(key=lambda stats: float(stats["lead"].split("-")[0].rstrip("h+")))
+    return {"location": location, "sources": sources}
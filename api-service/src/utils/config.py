@@ -2,6 +2,56 @@ import os
 
 class Config:
     INFLUX_HOST = os.getenv("INFLUX_HOST", "influxdb")
+    INFLUX_URL = os.getenv("INFLUX_URL", f"http://{INFLUX_HOST}:8086")
     INFLUX_BUCKET = os.getenv("INFLUX_BUCKET", "weather")
     INFLUX_TOKEN = os.getenv("INFLUX_TOKEN", "")
-    INFLUX_ORG = os.getenv("INFLUX_ORG", "myorg")
\ No newline at end of file
+    INFLUX_ORG = os.getenv("INFLUX_ORG", "myorg")
+    ENERGY_REGION = os.getenv("ENERGY_REGION", "NO2")
+    # Station used by /api/weather/current when none is given
+    DEFAULT_STATION = os.getenv("DEFAULT_STATION", "ENZV")
+    # Forecast location (a name from the fetcher's FORECAST_LOCATIONS) used by
+    # /api/weather/forecast and /current when none is given
+    DEFAULT_FORECAST_LOCATION = os.getenv("DEFAULT_FORECAST_LOCATION", "Home")
+    # Station catalog for nearest-station lookups (see database/stations.py)
+    STATION_CATALOG_FILE = os.getenv(
+        "STATION_CATALOG_FILE",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "stations.csv")
+    )
+    NEAREST_MAX_K = int(os.getenv("NEAREST_MAX_K", 50))
+
+    # Tracing and on-demand profiling (TRACE_SAMPLE_RATE=0 disables tracing)
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+    TRACE_FILE = os.getenv("TRACE_FILE", "")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+    PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", 30))
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.01))
+    # Admin endpoints are disabled unless a token is configured
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+    # Hot tier: recent points of these series are held in memory (see database/hot_series.py)
+    HOT_SERIES = os.getenv(
+        "HOT_SERIES",
+        f"metar:temp_c:station_id={DEFAULT_STATION},netatmo:temperature_c,netatmo:humidity_percent,"
+        f"energy_prices:price_per_kwh_ore:region={ENERGY_REGION}"
+    )
+    HOT_WINDOW_HOURS = float(os.getenv("HOT_WINDOW_HOURS", 24))
+    HOT_SERIES_CAPACITY = int(os.getenv("HOT_SERIES_CAPACITY", 4096))
+    HOT_REFRESH_SECONDS = float(os.getenv("HOT_REFRESH_SECONDS", 30))
+
+    # Parquet/Arrow export (see export.py): rows per row group and hours per Flux query
+    EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 100000))
+    EXPORT_WINDOW_HOURS = float(os.getenv("EXPORT_WINDOW_HOURS", 6))
+    EXPORT_MAX_DAYS = float(os.getenv("EXPORT_MAX_DAYS", 400))
+    # Exports hold their query open while the file streams, so they have their own slots
+    EXPORT_MAX_QUERIES = int(os.getenv("EXPORT_MAX_QUERIES", 2))
+
+    # Admission control (see database/admission.py): at most INFLUX_MAX_QUERIES Flux
+    # queries run at once; a request that can't start one within INFLUX_QUEUE_SECONDS
+    # gets a 503 with Retry-After instead of waiting on a slow InfluxDB
+    INFLUX_MAX_QUERIES = int(os.getenv("INFLUX_MAX_QUERIES", 8))
+    INFLUX_QUEUE_SECONDS = float(os.getenv("INFLUX_QUEUE_SECONDS", 1.0))
+    INFLUX_TIMEOUT_SECONDS = float(os.getenv("INFLUX_TIMEOUT_SECONDS", 10))
+    RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", 5))
+    # Stale-if-error (see utils/stale.py): how old and how many last good responses are kept
+    STALE_MAX_AGE_SECONDS = float(os.getenv("STALE_MAX_AGE_SECONDS", 3600))
+    STALE_MAX_ENTRIES = int(os.getenv("STALE_MAX_ENTRIES", 1024))
@@ -0,0 +1,18 @@
+import logging
+import os
+
+def setup_logger():
+    # Get log level from environment, default to INFO
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+
+    # Set up basic logging configuration
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+    # Return the root logger
+    return logging.getLogger()
+
+logger = setup_logger()
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+The api-service's metrics. The registry itself is in ``prometheus.py``.
+"""
+
+from src.utils.prometheus import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram
+
+
+# Service metrics
+REQUEST_SECONDS = Histogram(
+    "api_request_duration_seconds", "API request latency by route", ("method", "route", "status")
+)
+INFLUX_QUERY_SECONDS = Histogram(
+    "api_influx_query_duration_seconds", "Time spent running and decoding Flux queries", ("measurement",)
+)
+INFLUX_QUERY_ERRORS = Counter("api_influx_query_errors_total", "Failed Flux queries", ("measurement",))
+CACHE_LOOKUPS = Counter("api_cache_lookups_total", "In-memory cache lookups by result", ("cache", "result"))
+INFLUX_QUERIES_IN_FLIGHT = Gauge("api_influx_queries_in_flight", "Flux queries currently running", ("pool",))
+INFLUX_QUERIES_SHED = Counter(
+    "api_influx_queries_shed_total", "Flux queries refused because no slot freed up in time", ("measurement",)
+)
+STALE_RESPONSES = Counter(
+    "api_stale_responses_total", "Responses served from the last good copy after a backend error", ("route",)
+)
@@ -0,0 +1,236 @@
+"""
+Minimal Prometheus metrics registry.
+
+Counters and histograms are updated through per-thread cells, so the hot path never
+takes a lock: a lock is only taken the first time a thread touches a metric (to
+register its cell), when a thread exits, and while rendering. Rendering sums the cells
+of all threads. A thread's cell is folded into the metric's base totals and dropped
+when the thread exits, so short-lived pool threads don't pile up cells. Gauges hold a
+single shared value per label set, since "set" has no meaningful per-thread sum.
+
+This file is identical in data-fetcher/src/utils and api-service/src/utils on purpose:
+each service image is built from its own directory only, so the registry is copied
+rather than shared. Change both copies together; each service's
+tests/test_metrics.py checks that they match.
+"""
+
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._cells = []
+        self._base = {}  # totals of the cells of threads that have exited
+        self._lock = threading.Lock()
+        self._children = {}
+        REGISTRY.register(self)
+
+    def _cell(self) -> dict:
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = {}
+            with self._lock:
+                self._cells.append(cell)
+            # The owner lives only in this thread's local storage, which is cleared
+            # when the thread exits; its finalizer then retires the cell
+            owner = _CellOwner()
+            weakref.finalize(owner, self._retire, cell)
+            self._local.owner = owner
+            self._local.cell = cell
+        return cell
+
+    def _retire(self, cell: dict):
+        with self._lock:
+            _add_into(self._base, cell)
+            self._cells = [c for c in self._cells if c is not cell]
+
+    def labels(self, *values):
+        """Return a child bound to the given label values (cached per label set)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children.setdefault(key, _Child(self, key))
+        return child
+
+    def _merged(self) -> dict:
+        # Under the lock, so a cell being retired is counted exactly once
+        with self._lock:
+            merged = {key: list(values) for key, values in self._base.items()}
+            for cell in self._cells:
+                _add_into(merged, cell)
+        return merged
+
+    def _label_str(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _CellOwner:
+    __slots__ = ("__weakref__",)
+
+
+def _add_into(totals: dict, cell: dict):
+    for key, values in list(cell.items()):
+        total = totals.get(key)
+        if total is None:
+            totals[key] = list(values)
+        else:
+            for i, v in enumerate(values):
+                total[i] += v
+
+
+class _Child:
+    __slots__ = ("metric", "key")
+
+    def __init__(self, metric: _Metric, key: tuple):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount: float = 1.0):
+        self.metric._inc(self.key, amount)
+
+    def set(self, value: float):
+        self.metric._set(self.key, value)
+
+    def observe(self, value: float):
+        self.metric._observe(self.key, value)
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _Child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _inc(self, key, amount):
+        cell = self._cell()
+        values = cell.get(key)
+        if values is None:
+            cell[key] = [amount]
+        else:
+            values[0] += amount
+
+    def inc(self, amount: float = 1.0):
+        self._inc((), amount)
+
+    def _samples(self):
+        for key, values in sorted(self._merged().items()):
+            yield f"{self.name}{self._label_str(key)} {values[0]}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self._values = {}
+        super().__init__(name, documentation, labelnames)
+
+    def _set(self, key, value):
+        self._values[key] = value
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float):
+        self._set((), value)
+
+    def _samples(self):
+        for key, value in sorted(list(self._values.items())):
+            yield f"{self.name}{self._label_str(key)} {value}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _observe(self, key, value):
+        cell = self._cell()
+        values = cell.get(key)
+        if values is None:
+            # One slot per bucket plus +Inf, then sum and count
+            values = cell[key] = [0.0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def observe(self, value: float):
+        self._observe((), value)
+
+    def time(self):
+        return _Timer(_Child(self, ()))
+
+    def _samples(self):
+        for key, values in sorted(self._merged().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = self._label_str(key, 'le="' + le + '"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._label_str(key)} {values[-2]}"
+            yield f"{self.name}_count{self._label_str(key)} {values[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,85 @@
+"""
+Stale-if-error for API routes.
+
+A route decorated with ``serve_stale`` remembers its last good response for each set of
+arguments. If a later call fails because the backend is down, timing out or shedding
+load, the remembered response is served instead if it is younger than
+STALE_MAX_AGE_SECONDS. It is marked with an ``Age`` header (seconds since it was fresh)
+and ``X-Stale: true``. Without such a response, the failure becomes a 503 with
+Retry-After.
+
+Only backend failures count (``BACKEND_ERRORS``): shed queries, InfluxDB API and HTTP
+client errors, timeouts, lost connections and errors reported inside a Flux response.
+Anything else is a bug in the route and propagates as a 500 rather than being hidden
+behind old data. HTTPExceptions such as a 404 are answers rather than failures and pass
+through unchanged.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from influxdb_client.rest import ApiException
+from urllib3.exceptions import HTTPError
+
+from src.database.admission import Overloaded
+from src.database.flux import FluxQueryError
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import STALE_RESPONSES
+
+
+class LastGood:
+    """Bounded LRU of ``key -> (stored_at, response)``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key, value, now: float):
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+
+last_good = LastGood(Config.STALE_MAX_ENTRIES)
+
+BACKEND_ERRORS = (Overloaded, ApiException, HTTPError, FluxQueryError, TimeoutError, ConnectionError)
+
+
+def serve_stale(route):
+    """Route decorator: fall back to the last good response when the route fails."""
+
+    @functools.wraps(route)
+    def wrapper(*args, **kwargs):
+        key = (route.__name__, args, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        try:
+            value = route(*args, **kwargs)
+        except BACKEND_ERRORS as e:
+            now = time.time()
+            entry = last_good.get(key)
+            if entry is None or now - entry[0] > Config.STALE_MAX_AGE_SECONDS:
+                logger.error(f"[stale] {route.__name__} failed with no recent response to fall back on: {e}")
+                retry_after = getattr(e, "retry_after", Config.RETRY_AFTER_SECONDS)
+                raise HTTPException(status_code=503, detail="Data temporarily unavailable",
+                                    headers={"Retry-After": str(retry_after)})
+            stored_at, value = entry
+            STALE_RESPONSES.labels(route.__name__).inc()
+            logger.warning(f"[stale] {route.__name__} failed, serving a {now - stored_at:.0f}s old response: {e}")
+            return JSONResponse(jsonable_encoder(value),
+                                headers={"Age": str(int(now - stored_at)), "X-Stale": "true"})
+        last_good.put(key, value, time.time())
+        return value
+
+    return wrapper
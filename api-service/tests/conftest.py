@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the service's code as ``src.*``, as it runs in its container
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
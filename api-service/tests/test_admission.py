@@ -0,0 +1,70 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+import src.database.influx_client as influx_client
+from src.database.admission import Admission, Overloaded, admission, export_admission
+from src.export import iter_export
+from src.utils.config import Config
+
+CSV = (
+    "#datatype,string,long,dateTime:RFC3339,string,double\n"
+    "#group,false,false,false,true,false\n"
+    "#default,_result,,,,\n"
+    ",result,table,_time,station_id,temp_c\n"
+    ",,0,2024-11-01T00:00:00Z,ENZV,4.5\n"
+    ",,0,2024-11-01T00:05:00Z,ENZV,4.6\n"
+    "\n"
+)
+
+
+class StubInflux:
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def query_api(self):
+        return self
+
+    def query_csv(self, query, org=None):
+        return csv.reader(io.StringIO(CSV))
+
+
+@pytest.fixture
+def stub_influx(monkeypatch):
+    monkeypatch.setattr(influx_client, "get_influx_client", StubInflux())
+
+
+def test_slot_sheds_when_full():
+    pool = Admission("test", 1, 0.01)
+    with pool.slot("metar"):
+        with pytest.raises(Overloaded):
+            with pool.slot("metar"):
+                pass
+    with pool.slot("metar"):
+        assert pool.in_flight == 1
+    assert pool.in_flight == 0
+
+
+def test_streaming_export_does_not_hold_dashboard_slots(stub_influx, monkeypatch):
+    monkeypatch.setattr(Config, "EXPORT_BATCH_ROWS", 1)
+    start = datetime(2024, 11, 1, tzinfo=timezone.utc)
+    stop = datetime(2024, 11, 1, 1, tzinfo=timezone.utc)
+    # Paused exports, as with clients downloading slowly
+    exports = [iter_export("metar", start, stop, "arrow") for _ in range(Config.EXPORT_MAX_QUERIES)]
+    for export in exports:
+        next(export)
+    assert export_admission.in_flight == Config.EXPORT_MAX_QUERIES
+    assert admission.in_flight == 0
+
+    assert influx_client.query_rows("from(bucket: \"weather\")")[0]["temp_c"] == 4.5
+    for export in exports:
+        b"".join(export)
+    assert export_admission.in_flight == 0
@@ -0,0 +1,52 @@
+import io
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+import src.export as export
+from src.database.admission import Overloaded
+from src.main import app
+from src.utils.config import Config
+
+client = TestClient(app)
+
+ROWS = [
+    {"_time": "2024-11-01T00:00:00Z", "station_id": "ENZV", "temp_c": 4.5},
+    {"_time": "2024-11-01T00:05:00Z", "station_id": "ENZV", "temp_c": 4.6},
+]
+
+
+def stub_rows(monkeypatch, rows=None, error=None):
+    def iter_rows(query, pool):
+        if error is not None:
+            raise error
+        yield from rows
+
+    monkeypatch.setattr(export, "iter_rows", iter_rows)
+
+
+def get(measurement="metar"):
+    return client.get(f"/api/export/{measurement}", params={"start": "2024-11-01", "stop": "2024-11-02"})
+
+
+def test_export_streams_a_parquet_file(monkeypatch):
+    stub_rows(monkeypatch, ROWS)
+    monkeypatch.setattr(Config, "EXPORT_WINDOW_HOURS", 24)  # one window query
+    response = get()
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("temp_c").to_pylist() == [4.5, 4.6]
+
+
+@pytest.mark.parametrize("error", [Overloaded("metar"), TimeoutError("read timed out")])
+def test_backend_failure_before_the_first_piece_is_a_503(monkeypatch, error):
+    stub_rows(monkeypatch, error=error)
+    response = get()
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_unknown_measurement_is_a_404(monkeypatch):
+    stub_rows(monkeypatch, [])
+    assert get("no_such_measurement").status_code == 404
@@ -0,0 +1,49 @@
+import gc
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.prometheus import Counter, Histogram, Registry
+
+SERVICES = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr("src.utils.prometheus.REGISTRY", registry)
+    return registry
+
+
+def test_cells_of_exited_threads_are_folded_into_the_totals(registry):
+    latency = Histogram("test_latency_seconds", "", ("provider",))
+    requests = Counter("test_requests_total", "")
+    # A new pool per cycle, as fetch_batched does
+    for _ in range(100):
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda _: (latency.labels("faa").observe(0.01), requests.inc()), range(6)))
+    gc.collect()
+
+    assert len(latency._cells) <= 1
+    assert len(requests._cells) <= 1
+    text = registry.render()
+    assert 'test_latency_seconds_count{provider="faa"} 600' in text
+    assert "test_requests_total 600" in text
+
+
+def test_render_sums_live_threads(registry):
+    requests = Counter("test_live_total", "", ("route",))
+    requests.labels("/a").inc()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pool.submit(requests.labels("/a").inc, 2).result()
+        assert 'test_live_total{route="/a"} 3.0' in registry.render()
+
+
+def test_registry_copies_match():
+    copies = [os.path.join(SERVICES, service, "src", "utils", "prometheus.py")
+              for service in ("data-fetcher", "api-service")]
+    if not all(os.path.exists(path) for path in copies):
+        pytest.skip("needs both services checked out")
+    with open(copies[0]) as a, open(copies[1]) as b:
+        assert a.read() == b.read(), "prometheus.py differs between the services; keep the copies identical"
@@ -0,0 +1,114 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+import src.database.price_table as price_table_module
+from src.database.price_table import HOUR, PriceTable
+
+MIDNIGHT = datetime(2024, 11, 18, tzinfo=timezone.utc).timestamp()
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Curve:
+    """Stands in for InfluxDB: serves ``prices`` ({epoch: øre}) and counts the loads."""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.loads = 0
+
+    def __call__(self, query):
+        self.loads += 1
+        return [{"_time": _iso(t), "_value": p} for t, p in sorted(self.prices.items())]
+
+
+def table(monkeypatch, prices):
+    curve = Curve(prices)
+    monkeypatch.setattr(price_table_module, "query_rows", curve)
+    return PriceTable("NO1"), curve
+
+
+def brute_force(prices, start, hours):
+    """Cheapest contiguous window by trying every start, or None."""
+    times = sorted(t for t in prices if t >= start)
+    best = None
+    for t in times:
+        window = [t + h * HOUR for h in range(hours)]
+        if all(w in prices for w in window):
+            total = sum(prices[w] for w in window)
+            if best is None or total < best[0]:
+                best = (total, t)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("hours", [1, 3, 8])
+def test_cheapest_window_matches_brute_force(monkeypatch, seed, hours):
+    rng = random.Random(seed)
+    prices = {MIDNIGHT + h * HOUR: round(rng.uniform(5, 300), 2) for h in range(36) if rng.random() > 0.1}
+    prices_table, _ = table(monkeypatch, prices)
+    now = MIDNIGHT + 4.5 * HOUR
+
+    result = prices_table.cheapest_window(hours, now)
+    expected = brute_force(prices, MIDNIGHT + 4 * HOUR, hours)
+    if expected is None:
+        assert result is None
+        return
+    assert result["start"] == datetime.fromtimestamp(expected[1], timezone.utc).isoformat()
+    assert result["average_price_per_kwh_ore"] == pytest.approx(expected[0] / hours)
+    assert len(result["prices"]) == hours
+
+
+def test_window_does_not_span_a_gap(monkeypatch):
+    # Hours 2 and 3 are cheap but hour 4 is missing, so a 3-hour window can't use them
+    prices = {MIDNIGHT + h * HOUR: p for h, p in enumerate([200, 200, 1, 1, None, 40, 40, 40]) if p is not None}
+    prices_table, _ = table(monkeypatch, prices)
+    result = prices_table.cheapest_window(3, MIDNIGHT)
+    assert result["start"] == datetime.fromtimestamp(MIDNIGHT + 5 * HOUR, timezone.utc).isoformat()
+    assert prices_table.cheapest_window(9, MIDNIGHT) is None
+
+
+def test_current_future_and_reloads(monkeypatch):
+    prices = {MIDNIGHT + h * HOUR: float(h) for h in range(48)}
+    prices_table, curve = table(monkeypatch, prices)
+    now = MIDNIGHT + 10.25 * HOUR
+
+    assert prices_table.current(now)["price_per_kwh_ore"] == 10.0
+    assert [e["price_per_kwh_ore"] for e in prices_table.future(now, hours=3)] == [11.0, 12.0, 13.0]
+    first = prices_table.cheapest_window(2, now)
+    assert prices_table.cheapest_window(2, now) is first
+    assert curve.loads == 1
+
+    # A new UTC day reloads the curve and starts a new cache version
+    version = prices_table.version
+    prices_table.current(MIDNIGHT + 24.5 * HOUR)
+    assert curve.loads == 2 and prices_table.version == version + 1
+    assert prices_table.current(MIDNIGHT + 48 * HOUR) is None
+
+
+def test_failed_reload_keeps_serving_the_held_curve(monkeypatch):
+    prices = {MIDNIGHT + h * HOUR: float(h) for h in range(48)}
+    prices_table, curve = table(monkeypatch, prices)
+    prices_table.current(MIDNIGHT + HOUR)
+
+    def down(query):
+        curve.loads += 1
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr(price_table_module, "query_rows", down)
+    # A new UTC day: the reload fails, the curve loaded yesterday still covers now
+    now = MIDNIGHT + 24.5 * HOUR
+    assert prices_table.current(now)["price_per_kwh_ore"] == 24.0
+    assert prices_table.current(now + 60)["price_per_kwh_ore"] == 24.0
+    assert curve.loads == 2  # retries are rate-limited
+
+    later = now + price_table_module.MISSING_CURVE_RETRY_SECONDS + 1
+    prices_table.current(later)
+    assert curve.loads == 3
+
+    # Once the held curve runs out the failure reaches the caller
+    with pytest.raises(TimeoutError):
+        prices_table.current(MIDNIGHT + 48 * HOUR)
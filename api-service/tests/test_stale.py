@@ -0,0 +1,63 @@
+import pytest
+from fastapi import HTTPException
+from influxdb_client.rest import ApiException
+from urllib3.exceptions import ReadTimeoutError
+
+from src.database.admission import Overloaded
+from src.database.flux import FluxQueryError
+from src.utils.stale import serve_stale
+
+
+def flaky_route(failures):
+    """A route that answers once, then raises each of ``failures`` in turn."""
+    calls = iter([None, *failures])
+
+    @serve_stale
+    def route(name: str):
+        failure = next(calls)
+        if failure is not None:
+            raise failure
+        return {"name": name, "value": 1}
+
+    return route
+
+
+@pytest.mark.parametrize("error", [
+    Overloaded("metar"),
+    ApiException(status=500),
+    ReadTimeoutError(None, "/api/v2/query", "read timed out"),
+    FluxQueryError("Flux query failed: boom"),
+    TimeoutError(),
+    ConnectionRefusedError(),
+])
+def test_backend_errors_serve_the_last_good_response(error):
+    route = flaky_route([error])
+    assert route(name=f"ok-{type(error).__name__}") == {"name": f"ok-{type(error).__name__}", "value": 1}
+    stale = route(name=f"ok-{type(error).__name__}")
+    assert stale.headers["X-Stale"] == "true"
+    assert "Age" in stale.headers
+
+
+def test_backend_error_without_a_good_response_is_a_503():
+    route = flaky_route([Overloaded("metar")])
+    route(name="first")
+    with pytest.raises(HTTPException) as raised:
+        route(name="never-answered")
+    assert raised.value.status_code == 503
+    assert "Retry-After" in raised.value.headers
+
+
+@pytest.mark.parametrize("error", [KeyError("temp_c"), TypeError("bad"), AttributeError("x"), RuntimeError("bug")])
+def test_programming_errors_propagate(error):
+    route = flaky_route([error])
+    route(name=f"bug-{type(error).__name__}")
+    with pytest.raises(type(error)):
+        route(name=f"bug-{type(error).__name__}")
+
+
+def test_http_exceptions_pass_through():
+    route = flaky_route([HTTPException(status_code=404)])
+    route(name="missing")
+    with pytest.raises(HTTPException) as raised:
+        route(name="missing")
+    assert raised.value.status_code == 404
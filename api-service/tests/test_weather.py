@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+
+import src.routes.weather as weather
+from src.main import app
+
+client = TestClient(app)
+
+ROWS = {
+    "yr_forecast": [
+        {"_time": "2024-11-01T12:00:00Z", "location": "Home", "temp_c": 4.5, "precip_1h_mm": 0.0, "wind_speed_m_s": 3.0},
+        {"_time": "2024-11-01T12:00:00Z", "location": "Cabin", "temp_c": -6.0, "precip_1h_mm": 1.2,
+         "wind_speed_m_s": 9.0},
+    ],
+    "metar": [{"_time": "2024-11-01T12:00:00Z", "station_id": "ENZV", "temp_c": 7.0}],
+    "netatmo": [],
+}
+
+
+def stub_influx(monkeypatch):
+    """Answers like InfluxDB would: only the rows matching the query's tag filter."""
+
+    def query_rows(query):
+        return [row for row in ROWS[query.measurement]
+                if all(row.get(tag) == value for tag, value in query._tags.items())]
+
+    monkeypatch.setattr(weather, "query_rows", query_rows)
+
+
+def test_forecast_is_for_one_location(monkeypatch):
+    stub_influx(monkeypatch)
+    assert client.get("/api/weather/forecast").json()["temp_c"] == 4.5
+    cabin = client.get("/api/weather/forecast", params={"location": "Cabin"}).json()
+    assert (cabin["temp_c"], cabin["precip_1h_mm"], cabin["wind_speed_m_s"]) == (-6.0, 1.2, 9.0)
+    assert client.get("/api/weather/forecast", params={"location": "Nowhere"}).status_code == 404
+
+
+def test_current_does_not_mix_forecast_locations(monkeypatch):
+    stub_influx(monkeypatch)
+    current = client.get("/api/weather/current", params={"station": "ENZV"}).json()
+    assert current["metar"] == {"temp_c": 7.0}
+    assert current["forecast"] == {"temp_c": 4.5, "precip_1h_mm": 0.0, "wind_speed_m_s": 3.0}
+    cabin = client.get("/api/weather/current", params={"station": "ENZV", "location": "Cabin"}).json()
+    assert cabin["forecast"] == {"temp_c": -6.0, "precip_1h_mm": 1.2, "wind_speed_m_s": 9.0}
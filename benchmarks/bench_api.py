@@ -0,0 +1,178 @@
+"""
+API-service benchmarks: annotated CSV decoding and end-to-end route latency through
+FastAPI's TestClient, with InfluxDB replaced by a stub that answers from canned CSV.
+
+    python benchmarks/bench_api.py [--output results.json] [--filter routes]
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from harness import Suite, emit, use_service
+
+use_service("api-service")
+
+CSV_HEADER = (
+    "#datatype,string,long,dateTime:RFC3339,{types}\n"
+    "#group,false,false,false,{groups}\n"
+    "#default,_result,,,{defaults}\n"
+    ",result,table,_time,{columns}\n"
+)
+
+LATEST = {
+    "metar": {"temp_c": 4.0, "dewpoint_c": 1.0, "wind_dir_deg": 180.0, "wind_speed_kt": 12.0,
+              "altim_in_hg": 29.92, "altim_hpa": 1013.0, "visibility_statute_mi": 6.2, "wx_string": "ENZV 181150Z"},
+    "yr_forecast": {"temp_c": 5.1, "wind_speed_m_s": 4.2, "cloud_fraction_percent": 80.0, "pressure_hpa": 1008.0,
+                    "relative_humidity_percent": 77.0, "precip_1h_mm": 0.2, "precip_6h_mm": 1.1, "precip_12h_mm": 2.4},
+    "netatmo": {"temperature_c": 21.4, "humidity_percent": 41.0, "pressure_hpa": 1012.3, "rain_mm": 0.0,
+                "wind_strength_kmh": 0.0, "wind_angle_deg": 0.0},
+}
+
+
+def _csv_type(value):
+    return "string" if isinstance(value, str) else "double"
+
+
+def pivoted_csv(rows, columns):
+    """Render rows of {column: value} as a single annotated CSV table."""
+    types = ",".join(_csv_type(rows[0][c]) if rows else "double" for c in columns)
+    out = io.StringIO()
+    out.write(CSV_HEADER.format(types=types, groups=",".join("false" for _ in columns),
+                                defaults=",".join("" for _ in columns), columns=",".join(columns)))
+    for row in rows:
+        out.write(",,0," + row["_time"] + "," + ",".join(str(row[c]) for c in columns) + "\n")
+    out.write("\n")
+    return out.getvalue()
+
+
+def price_rows():
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=24)
+    return [
+        {"_time": (start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M:%SZ"), "_value": 20 + (h * 37) % 90}
+        for h in range(72)
+    ]
+
+
+class _QueryApi:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def query_csv(self, query, org=None, **kwargs):
+        for measurement, body in self.responses.items():
+            if f'r._measurement == "{measurement}"' in query:
+                return csv.reader(io.StringIO(body))
+        return iter(())
+
+
+class StubInflux:
+    """Replaces InfluxDBClient; every query is answered from pre-rendered CSV."""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def __call__(self):
+        return self
+
+    def query_api(self):
+        return _QueryApi(self.responses)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def canned_responses():
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    responses = {
+        measurement: pivoted_csv([{"_time": now, **values}], list(values))
+        for measurement, values in LATEST.items()
+    }
+    responses["energy_prices"] = pivoted_csv(price_rows(), ["_value"])
+    return responses
+
+
+def bench_decode(suite):
+    from src.database.flux import decode_annotated_csv
+
+    start = datetime(2024, 11, 1, tzinfo=timezone.utc)
+    fields = list(LATEST["metar"])[:-1]
+    rows = [
+        {"_time": (start + timedelta(minutes=5 * i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+         **{f: float(i % 40) for f in fields}}
+        for i in range(10000)
+    ]
+    body = pivoted_csv(rows, fields)
+
+    suite.bench("decode.csv_10k_rows", lambda: list(decode_annotated_csv(csv.reader(io.StringIO(body)))),
+                items=len(rows), payload_bytes=len(body))
+
+
+def bench_routes(suite):
+    from fastapi.testclient import TestClient
+
+    import src.database.influx_client as influx_client
+    from src.main import app
+
+    influx_client.get_influx_client = StubInflux(canned_responses())
+    client = TestClient(app)
+
+    routes = [
+        "/api/weather/metar/ENZV",
+        "/api/weather/forecast",
+        "/api/weather/netatmo",
+        "/api/weather/current",
+        "/api/weather/nearest?lat=58.97&lon=5.73&k=5",
+        "/api/energy/current",
+        "/api/energy/future",
+        "/api/energy/cheapest?hours=3",
+    ]
+    for route in routes:
+        response = client.get(route)
+        assert response.status_code == 200, f"{route}: {response.status_code} {response.text}"
+        suite.bench(f"route {route}", lambda route=route: client.get(route))
+
+
+def bench_stations(suite):
+    from src.database.stations import StationCatalog
+
+    # About the size of the global ICAO catalog, at random positions
+    rng = random.Random(46)
+    stations = [
+        {"station_id": f"X{i:05d}", "lat": rng.uniform(-90, 90), "lon": rng.uniform(-180, 180)}
+        for i in range(60000)
+    ]
+    catalog = StationCatalog("synthetic")
+    suite.bench("stations.index_60k", lambda: catalog.load(stations), items=len(stations))
+    targets = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(1000)]
+    for k in (1, 5, 20):
+        suite.bench(f"stations.nearest_k{k}", lambda k=k: [catalog.nearest(lat, lon, k) for lat, lon in targets],
+                    items=len(targets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--filter", default="", help="only run benchmark groups containing this string")
+    parser.add_argument("--min-time", type=float, default=0.5, help="approximate seconds per benchmark")
+    args = parser.parse_args()
+
+    suite = Suite("api", min_time=args.min_time)
+    groups = {
+        "decode": lambda: bench_decode(suite),
+        "routes": lambda: bench_routes(suite),
+        "stations": lambda: bench_stations(suite),
+    }
+    for name, run in groups.items():
+        if args.filter in name:
+            run()
+    emit([suite], args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Data-fetcher benchmarks: provider parsers, end-to-end fetch functions replayed against
+recorded payloads, and the InfluxDB write path (line protocol encoding + gzip).
+
+    python benchmarks/bench_fetcher.py [--output results.json] [--filter faa]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+from harness import Suite, emit, fixture_bytes, fixture_json, fixture_text, use_service
+
+use_service("data-fetcher")
+
+import requests  # noqa: E402
+
+
+def _response(url, body, status=200, content_type="application/json"):
+    response = requests.models.Response()
+    response.status_code = status
+    response.url = url
+    response._content = body
+    response.headers["Content-Type"] = content_type
+    return response
+
+
+class ReplayTransport:
+    """Stand-in for ``requests.request`` that answers provider URLs from fixtures."""
+
+    def __init__(self):
+        self.faa = {m["icaoId"]: m for m in fixture_json("faa_metar.json")}
+        self.checkwx = {m["icao"]: m for m in fixture_json("checkwx_metar.json")["data"]}
+        self.datafeed = fixture_bytes("vatsim_datafeed.json")
+        self.yr = fixture_bytes("yr_forecast.json")
+        self.netatmo = fixture_bytes("netatmo_stationsdata.json")
+        self.energy = fixture_bytes("energy_prices.json")
+        self.vatsim_metars = {
+            line.split()[0]: line.encode() for line in fixture_text("vatsim_metar.txt").splitlines() if line
+        }
+
+    def __call__(self, method, url, **kwargs):
+        parsed = urlparse(url)
+        host = parsed.netloc
+        # Multi-station providers answer only the requested batch, like the real APIs
+        if "aviationweather" in host:
+            ids = parse_qs(parsed.query)["ids"][0].split(",")
+            return _response(url, json.dumps([self.faa[i] for i in ids if i in self.faa]).encode())
+        if "checkwx" in host:
+            ids = parsed.path.split("/")[2].split(",")
+            body = {"results": len(ids), "data": [self.checkwx[i] for i in ids if i in self.checkwx]}
+            return _response(url, json.dumps(body).encode())
+        if "metar.vatsim" in host:
+            station = (kwargs.get("params") or {}).get("id") or parse_qs(parsed.query)["id"][0]
+            return _response(url, self.vatsim_metars.get(station, b""), content_type="text/plain")
+        if "data.vatsim" in host:
+            return _response(url, self.datafeed)
+        if "met.no" in host:
+            return _response(url, self.yr)
+        if "netatmo" in host:
+            if parsed.path.endswith("/token"):
+                return _response(url, json.dumps({"access_token": "a", "refresh_token": "r"}).encode())
+            return _response(url, self.netatmo)
+        if "hvakosterstrommen" in host:
+            return _response(url, self.energy)
+        raise AssertionError(f"No fixture for {url}")
+
+
+class _WriteApi:
+    def __init__(self, enable_gzip):
+        self.enable_gzip = enable_gzip
+
+    def write(self, bucket, record, **kwargs):
+        # Encoding (and compressing) the body is what the real client does before sending
+        body = record.encode()
+        if self.enable_gzip:
+            gzip.compress(body)
+
+
+class _Client:
+    def __init__(self, enable_gzip=False):
+        self.enable_gzip = enable_gzip
+
+    def write_api(self, **kwargs):
+        return _WriteApi(self.enable_gzip)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def bench_parsers(suite):
+    from src.providers.checkwx import parse_checkwx_metar
+    from src.providers.faa import parse_faa_metar
+    from src.providers.netatmo import parse_netatmo_data
+    from src.providers.payloads import checkwx_decoder, faa_decoder, netatmo_decoder, yr_decoder
+    from src.providers.vatsim import parse_vatsim_metar
+    from src.providers.yrno import parse_yr_forecast
+
+    faa = fixture_bytes("faa_metar.json")
+    checkwx = fixture_bytes("checkwx_metar.json")
+    yr = fixture_bytes("yr_forecast.json")
+    netatmo = fixture_bytes("netatmo_stationsdata.json")
+    raw_metars = fixture_text("vatsim_metar.txt").splitlines()
+    n_faa = len(json.loads(faa))
+    n_checkwx = len(json.loads(checkwx)["data"])
+
+    suite.bench("parse.faa", lambda: parse_faa_metar(faa_decoder.decode(faa)), items=n_faa, payload_bytes=len(faa))
+    suite.bench("parse.checkwx", lambda: parse_checkwx_metar(checkwx_decoder.decode(checkwx)), items=n_checkwx,
+                payload_bytes=len(checkwx))
+    suite.bench("parse.vatsim_metar", lambda: [parse_vatsim_metar(m) for m in raw_metars], items=len(raw_metars))
+    suite.bench("parse.yrno", lambda: parse_yr_forecast(yr_decoder.decode(yr)), payload_bytes=len(yr))
+    suite.bench("parse.netatmo", lambda: parse_netatmo_data(netatmo_decoder.decode(netatmo)),
+                payload_bytes=len(netatmo))
+
+
+def bench_vatsim_datafeed(suite):
+    try:
+        from src.providers.payloads import vatsim_datafeed_decoder
+        from src.providers.vatsim_traffic import parse_vatsim_data
+    except ImportError as e:
+        print(f"skipping vatsim_traffic benchmarks: {e}", file=sys.stderr)
+        return
+    datafeed = fixture_bytes("vatsim_datafeed.json")
+    decoded = vatsim_datafeed_decoder.decode(datafeed)
+    suite.bench("decode.vatsim_datafeed", lambda: vatsim_datafeed_decoder.decode(datafeed),
+                payload_bytes=len(datafeed))
+    suite.bench("parse.vatsim_datafeed", lambda: parse_vatsim_data(decoded), items=len(decoded.pilots))
+
+
+def bench_fetch(suite, stations):
+    import src.utils.http as http
+    from src.providers.checkwx import fetch_checkwx_metar
+    from src.providers.faa import fetch_faa_metar
+    from src.providers.vatsim import fetch_vatsim_metar
+    from src.providers.yrno import fetch_yr_forecast
+
+    http.requests.request = ReplayTransport()
+    suite.bench("fetch.faa", lambda: fetch_faa_metar(stations), items=len(stations))
+    suite.bench("fetch.checkwx", lambda: fetch_checkwx_metar(stations), items=len(stations))
+    suite.bench("fetch.vatsim_metar", lambda: fetch_vatsim_metar(stations[:100]), items=100)
+    suite.bench("fetch.yrno", lambda: fetch_yr_forecast())
+
+
+def bench_write_path(suite):
+    from src.database import influx_client
+    from src.providers.faa import parse_faa_metar
+    from src.providers.payloads import faa_decoder
+
+    metars = parse_faa_metar(faa_decoder.decode(fixture_bytes("faa_metar.json")))
+    influx_client.get_influx_client = _Client
+    timestamp = datetime(2024, 11, 18, 12, tzinfo=timezone.utc)
+
+    def write_all():
+        for metar in metars:
+            fields = {
+                "temp_c": metar["temp_c"],
+                "dewpoint_c": metar["dewpoint_c"],
+                "wind_dir_deg": metar["wind_dir_deg"],
+                "wind_speed_kt": metar["wind_speed_kt"],
+                "altim_in_hg": metar["altim_in_hg"],
+                "altim_hpa": metar["altim_hpa"],
+                "visibility_statute_mi": metar["visibility_statute_mi"]
+            }
+            influx_client.write_measurement("metar", fields, {"station_id": metar["station_id"]}, timestamp)
+
+    suite.bench("write.metar_points", write_all, items=len(metars))
+
+    rows = [
+        ({key: metar[key] for key in ("temp_c", "dewpoint_c", "wind_dir_deg", "wind_speed_kt", "altim_in_hg",
+                                      "altim_hpa", "visibility_statute_mi")},
+         {"station_id": metar["station_id"]})
+        for metar in metars
+    ]
+    suite.bench("write.metar_batch", lambda: influx_client.write_measurements("metar", rows, timestamp),
+                items=len(metars))
+
+
+def bench_derived(suite):
+    from src.providers.faa import parse_faa_metar
+    from src.providers.payloads import faa_decoder
+    from src.utils.derived import derive_metar_fields
+
+    metars = parse_faa_metar(faa_decoder.decode(fixture_bytes("faa_metar.json")))
+    suite.bench("derive.metar_batch", lambda: derive_metar_fields(metars), items=len(metars))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--filter", default="", help="only run benchmark groups containing this string")
+    parser.add_argument("--min-time", type=float, default=0.5, help="approximate seconds per benchmark")
+    args = parser.parse_args()
+
+    suite = Suite("fetcher", min_time=args.min_time)
+    stations = fixture_text("stations.txt").split()
+    groups = {
+        "parsers": lambda: bench_parsers(suite),
+        "vatsim_datafeed": lambda: bench_vatsim_datafeed(suite),
+        "fetch": lambda: bench_fetch(suite, stations),
+        "write": lambda: bench_write_path(suite),
+        "derive": lambda: bench_derived(suite),
+    }
+    for name, run in groups.items():
+        if args.filter in name:
+            run()
+    emit([suite], args.output)
+
+
+if __name__ == "__main__":
+    main()
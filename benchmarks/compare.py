@@ -0,0 +1,55 @@
+"""
+Compare two benchmark reports produced by run.py (or a single suite).
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 5]
+
+Prints the change in median time per benchmark; exits 1 if any benchmark got slower
+than the threshold (in percent).
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return {(r["suite"], r["name"]): r for r in report["results"]}, report["meta"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=5.0, help="percent slowdown treated as a regression")
+    args = parser.parse_args()
+
+    base, base_meta = load(args.baseline)
+    cand, cand_meta = load(args.candidate)
+    print(f"baseline  {base_meta.get('git_commit')} {base_meta.get('timestamp')}")
+    print(f"candidate {cand_meta.get('git_commit')} {cand_meta.get('timestamp')}\n")
+
+    regressions = 0
+    for key in sorted(set(base) | set(cand)):
+        suite, name = key
+        if key not in base or key not in cand:
+            print(f"{suite:>8} {name:<40} {'only in ' + ('candidate' if key in cand else 'baseline'):>30}")
+            continue
+        b, c = base[key]["median_s"], cand[key]["median_s"]
+        change = (c - b) / b * 100
+        alloc_b, alloc_c = base[key]["peak_alloc_bytes"], cand[key]["peak_alloc_bytes"]
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{suite:>8} {name:<40} {b * 1e3:10.3f} -> {c * 1e3:10.3f} ms {change:+7.1f}%"
+              f"  peak {alloc_b / 1024:8.1f} -> {alloc_c / 1024:8.1f} KiB{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Shared timing/allocation harness for the benchmark suites.
+
+Each benchmark runs a warmup, then repeated timed batches; the per-operation timings
+come from ``time.perf_counter_ns``. A separate single run under ``tracemalloc`` records
+allocated bytes and blocks, so that allocation tracking doesn't distort the timings.
+"""
+
+import gzip
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+
+
+def use_service(name):
+    """Put a service directory (``data-fetcher`` or ``api-service``) first on sys.path."""
+    # Per-call INFO logging would dominate the timings
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, os.path.join(REPO_ROOT, name))
+
+
+def fixture_bytes(name):
+    path = os.path.join(FIXTURES, name)
+    if os.path.exists(path + ".gz"):
+        with gzip.open(path + ".gz", "rb") as f:
+            return f.read()
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def fixture_json(name):
+    return json.loads(fixture_bytes(name))
+
+
+def fixture_text(name):
+    return fixture_bytes(name).decode()
+
+
+class Suite:
+    def __init__(self, name, min_time=0.5, repeats=7):
+        self.name = name
+        self.min_time = min_time
+        self.repeats = repeats
+        self.results = []
+
+    def bench(self, name, fn, items=1, payload_bytes=None):
+        """
+        Time ``fn()``. ``items`` is the number of logical records processed per call
+        (stations, pilots, points), used to report items/sec; ``payload_bytes`` adds MB/s.
+        """
+        fn()  # warmup, also surfaces errors before timing
+
+        # Size each batch so it runs for roughly min_time / repeats
+        start = time.perf_counter()
+        fn()
+        single = max(time.perf_counter() - start, 1e-7)
+        loops = max(1, int(self.min_time / self.repeats / single))
+
+        per_op = []
+        for _ in range(self.repeats):
+            t0 = time.perf_counter_ns()
+            for _ in range(loops):
+                fn()
+            per_op.append((time.perf_counter_ns() - t0) / loops / 1e9)
+
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+        fn()
+        snapshot_after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        diff = snapshot_after.compare_to(snapshot_before, "filename")
+        alloc_blocks = sum(max(d.count_diff, 0) for d in diff)
+
+        median = statistics.median(per_op)
+        result = {
+            "suite": self.name,
+            "name": name,
+            "loops": loops,
+            "repeats": self.repeats,
+            "min_s": min(per_op),
+            "median_s": median,
+            "mean_s": statistics.fmean(per_op),
+            "stdev_s": statistics.stdev(per_op) if len(per_op) > 1 else 0.0,
+            "ops_per_s": 1 / median,
+            "items": items,
+            "items_per_s": items / median,
+            "peak_alloc_bytes": peak,
+            "retained_alloc_blocks": alloc_blocks,
+        }
+        if payload_bytes:
+            result["payload_bytes"] = payload_bytes
+            result["mb_per_s"] = payload_bytes / median / 1e6
+        self.results.append(result)
+        print(
+            f"{self.name:>8} {name:<40} {median * 1e3:10.3f} ms/op {result['items_per_s']:12.0f} items/s "
+            f"peak {peak / 1024:9.1f} KiB",
+            file=sys.stderr,
+        )
+        return result
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def emit(suites, output=None):
+    """Write results as JSON to ``output`` (or stdout)."""
+    report = {"meta": metadata(), "results": [r for s in suites for r in s.results]}
+    data = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    return report
@@ -0,0 +1,358 @@
+"""
+Create the upstream payload fixtures used by the benchmark suite.
+
+    python benchmarks/record_fixtures.py            # deterministic synthetic payloads
+    python benchmarks/record_fixtures.py --live     # record from the real upstreams
+
+Synthetic payloads reproduce the structure and field set of each upstream response at
+full production size (1,000 METAR stations, a ~1,500 pilot VATSIM datafeed, a complete
+yr.no compact forecast) and are seeded, so runs are comparable across machines. ``--live``
+replaces them with real captures; it needs network access and, for CheckWX and Netatmo,
+the same credentials the data-fetcher uses.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import string
+from datetime import datetime, timedelta, timezone
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+STATION_COUNT = 1000
+ANCHOR = datetime(2024, 11, 18, 12, 0, tzinfo=timezone.utc)
+
+AIRCRAFT = ["B738", "A320", "A20N", "B77W", "A321", "B789", "C172", "A359", "E190", "DH8D", "B744", "CRJ9"]
+COVERS = ["FEW", "SCT", "BKN", "OVC"]
+
+
+def _write(name, payload, compress=True):
+    path = os.path.join(FIXTURES, name + (".gz" if compress else ""))
+    data = payload if isinstance(payload, str) else json.dumps(payload, separators=(",", ":"))
+    if compress:
+        # mtime=0 keeps the gzip output byte-identical between runs
+        with open(path, "wb") as f:
+            f.write(gzip.compress(data.encode(), mtime=0))
+    else:
+        with open(path, "w") as f:
+            f.write(data)
+    print(f"wrote {path}")
+
+
+def station_ids(rng, count=STATION_COUNT):
+    ids = ["ENZV", "KJFK", "ENGM", "KLAX"]
+    prefixes = ["K", "EN", "ES", "EK", "EG", "ED", "LF", "LE", "LI", "CY", "PA", "RJ", "YS", "SB"]
+    seen = set(ids)
+    while len(ids) < count:
+        prefix = rng.choice(prefixes)
+        icao = prefix + "".join(rng.choices(string.ascii_uppercase, k=4 - len(prefix)))
+        if icao not in seen:
+            seen.add(icao)
+            ids.append(icao)
+    return ids
+
+
+def _weather(rng):
+    temp = rng.randint(-25, 35)
+    return {
+        "temp": temp,
+        "dewp": temp - rng.randint(0, 15),
+        "wdir": rng.randrange(0, 360, 10),
+        "wspd": rng.randint(0, 35),
+        "visib": rng.choice(["10+", "6+", 9999, 5, 3, 1.5, 0.5]),
+        "altim": round(rng.uniform(975, 1045), 1),
+        "clouds": [
+            {"cover": rng.choice(COVERS), "base": rng.randrange(200, 25000, 100)}
+            for _ in range(rng.randint(0, 3))
+        ],
+    }
+
+
+def _raw_metar(icao, obs_time, wx):
+    wind = f"{wx['wdir']:03d}{wx['wspd']:02d}KT"
+    temp = f"{'M' if wx['temp'] < 0 else ''}{abs(wx['temp']):02d}"
+    dewp = f"{'M' if wx['dewp'] < 0 else ''}{abs(wx['dewp']):02d}"
+    clouds = " ".join(f"{c['cover']}{c['base'] // 100:03d}" for c in wx["clouds"]) or "CLR"
+    if icao.startswith("K"):
+        vis = "10SM"
+        altim = f"A{round(wx['altim'] * 0.02953 * 100):04d}"
+    else:
+        vis = "9999"
+        altim = f"Q{round(wx['altim']):04d}"
+    return f"{icao} {obs_time:%d%H%M}Z {wind} {vis} {clouds} {temp}/{dewp} {altim} NOSIG"
+
+
+def synthesize_metars(rng, stations, anchor=ANCHOR):
+    faa, checkwx, raw = [], [], []
+    for i, icao in enumerate(stations):
+        wx = _weather(rng)
+        obs_time = anchor - timedelta(minutes=rng.choice([0, 20, 30, 50]))
+        raw_ob = _raw_metar(icao, obs_time, wx)
+        lat, lon = round(rng.uniform(-60, 75), 4), round(rng.uniform(-180, 180), 4)
+        elev = rng.randint(0, 2500)
+        faa.append({
+            "metar_id": 600000000 + i,
+            "icaoId": icao,
+            "receiptTime": (obs_time + timedelta(minutes=3)).strftime("%Y-%m-%d %H:%M:%S"),
+            "obsTime": int(obs_time.timestamp()),
+            "reportTime": obs_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "temp": wx["temp"],
+            "dewp": wx["dewp"],
+            "wdir": wx["wdir"],
+            "wspd": wx["wspd"],
+            "wgst": None,
+            "visib": wx["visib"],
+            "altim": wx["altim"],
+            "slp": None,
+            "qcField": 4,
+            "wxString": None,
+            "presTend": None,
+            "maxT": None,
+            "minT": None,
+            "maxT24": None,
+            "minT24": None,
+            "precip": None,
+            "pcp3hr": None,
+            "pcp6hr": None,
+            "pcp24hr": None,
+            "snow": None,
+            "vertVis": None,
+            "metarType": "METAR",
+            "rawOb": raw_ob,
+            "mostRecent": 1,
+            "lat": lat,
+            "lon": lon,
+            "elev": elev,
+            "prior": 0,
+            "name": f"{icao} Airport",
+            "clouds": wx["clouds"],
+        })
+        vis_mi = 6.21 if wx["visib"] in ("10+", "6+", 9999) else float(wx["visib"])
+        checkwx.append({
+            "barometer": {"hg": round(wx["altim"] * 0.02953, 2), "hpa": wx["altim"],
+                          "kpa": round(wx["altim"] / 10, 2), "mb": wx["altim"]},
+            "clouds": [{"base_feet_agl": c["base"], "base_meters_agl": round(c["base"] * 0.3048),
+                        "code": c["cover"], "feet": c["base"], "meters": round(c["base"] * 0.3048),
+                        "text": c["cover"].title()} for c in wx["clouds"]],
+            "conditions": [],
+            "dewpoint": {"celsius": wx["dewp"], "fahrenheit": round(wx["dewp"] * 9 / 5 + 32)},
+            "elevation": {"feet": round(elev * 3.28084), "meters": elev},
+            "flight_category": "VFR",
+            "humidity": {"percent": rng.randint(20, 100)},
+            "icao": icao,
+            "observed": obs_time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "raw_text": raw_ob,
+            "station": {"geometry": {"coordinates": [lon, lat], "type": "Point"},
+                        "location": "Somewhere", "name": f"{icao} Airport", "type": "Airport"},
+            "temperature": {"celsius": wx["temp"], "fahrenheit": round(wx["temp"] * 9 / 5 + 32)},
+            "visibility": {"miles": str(vis_mi), "miles_float": vis_mi,
+                           "meters": str(round(vis_mi * 1609)), "meters_float": round(vis_mi * 1609)},
+            "wind": {"degrees": wx["wdir"], "speed_kph": round(wx["wspd"] * 1.852),
+                     "speed_kts": wx["wspd"], "speed_mph": round(wx["wspd"] * 1.151),
+                     "speed_mps": round(wx["wspd"] * 0.514)},
+        })
+        raw.append(raw_ob)
+    return faa, {"results": len(checkwx), "data": checkwx}, "\n".join(raw) + "\n"
+
+
+def synthesize_vatsim_datafeed(rng, stations, pilots=1500, anchor=ANCHOR):
+    def callsign():
+        return "".join(rng.choices(string.ascii_uppercase, k=3)) + str(rng.randint(1, 9999))
+
+    def flight_plan():
+        aircraft = rng.choice(AIRCRAFT)
+        return {
+            "flight_rules": rng.choice(["I", "I", "I", "V"]),
+            "aircraft": f"{aircraft}/M-SDE3FGHIRWY/LB1",
+            "aircraft_faa": f"H/{aircraft}/L",
+            "aircraft_short": aircraft,
+            "departure": rng.choice(stations[:200]),
+            "arrival": rng.choice(stations[:200]),
+            "alternate": rng.choice(stations),
+            "cruise_tas": str(rng.randint(110, 500)),
+            "altitude": str(rng.randrange(3000, 41000, 1000)),
+            "deptime": f"{rng.randint(0, 23):02d}{rng.randrange(0, 60, 5):02d}",
+            "enroute_time": f"{rng.randint(0, 12):02d}{rng.randrange(0, 60, 5):02d}",
+            "fuel_time": f"{rng.randint(1, 14):02d}{rng.randrange(0, 60, 5):02d}",
+            "remarks": "PBN/A1B1C1D1L1O1S1 DOF/241118 RMK/TCAS SIMBRIEF /V/",
+            "route": " ".join(rng.choices(["DCT", "UL607", "N871", "Q140", "T420", "UN872", "L9"], k=12)),
+            "revision_id": rng.randint(1, 5),
+            "assigned_transponder": f"{rng.randint(0, 7777):04d}",
+        }
+
+    logon = (anchor - timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+    updated = anchor.strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+    pilot_list = [{
+        "cid": 800000 + i,
+        "name": f"Pilot {i}",
+        "callsign": callsign(),
+        "server": rng.choice(["GERMANY", "USA-EAST", "CANADA", "UK-1"]),
+        "pilot_rating": rng.choice([0, 1, 3]),
+        "military_rating": 0,
+        "latitude": round(rng.uniform(-60, 75), 5),
+        "longitude": round(rng.uniform(-180, 180), 5),
+        "altitude": rng.randint(0, 41000),
+        "groundspeed": rng.randint(0, 520),
+        "transponder": f"{rng.randint(0, 7777):04d}",
+        "heading": rng.randint(0, 359),
+        "qnh_i_hg": 29.92,
+        "qnh_mb": 1013,
+        "flight_plan": flight_plan() if rng.random() < 0.93 else None,
+        "logon_time": logon,
+        "last_updated": updated,
+    } for i in range(pilots)]
+
+    def controller(i, atis=False):
+        station = rng.choice(stations[:300])
+        entry = {
+            "cid": 900000 + i,
+            "name": f"Controller {i}",
+            "callsign": f"{station}_{'ATIS' if atis else rng.choice(['TWR', 'APP', 'GND', 'CTR', 'DEL'])}",
+            "frequency": f"1{rng.randint(18, 35)}.{rng.randint(0, 995):03d}",
+            "facility": rng.randint(1, 6),
+            "rating": rng.choice([2, 3, 4, 5, 7, 8, 10, 11]),
+            "server": "GERMANY",
+            "visual_range": rng.choice([50, 100, 150, 300]),
+            "text_atis": [f"{station} INFORMATION {rng.choice(string.ascii_uppercase)}",
+                          "RWY IN USE 18 EXPECT ILS APPROACH", "TRANSITION LEVEL 70"],
+            "last_updated": updated,
+            "logon_time": logon,
+        }
+        if atis:
+            entry["atis_code"] = rng.choice(string.ascii_uppercase)
+        return entry
+
+    return {
+        "general": {"version": 3, "reload": 1, "update": anchor.strftime("%Y%m%d%H%M%S"),
+                    "update_timestamp": updated, "connected_clients": 2000, "unique_users": 1950},
+        "pilots": pilot_list,
+        "controllers": [controller(i) for i in range(300)],
+        "atis": [controller(300 + i, atis=True) for i in range(150)],
+        "servers": [{"ident": s, "hostname_or_ip": f"{s.lower()}.vatsim.net", "location": s,
+                     "name": s, "client_connections_allowed": True, "is_sweatbox": False}
+                    for s in ["GERMANY", "USA-EAST", "CANADA", "UK-1"]],
+        "prefiles": [{"cid": 700000 + i, "name": f"Prefile {i}", "callsign": callsign(),
+                      "flight_plan": flight_plan(), "last_updated": updated} for i in range(250)],
+        "facilities": [{"id": i, "short": s, "long": s} for i, s in enumerate(["OBS", "FSS", "DEL", "GND", "TWR", "APP", "CTR"])],
+        "ratings": [{"id": i, "short": f"R{i}", "long": f"Rating {i}"} for i in range(13)],
+        "pilot_ratings": [{"id": i, "short_name": f"P{i}", "long_name": f"Pilot {i}"} for i in range(6)],
+        "military_ratings": [{"id": i, "short_name": f"M{i}", "long_name": f"Military {i}"} for i in range(4)],
+    }
+
+
+def synthesize_yr_forecast(rng, steps=85, anchor=ANCHOR):
+    timeseries = []
+    t = anchor
+    for i in range(steps):
+        entry = {
+            "time": t.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "data": {
+                "instant": {"details": {
+                    "air_pressure_at_sea_level": round(rng.uniform(990, 1030), 1),
+                    "air_temperature": round(rng.uniform(-5, 15), 1),
+                    "cloud_area_fraction": round(rng.uniform(0, 100), 1),
+                    "relative_humidity": round(rng.uniform(40, 100), 1),
+                    "wind_from_direction": round(rng.uniform(0, 360), 1),
+                    "wind_speed": round(rng.uniform(0, 15), 1),
+                }},
+                "next_12_hours": {"summary": {"symbol_code": "cloudy"}, "details": {}},
+                "next_6_hours": {"summary": {"symbol_code": "rain"},
+                                 "details": {"precipitation_amount": round(rng.uniform(0, 6), 1)}},
+            },
+        }
+        if i < 60:
+            entry["data"]["next_1_hours"] = {"summary": {"symbol_code": "lightrain"},
+                                             "details": {"precipitation_amount": round(rng.uniform(0, 2), 1)}}
+        timeseries.append(entry)
+        t += timedelta(hours=1 if i < 60 else 6)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [5.6799, 58.9959, 9]},
+        "properties": {
+            "meta": {"updated_at": anchor.strftime("%Y-%m-%dT%H:%M:%SZ"), "units": {
+                "air_pressure_at_sea_level": "hPa", "air_temperature": "celsius",
+                "cloud_area_fraction": "%", "precipitation_amount": "mm",
+                "relative_humidity": "%", "wind_from_direction": "degrees", "wind_speed": "m/s"}},
+            "timeseries": timeseries,
+        },
+    }
+
+
+def synthesize_netatmo(rng, anchor=ANCHOR):
+    return {
+        "body": {"devices": [{
+            "_id": "70:ee:50:00:00:01",
+            "station_name": "Home",
+            "type": "NAMain",
+            "data_type": ["Temperature", "CO2", "Humidity", "Noise", "Pressure"],
+            "dashboard_data": {"time_utc": int(anchor.timestamp()), "Temperature": 21.4, "CO2": 612,
+                               "Humidity": 41, "Noise": 37, "Pressure": 1012.3, "AbsolutePressure": 1011.1,
+                               "min_temp": 20.1, "max_temp": 22.0, "temp_trend": "stable"},
+            "modules": [{"_id": "02:00:00:00:00:01", "type": "NAModule1", "module_name": "Outdoor",
+                         "battery_percent": 71,
+                         "dashboard_data": {"time_utc": int(anchor.timestamp()), "Temperature": 4.2,
+                                            "Humidity": 88, "min_temp": 2.0, "max_temp": 6.1}}],
+        }], "user": {"mail": "user@example.com", "administrative": {"lang": "en", "unit": 0}}},
+        "status": "ok",
+        "time_exec": 0.041,
+        "time_server": int(anchor.timestamp()),
+    }
+
+
+def synthesize_energy_prices(rng, anchor=ANCHOR):
+    day = anchor.replace(hour=0, minute=0, tzinfo=timezone(timedelta(hours=1)))
+    prices = []
+    for h in range(24):
+        nok = round(rng.uniform(0.2, 2.5), 5)
+        start = day + timedelta(hours=h)
+        prices.append({"NOK_per_kWh": nok, "EUR_per_kWh": round(nok / 11.7, 5), "EXR": 11.7,
+                       "time_start": start.isoformat(), "time_end": (start + timedelta(hours=1)).isoformat()})
+    return prices
+
+
+def synthesize():
+    rng = random.Random(20241118)
+    stations = station_ids(rng)
+    faa, checkwx, vatsim_raw = synthesize_metars(rng, stations)
+    _write("stations.txt", "\n".join(stations) + "\n", compress=False)
+    _write("faa_metar.json", faa)
+    _write("checkwx_metar.json", checkwx)
+    _write("vatsim_metar.txt", vatsim_raw)
+    _write("vatsim_datafeed.json", synthesize_vatsim_datafeed(rng, stations))
+    _write("yr_forecast.json", synthesize_yr_forecast(rng))
+    _write("netatmo_stationsdata.json", synthesize_netatmo(rng), compress=False)
+    _write("energy_prices.json", synthesize_energy_prices(rng), compress=False)
+
+
+def record_live():
+    import requests
+
+    with open(os.path.join(FIXTURES, "stations.txt")) as f:
+        stations = f.read().split()
+
+    faa = requests.get("https://aviationweather.gov/api/data/metar",
+                       params={"ids": ",".join(stations[:400]), "format": "json"}, timeout=60)
+    _write("faa_metar.json", faa.text)
+    checkwx = requests.get(f"https://api.checkwx.com/metar/{','.join(stations[:20])}/decoded",
+                           headers={"X-API-Key": os.environ["CHECKWX_API_KEY"]}, timeout=60)
+    _write("checkwx_metar.json", checkwx.text)
+    raw = [requests.get("https://metar.vatsim.net/metar.php", params={"id": s}, timeout=30).text.strip()
+           for s in stations[:50]]
+    _write("vatsim_metar.txt", "\n".join(r for r in raw if r) + "\n")
+    _write("vatsim_datafeed.json", requests.get("https://data.vatsim.net/v3/vatsim-data.json", timeout=60).text)
+    _write("yr_forecast.json", requests.get(
+        "https://api.met.no/weatherapi/locationforecast/2.0/compact", params={"lat": "58.9959", "lon": "5.6799"},
+        headers={"User-Agent": "MyWeatherApp/1.0 https://github.com/kmoberg"}, timeout=60).text)
+    day = datetime.now()
+    _write("energy_prices.json", requests.get(
+        f"https://www.hvakosterstrommen.no/api/v1/prices/{day:%Y}/{day:%m-%d}_NO2.json", timeout=60).text,
+        compress=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="record real upstream responses instead")
+    args = parser.parse_args()
+    os.makedirs(FIXTURES, exist_ok=True)
+    record_live() if args.live else synthesize()
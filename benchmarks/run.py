@@ -0,0 +1,60 @@
+"""
+Run every benchmark suite and write one combined JSON report.
+
+Each service ships its own top-level ``src`` package, so each suite runs in its own
+interpreter; the combined report can be diffed against an earlier run with compare.py.
+
+    pip install -r data-fetcher/requirements.txt -r api-service/requirements.txt -r benchmarks/requirements.txt
+    python benchmarks/run.py --output bench-$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from harness import BENCH_DIR, metadata
+
+SUITES = ["bench_fetcher.py", "bench_api.py"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the combined JSON report here instead of stdout")
+    parser.add_argument("--min-time", default="0.5", help="approximate seconds per benchmark")
+    args = parser.parse_args()
+
+    results = []
+    failed = []
+    for script in SUITES:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            path = tmp.name
+        try:
+            proc = subprocess.run(
+                [sys.executable, os.path.join(BENCH_DIR, script), "--output", path, "--min-time", args.min_time],
+                cwd=BENCH_DIR,
+            )
+            if proc.returncode != 0:
+                failed.append(script)
+                continue
+            with open(path) as f:
+                results.extend(json.load(f)["results"])
+        finally:
+            os.unlink(path)
+
+    report = {"meta": metadata(), "results": results}
+    if failed:
+        report["meta"]["failed_suites"] = failed
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data + "\n")
+    else:
+        print(data)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,117 @@
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import SYNCHRONOUS
+# influxdb_client is imported on first write rather than here: it accounts for most of
+# the fetcher's startup time
+from src.database.line_protocol import LineBuffer, epoch_seconds
+from src.utils.alerts import ALERTS, alert_rows, dispatch
 from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import FETCH_ERRORS, POINTS_WRITTEN, WRITE_SECONDS
+from src.utils.tracing import span
+import threading
+import time
 
-def get_influx_client():
+# Write timestamps are whole seconds: no source reports anything finer, and shorter
+# timestamps mean smaller requests and better compression in InfluxDB
+PRECISION = "s"
+
+# One reusable request buffer per thread (the 5 minute and 30 second loops write concurrently)
+_local = threading.local()
+
+def get_influx_client(enable_gzip: bool = False):
+    from influxdb_client import InfluxDBClient
     return InfluxDBClient(
-        url=f"http://{Config.INFLUX_HOST}:8086",
+        url=Config.INFLUX_URL,
         token=Config.INFLUX_TOKEN,
-        org=Config.INFLUX_ORG
+        org=Config.INFLUX_ORG,
+        enable_gzip=enable_gzip
     )
 
-def write_measurement(measurement_name: str, fields: dict, tags: dict = None, timestamp=None):
-    with get_influx_client() as client:
-        write_api = client.write_api(write_options=SYNCHRONOUS)
-        p = Point(measurement_name)
-        if tags:
-            for k, v in tags.items():
-                p = p.tag(k, v)
-        for k, v in fields.items():
-            p = p.field(k, v)
-        if timestamp:
-            p = p.time(timestamp)  # Set the timestamp explicitly
-        write_api.write(bucket=Config.INFLUX_BUCKET, record=p)
\ No newline at end of file
+def write_measurement(measurement_name: str, fields: dict, tags: dict = None, timestamp=None, observed=None):
+    write_measurements(measurement_name, [(fields, tags, timestamp, observed)])
+
+def write_measurements(measurement_name: str, rows, timestamp=None):
+    """
+    Write many points of one measurement in gzipped requests of WRITE_BATCH_SIZE points
+    over a single client. ``rows`` is an iterable of ``(fields, tags)`` pairs, or
+    ``(fields, tags, timestamp)`` to override ``timestamp`` (default now) per point.
+    Null fields are left out and other fields are converted to the measurement's
+    declared types (see ``schema.FIELD_TYPES``). Every point is also run through the
+    alert rules (see ``utils/alerts.py``), whether or not the write succeeds. A fourth
+    element, ``(fields, tags, timestamp, observed)``, is the source's observation time
+    (epoch seconds) for points stamped with the time they were fetched; the alert rules
+    use it to recognise a report that is written again.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    default_time = epoch_seconds(timestamp)
+    buffer = _buffer()
+    events = []
+    written = 0
+    start = time.perf_counter()
+    try:
+        with span(f"write.{measurement_name}"), get_influx_client(enable_gzip=True) as client:
+            write_api = client.write_api(write_options=_synchronous())
+            for row in rows:
+                point_time = epoch_seconds(row[2]) if len(row) > 2 and row[2] is not None else default_time
+                observed = row[3] if len(row) > 3 else None
+                buffer.add(measurement_name, row[1], row[0], point_time)
+                events += ALERTS.evaluate(measurement_name, row[1], row[0], point_time, observed)
+                if len(buffer) >= Config.WRITE_BATCH_SIZE:
+                    written += _send(write_api, buffer)
+            written += _send(write_api, buffer)
+    except Exception:
+        FETCH_ERRORS.labels("influxdb", "write").inc()
+        raise
+    finally:
+        buffer.clear()
+        WRITE_SECONDS.labels(measurement_name).observe(time.perf_counter() - start)
+        if events:
+            _emit_alerts(events)
+    POINTS_WRITTEN.labels(measurement_name).inc(written)
+
+def _emit_alerts(events):
+    dispatch(events)
+    try:
+        write_measurements("alerts", alert_rows(events))
+    except Exception as e:
+        logger.error(f"[alerts] Failed to write {len(events)} alert events to InfluxDB: {e}")
+
+def write_lines(measurement_name: str, lines, precision: str = PRECISION, batch_size: int = None):
+    """
+    Write pre-encoded line protocol (see ``line_protocol.encode_line``) in gzipped
+    requests of ``batch_size`` (default WRITE_BATCH_SIZE) lines. ``precision`` is the
+    timestamps' unit.
+    """
+    if not lines:
+        return
+    batch_size = batch_size or Config.WRITE_BATCH_SIZE
+    start = time.perf_counter()
+    try:
+        with span(f"write.{measurement_name}"), get_influx_client(enable_gzip=True) as client:
+            write_api = client.write_api(write_options=_synchronous())
+            for i in range(0, len(lines), batch_size):
+                write_api.write(bucket=Config.INFLUX_BUCKET, record="\n".join(lines[i:i + batch_size]),
+                                write_precision=precision)
+    except Exception:
+        FETCH_ERRORS.labels("influxdb", "write").inc()
+        raise
+    finally:
+        WRITE_SECONDS.labels(measurement_name).observe(time.perf_counter() - start)
+    POINTS_WRITTEN.labels(measurement_name).inc(len(lines))
+
+def _buffer():
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = LineBuffer()
+    return buffer
+
+def _send(write_api, buffer):
+    count = len(buffer)
+    if count:
+        write_api.write(bucket=Config.INFLUX_BUCKET, record=buffer.getvalue(), write_precision=PRECISION)
+        buffer.clear()
+    return count
+
+def _synchronous():
+    from influxdb_client.client.write_api import SYNCHRONOUS
+    return SYNCHRONOUS
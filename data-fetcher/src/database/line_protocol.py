@@ -0,0 +1,127 @@
+"""
+InfluxDB line protocol encoding.
+
+Builds line protocol text directly instead of going through ``influxdb_client.Point``.
+Fields are converted to the types declared in ``schema.FIELD_TYPES``. Every fetcher
+write goes through here, at second precision.
+"""
+
+import functools
+import io
+import math
+import time
+from datetime import datetime
+
+from src.database.schema import FIELD_TYPES
+
+_MEASUREMENT_ESCAPES = str.maketrans({",": "\\,", " ": "\\ "})
+_KEY_ESCAPES = str.maketrans({",": "\\,", "=": "\\=", " ": "\\ "})
+
+
+# Keys and tag values repeat from point to point, so their escaped forms are cached
+@functools.lru_cache(maxsize=4096)
+def _escape_key(value) -> str:
+    return str(value).translate(_KEY_ESCAPES)
+
+
+def format_field(value):
+    """A field value in line protocol syntax, or None if it can't be written."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        # Without an "i" suffix a bare integer is a float in line protocol, so "-7.0" is sent as "-7"
+        text = repr(value)
+        return text[:-2] if text.endswith(".0") else text
+    if isinstance(value, str):
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return None
+
+
+def format_typed(value, kind):
+    """
+    A field value converted to its declared type ``kind`` (float, int, bool or str) in
+    line protocol syntax, or None if it doesn't convert.
+    """
+    try:
+        if kind is float:
+            value = float(value)
+        elif kind is int:
+            value = int(round(float(value)))
+        elif kind is str:
+            value = str(value)
+        elif not isinstance(value, bool):
+            return None
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return format_field(value)
+
+
+def epoch_seconds(timestamp=None) -> int:
+    """A point's timestamp (datetime, epoch seconds, or None for now) in whole seconds."""
+    if timestamp is None:
+        return int(time.time())
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp())
+    return int(timestamp)
+
+
+def encode_line(measurement: str, tags: dict, fields: dict, timestamp: int = None):
+    """
+    One line of line protocol. ``timestamp`` is in the write's precision. Null and
+    non-finite fields, and fields that don't convert to their declared type, are left
+    out; returns None if no field is left.
+    """
+    types = FIELD_TYPES.get(measurement, {})
+    encoded = []
+    for key, value in fields.items():
+        if value is None:
+            continue
+        kind = types.get(key)
+        text = format_typed(value, kind) if kind is not None else format_field(value)
+        if text is not None:
+            encoded.append(f"{_escape_key(key)}={text}")
+    if not encoded:
+        return None
+    line = measurement.translate(_MEASUREMENT_ESCAPES)
+    if tags:
+        line += "".join(f",{_escape_key(k)}={_escape_key(v)}" for k, v in sorted(tags.items()) if v not in (None, ""))
+    line += " " + ",".join(encoded)
+    if timestamp is not None:
+        line += f" {int(timestamp)}"
+    return line
+
+
+class LineBuffer:
+    """
+    The body of one write request. Lines are encoded straight into a text buffer that
+    is cleared and reused for the next request.
+    """
+
+    def __init__(self):
+        self._text = io.StringIO()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, measurement: str, tags: dict, fields: dict, timestamp: int = None) -> bool:
+        """Encode one point; returns False if it had no writable field."""
+        line = encode_line(measurement, tags, fields, timestamp)
+        if line is None:
+            return False
+        self._text.write(line)
+        self._text.write("\n")
+        self.count += 1
+        return True
+
+    def getvalue(self) -> str:
+        return self._text.getvalue()
+
+    def clear(self):
+        self._text.seek(0)
+        self._text.truncate()
+        self.count = 0
@@ -0,0 +1,22 @@
+"""
+Declared field types of every measurement the fetcher writes.
+
+InfluxDB fixes a field's type with its first write to a shard and rejects later writes
+of another type. Values are converted to the declared type when they are encoded (see
+``line_protocol.encode_line``). That way a yr.no temperature that happens to come back
+as ``5`` is still written as the float ``5.0``.
+"""
+
+from src.providers.registry import DERIVED_METAR_FIELDS, METAR_FIELDS, NETATMO_FIELDS, YR_FORECAST_FIELDS
+
+VATSIM_STATS_FIELDS = ("total_clients", "pilot_count", "controller_count", "atis_count", "supervisor_count")
+
+FIELD_TYPES = {
+    "metar": {**dict.fromkeys(METAR_FIELDS + DERIVED_METAR_FIELDS, float), "flight_category": str},
+    "yr_forecast": dict.fromkeys(YR_FORECAST_FIELDS, float),
+    "netatmo": dict.fromkeys(NETATMO_FIELDS, float),
+    "energy_prices": {"price_per_kwh_ore": int},
+    "vatsim_stats": dict.fromkeys(VATSIM_STATS_FIELDS, int),
+    "forecast_verification": {"count": int, "bias": float, "mae": float, "rmse": float},
+    "alerts": {"firing": bool, "value": float, "message": str},
+}
@@ -1,97 +1,91 @@
-from src.providers import vatsim_traffic
-from src.providers.faa import fetch_faa_metar
-from src.providers.checkwx import fetch_checkwx_metar
-from src.providers.vatsim import fetch_vatsim_metar
-from src.providers.yrno import fetch_yr_forecast
-from src.providers.netatmo import fetch_netatmo_data
-from src.providers.energy import fetch_energy_prices
-from src.database.influx_client import write_measurement
+from src.providers.registry import METAR_FIELDS, YR_FORECAST_FIELDS, enabled_providers, load
+from src.database.influx_client import write_measurement, write_measurements
+from src.utils.config import Config
+from src.utils.derived import derive_metar_fields
 from src.utils.logging_config import logger
+from src.utils.cadence import JOB_CADENCE, METAR_CADENCE, observation_epoch, run_if_due
+from src.utils.cluster import LocalCoordinator, get_coordinator
+from src.utils.metrics import CYCLE_OVERRUNS, CYCLE_SECONDS, JOBS_RUN, METAR_SOURCE, start_metrics_server
+from src.utils.profiling import install_signal_handler
+from src.utils.stations import load_forecast_locations, load_stations, shard_stations
+from src.utils.tracing import trace
+from src.utils.verification import VERIFIER, parse_epoch
+import functools
+import multiprocessing
+import os
+import signal
+import tempfile
 import time
 import threading
 
 
+def _is_fresh(observed, now):
+    return observed is not None and now - observed <= Config.METAR_STALE_AFTER
+
+
 def get_airport_metars_from_providers(stations):
     """
-    Attempt to retrieve METAR data from multiple sources in order:
-    1. FAA
-    2. CheckWX
-    3. VATSIM
+    Resolve a METAR for each station through the enabled METAR providers in registry
+    order (FAA, then CheckWX, then VATSIM). Each provider is only asked for the stations
+    still missing a fresh report (one observed within METAR_STALE_AFTER), so in steady
+    state the fallbacks cost no requests at all. Between candidates the newest
+    observation wins; ties and unknown observation times go to the earlier provider.
 
     Returns a dictionary of weather infomration keyed by station_id, with the chosen METAR
-    data as the value. If no data is available, the value is None.
+    data as the value. Stations no provider had are left out.
     """
-
-    # FAA
-    try:
-        faa_metars = fetch_faa_metar(stations)
-    except Exception as e:
-        logger.error(f"Error fetching METAR data from FAA: {e}")
-        faa_metars = []
-
-    # CheckWX
-    try:
-        checkwx_metars = fetch_checkwx_metar(stations)
-    except Exception as e:
-        logger.error(f"Error fetching METAR data from CheckWX: {e}")
-        checkwx_metars = []
-
-    # VATSIM
-    try:
-        vatsim_metars = fetch_vatsim_metar(stations)
-    except Exception as e:
-        logger.error(f"Error fetching METAR data from VATSIM: {e}")
-        vatsim_metars = []
-
-    # Index METARs by station_id for each provider
-    def index_by_station(metars):
-        return {m["station_id"]: m for m in metars if m.get("station_id")}
-
-    faa_indexed = index_by_station(faa_metars)
-    checkwx_indexed = index_by_station(checkwx_metars)
-    vatsim_indexed = index_by_station(vatsim_metars)
+    now = time.time()
+    best = {}  # station_id -> (observed epoch or None, provider, metar)
+    remaining = list(stations)
+
+    for metar_provider in enabled_providers(role="metar"):
+        if not remaining:
+            break
+        provider = metar_provider.name
+        fetch = load(provider)
+        if fetch is None:
+            continue
+        try:
+            metars = fetch(remaining)
+        except Exception as e:
+            logger.error(f"Error fetching METAR data from {provider}: {e}")
+            metars = []
+
+        wanted = set(remaining)
+        for metar in metars:
+            stn = metar.get("station_id")
+            if stn not in wanted:
+                continue
+            observed = observation_epoch(metar)
+            current = best.get(stn)
+            if current is None or (observed is not None and (current[0] is None or observed > current[0])):
+                best[stn] = (observed, provider, metar)
+
+        remaining = [stn for stn in remaining if stn not in best or not _is_fresh(best[stn][0], now)]
+        logger.debug(f"{provider}: {len(metars)} METARs, {len(remaining)} stations left for the next provider")
 
     final_metars = {}
-
+    chosen_counts = {}
     for stn in stations:
-        candidates = []
-        if stn in faa_indexed:
-            candidates.append(("FAA", faa_indexed[stn]))
-        if stn in checkwx_indexed:
-            candidates.append(("CheckWX", checkwx_indexed[stn]))
-        if stn in vatsim_indexed:
-            candidates.append(("VATSIM", vatsim_indexed[stn]))
-
-        if not candidates:
-            logger.warning(f"No METAR data found for {stn} from any provider")
+        if stn not in best:
+            logger.debug(f"No METAR data found for {stn} from any provider")
             continue
-
-        # Always choose FAA if available
-        faa_candidate = next((m for p, m in candidates if p == "FAA"), None)
-        if faa_candidate:
-            chosen_provider = "FAA"
-            chosen_metar = faa_candidate
-        else:
-            # If FAA not available, then fall back to CheckWX, then VATSIM.
-            # If CheckWX present:
-            checkwx_candidate = next((m for p, m in candidates if p == "CheckWX"), None)
-            if checkwx_candidate:
-                chosen_provider = "CheckWX"
-                chosen_metar = checkwx_candidate
-            else:
-                # else use VATSIM
-                chosen_provider, chosen_metar = candidates[0]  # only VATSIM left
-
-        logger.info(f"For {stn}, using METAR data from {chosen_provider}")
+        _, chosen_provider, chosen_metar = best[stn]
+        logger.debug(f"For {stn}, using METAR data from {chosen_provider}")
+        chosen_counts[chosen_provider] = chosen_counts.get(chosen_provider, 0) + 1
+        METAR_SOURCE.labels(chosen_provider).inc()
         final_metars[stn] = chosen_metar
 
+    missing = len(stations) - len(final_metars)
+    logger.info(f"METARs for {len(final_metars)}/{len(stations)} stations {chosen_counts}, {missing} missing")
     return final_metars
 
 
-def store_yr_forecast_in_influxdb(forecast_data):
+def store_yr_forecast_in_influxdb(forecast_data, location="Home"):
     """
     Fetch and store a forecast from yr.no in InfluxDB.
     :param forecast_data:  The forecast data dictionary.
+    :param location:  Name the forecast is tagged with.
     :return:
     """
 
@@ -100,39 +94,51 @@ def store_yr_forecast_in_influxdb(forecast_data):
         return
 
     cf = forecast_data["current_forecast"]
-    fields = {
-        "temp_c": cf["temp_c"],
-        "wind_speed_m_s": cf["wind_speed_m_s"],
-        "cloud_fraction_percent": cf["cloud_fraction_percent"],
-        "pressure_hpa": cf["pressure_hpa"],
-        "relative_humidity_percent": cf["relative_humidity_percent"],
-        "precip_1h_mm": cf["precip_1h_mm"],
-        "precip_6h_mm": cf["precip_6h_mm"],
-        "precip_12h_mm": cf["precip_12h_mm"]
-    }
-    tags = {"location": "Home"}
+    fields = {field: cf[field] for field in YR_FORECAST_FIELDS}
+    tags = {"location": location}
 
     try:
         write_measurement("yr_forecast", fields, tags)
-        logger.info(f"Wrote yr.no forecast data to InfluxDB at {cf['observation_time']}")
+        logger.info(f"Wrote yr.no forecast data for {location} to InfluxDB at {cf['observation_time']}")
     except Exception as e:
         logger.error(f"Failed to write yr.no forecast data to InfluxDB: {e}", exc_info=True)
 
+    issued = parse_epoch(forecast_data.get("issued"))
+    if issued is not None and forecast_data.get("steps"):
+        VERIFIER.add_forecast(location, issued, forecast_data["steps"])
+
+
+def store_verification(updated):
+    """Write the verification statistics that changed with the latest observations."""
+    if not updated:
+        return
+    rows = [
+        (stats.to_fields(), {"location": location, "source": source, "variable": variable, "lead": lead})
+        for (location, source, variable, lead), stats in updated
+    ]
+    try:
+        write_measurements("forecast_verification", rows)
+        logger.info(f"Wrote {len(rows)} forecast verification statistics to InfluxDB")
+    except Exception as e:
+        logger.error(f"Failed to write forecast verification to InfluxDB: {e}", exc_info=True)
+
 
 def store_netatmo_to_influx(data):
     """
-    Store Netatmo data in InfluxDB, ensuring consistent field types.
+    Store Netatmo data in InfluxDB. Field types are fixed by the netatmo schema.
     """
     if not data:
         logger.warning("No Netatmo data to store.")
         return
 
     try:
+        # Missing readings are left out rather than written as 0.0, which charts and
+        # averages would take for a real value
         fields = {
-            "temperature_c": float(data["temperature"]) if data["temperature"] is not None else 0.0,
-            "humidity_percent": float(data["humidity"]) if data["humidity"] is not None else 0.0,
-            "pressure_hpa": float(data["pressure_hpa"]) if data["pressure_hpa"] is not None else 0.0,
-            "rain_mm": float(data.get("rain_mm", 0.0)) if data.get("rain_mm") is not None else 0.0,
+            "temperature_c": data.get("temperature"),
+            "humidity_percent": data.get("humidity"),
+            "pressure_hpa": data.get("pressure_hpa"),
+            "rain_mm": data.get("rain_mm"),
         }
 
         # Debug output
@@ -140,57 +146,82 @@ def store_netatmo_to_influx(data):
 
         tags = {"station_name": data["station_name"]}
 
-        write_measurement("netatmo", fields, tags)
+        write_measurement("netatmo", fields, tags, observed=data.get("time_utc"))
         logger.info(f"Wrote Netatmo data for {data['station_name']} to InfluxDB")
 
     except Exception as e:
         logger.error(f"Failed to write Netatmo data to InfluxDB: {e}", exc_info=True)
 
-    # Fetch Energy Prices
-    fetch_energy_prices()
+    store_verification(VERIFIER.observe("netatmo", VERIFIER.netatmo_location, data.get("time_utc"), data))
 
 
+def store_metars_in_influxdb(metars):
+    """
+    Write the chosen METAR for each station to InfluxDB in batched requests, together
+    with the derived fields (flight category, humidity, ...) computed for the batch.
+    """
+    rows = []
+    verified = []
+    batch = list(metars.values())
+    for metar, derived in zip(batch, derive_metar_fields(batch)):
+        fields = {field: metar[field] for field in METAR_FIELDS}
+        fields.update(derived)
+        tags = {
+            "station_id": metar["station_id"]
+        }
+        rows.append((fields, tags, None, observation_epoch(metar)))
+        if metar["station_id"] in VERIFIER.sites:
+            verified.append({**metar, **derived})
+        logger.debug(f"{metar['station_id']}: METAR at {metar['observation_time']}. {metar['wx_string']}")
+
+    try:
+        write_measurements("metar", rows)
+        logger.info(f"Wrote METAR data for {len(rows)} stations to InfluxDB")
+    except Exception as e:
+        logger.error(f"Failed to write METAR data to InfluxDB: {e}", exc_info=True)
+
+    store_verification(VERIFIER.observe_metars(verified))
 
-def main():
-    stations = ["ENZV", "KJFK", "ENGM", "KLAX"]
+
+def fetch_and_store_metars(stations):
+    now = time.time()
+    if Config.ADAPTIVE_POLLING:
+        # Only stations whose next report is expected by now
+        stations = METAR_CADENCE.due_stations(stations, now)
+        if not stations:
+            logger.debug("No METAR stations due this tick")
+            return
 
     # Fetch METARs
     metars = get_airport_metars_from_providers(stations)
 
     # Write METAR Data to InfluxDB
-    for station_id, metar in metars.items():
-        fields = {
-            "temp_c": metar["temp_c"],
-            "dewpoint_c": metar["dewpoint_c"],
-            "wind_dir_deg": metar["wind_dir_deg"],
-            "wind_speed_kt": metar["wind_speed_kt"],
-            "altim_in_hg": metar["altim_in_hg"],
-            "altim_hpa": metar["altim_hpa"],
-            "visibility_statute_mi": metar["visibility_statute_mi"]
-        }
-        tags = {
-            "station_id": metar["station_id"]
-        }
-        try:
-            write_measurement("metar", fields, tags)
-            logger.info(
-                f"{metar['station_id']}: Wrote METAR data to InfluxDB at {metar['observation_time']}. {metar['wx_string']}"
-            )
-        except Exception as e:
-            logger.error(
-                f"Failed to write METAR data for {metar['station_id']} to InfluxDB: {e}",
-                exc_info=True
-            )
+    store_metars_in_influxdb(metars)
+
+    if Config.ADAPTIVE_POLLING:
+        METAR_CADENCE.observe(stations, metars, now)
+
 
+def fetch_and_store_forecast(location, lat, lon):
     # Fetch and store forecast data from yr.no
-    forecast_data = fetch_yr_forecast("59.9112", "10.7579")
+    fetch_yr_forecast = load("yrno")
+    if fetch_yr_forecast is None:
+        return
+    forecast_data = fetch_yr_forecast(lat, lon)
     if forecast_data:
-        store_yr_forecast_in_influxdb(forecast_data)
+        store_yr_forecast_in_influxdb(forecast_data, location)
+        if forecast_data.get("expires"):
+            # yr.no asks clients not to refetch before the forecast expires
+            JOB_CADENCE.schedule(f"forecast:{location}", forecast_data["expires"])
     else:
-        logger.error("Failed to fetch forecast data from yr.no")
+        logger.error(f"Failed to fetch forecast data for {location} from yr.no")
 
 
+def fetch_and_store_netatmo():
     # Fetch and store Netatmo data
+    fetch_netatmo_data = load("netatmo")
+    if fetch_netatmo_data is None:
+        return
     netatmo_data = fetch_netatmo_data()
     if netatmo_data:
         store_netatmo_to_influx(netatmo_data)
@@ -198,40 +229,177 @@ def main():
         logger.warning("No Netatmo data returned.")
 
 
-def main_5min_loop():
+# Jobs that need more than calling the provider's entry point
+STORE_JOBS = {
+    "netatmo": fetch_and_store_netatmo,
+}
+
+
+def _call_provider(name):
+    entry = load(name)
+    if entry is not None:
+        entry()
+
+
+def five_minute_jobs(metar_shards=1):
     """
-    Runs once every 5 minutes to fetch from other providers.
+    The 5-minute cycle's jobs for the enabled providers, keyed by the name they are
+    partitioned under. Stations are split into ``metar_shards`` jobs so several workers
+    can share them.
     """
-    while True:
-        logger.info("[fetcher] Starting 5-minute cycle (other providers)...")
-        try:
-            main()
-            logger.info("[fetcher] Completed 5-minute cycle.")
-        except Exception as e:
-            logger.error(f"[fetcher] Error in 5-minute cycle: {e}")
+    jobs = {}
+    if enabled_providers(role="metar"):
+        for key, shard in shard_stations(load_stations(), metar_shards).items():
+            jobs[key] = functools.partial(fetch_and_store_metars, shard)
+    for provider in enabled_providers(role="job", loop="5min"):
+        interval = provider.interval_seconds
+        if provider.name == "yrno":
+            for name, lat, lon in load_forecast_locations():
+                key = f"forecast:{name}"
+                job = functools.partial(fetch_and_store_forecast, name, lat, lon)
+                jobs[key] = functools.partial(run_if_due, key, job, interval)
+            continue
+        job = STORE_JOBS.get(provider.name) or functools.partial(_call_provider, provider.name)
+        jobs[provider.name] = functools.partial(run_if_due, provider.name, job, interval)
+    return jobs
+
+
+def thirty_second_jobs():
+    """
+    The 30-second cycle's jobs. With adaptive polling the loop ticks every VATSIM_TICK
+    and each job runs when due; the VATSIM feed schedules itself from its snapshot times.
+    """
+    jobs = {}
+    for provider in enabled_providers(role="job", loop="30sec"):
+        job = STORE_JOBS.get(provider.name) or functools.partial(_call_provider, provider.name)
+        jobs[provider.name] = functools.partial(run_if_due, provider.name, job, provider.interval_seconds,
+                                                Config.VATSIM_TICK)
+    return jobs
+
+
+def main():
+    """
+    Run every 5-minute job once in this process.
+    """
+    for key, job in five_minute_jobs().items():
+        run_job(LocalCoordinator(), "5min", 0, key, job, "owned")
+
+
+def record_cycle(loop, interval, started):
+    """
+    Record how long a loop cycle took and count it as an overrun if it took longer
+    than the loop interval. Returns how long to sleep until the next cycle.
+    """
+    elapsed = time.perf_counter() - started
+    CYCLE_SECONDS.labels(loop).observe(elapsed)
+    if elapsed > interval:
+        CYCLE_OVERRUNS.labels(loop).inc()
+        logger.warning(f"[fetcher] {loop} cycle took {elapsed:.1f}s, longer than its {interval}s interval")
+    return max(interval - elapsed, 0)
+
+
+def run_job(coordinator, loop, slot, key, job, kind):
+    """
+    Run one claimed job, isolating its failures from the rest of the cycle.
+    """
+    JOBS_RUN.labels(loop, kind).inc()
+    try:
+        job()
+    except Exception as e:
+        logger.error(f"[fetcher] Job {key} failed: {e}", exc_info=True)
+    finally:
+        coordinator.complete(loop, slot, key)
 
-        time.sleep(300)  # 5 minutes (300 seconds)
 
+def _sleep_until(deadline):
+    remaining = deadline - time.time()
+    if remaining > 0:
+        time.sleep(remaining)
 
-def main_30sec_loop():
+
+def run_loop(coordinator, loop, interval, build_jobs):
     """
-    Runs once every 30 seconds to fetch VATSIM flight data.
+    Run ``loop`` once per wall-clock slot of ``interval`` seconds. Each cycle runs the
+    jobs this worker owns; in a cluster it then takes over any job of the slot that no
+    live worker picked up.
     """
     while True:
-        logger.info("[fetcher] Starting 30-second cycle (VATSIM traffic)...")
+        slot = int(time.time() // interval)
+        slot_start = slot * interval
+        logger.info(f"[fetcher] Starting {loop} cycle...")
+        started = time.perf_counter()
+        jobs = {}
         try:
-            vatsim_traffic.fetch_and_store_vatsim_traffic()
-            logger.info("[fetcher] Completed 30-second cycle.")
+            with trace(f"cycle.{loop}"):
+                coordinator.refresh()
+                jobs = build_jobs()
+                for key, job in jobs.items():
+                    if coordinator.owns(key) and coordinator.claim(loop, slot, key):
+                        run_job(coordinator, loop, slot, key, job, "owned")
+            logger.info(f"[fetcher] Completed {loop} cycle.")
         except Exception as e:
-            logger.error(f"[fetcher] Error in 30-second cycle: {e}")
+            logger.error(f"[fetcher] Error in {loop} cycle: {e}")
+        record_cycle(loop, interval, started)
 
-        time.sleep(30)  # 30 seconds
+        if coordinator.clustered and jobs:
+            try:
+                take_over(coordinator, loop, slot, slot_start, interval, jobs)
+                coordinator.prune(loop, slot)
+            except Exception as e:
+                logger.error(f"[fetcher] Error taking over {loop} jobs: {e}")
 
+        _sleep_until(slot_start + interval)
+
+
+def take_over(coordinator, loop, slot, slot_start, interval, jobs):
+    """
+    Sweep the slot for jobs no live worker is running, from TAKEOVER_DELAY into the slot
+    and then every HEARTBEAT_INTERVAL until it ends. A claimant is only seen as dead once
+    its heartbeat is LEASE_TTL old, so one that dies mid-slot is caught by a later sweep.
+    """
+    slot_end = slot_start + interval
+    sweep_at = slot_start + interval * Config.TAKEOVER_DELAY
+    while sweep_at < slot_end:
+        _sleep_until(sweep_at)
+        for key in coordinator.orphaned(loop, slot, list(jobs)):
+            run_job(coordinator, loop, slot, key, jobs[key], "takeover")
+        sweep_at = max(sweep_at, time.time()) + Config.HEARTBEAT_INTERVAL
+
+
+def main_5min_loop(coordinator):
+    """
+    Runs once every 5 minutes to fetch from other providers. With adaptive polling it
+    ticks every CADENCE_TICK instead and each job decides whether it is due.
+    """
+    metar_shards = Config.METAR_SHARDS if coordinator.clustered else 1
+    build_jobs = functools.partial(five_minute_jobs, metar_shards)
+    interval = Config.CADENCE_TICK if Config.ADAPTIVE_POLLING else Config.FETCH_INTERVAL  # 5 minutes by default
+    run_loop(coordinator, "5min", interval, build_jobs)
+
+
+def main_30sec_loop(coordinator):
+    """
+    Runs once every 30 seconds to fetch VATSIM flight data. With adaptive polling it
+    ticks every VATSIM_TICK instead and polls the feed when its next snapshot is out.
+    """
+    interval = Config.VATSIM_TICK if Config.ADAPTIVE_POLLING else Config.VATSIM_TRAFFIC_INTERVAL  # 30 seconds by default
+    run_loop(coordinator, "30sec", interval, thirty_second_jobs)
+
+
+def run_worker(index=None):
+    """
+    Run both loops in this process. Worker ``index`` of a multi-process fetcher serves
+    metrics on METRICS_PORT + index.
+    """
+    # Expose Prometheus metrics (set METRICS_PORT=0 to disable)
+    start_metrics_server(Config.METRICS_PORT + (index or 0) if Config.METRICS_PORT else 0)
+    # `kill -USR1 <pid>` captures a PROFILE_SECONDS sampling profile into PROFILE_DIR
+    install_signal_handler()
+    coordinator = get_coordinator(index).start()
 
-if __name__ == "__main__":
     # Create the two threads
-    thread_5min = threading.Thread(target=main_5min_loop, daemon=True)
-    thread_30sec = threading.Thread(target=main_30sec_loop, daemon=True)
+    thread_5min = threading.Thread(target=main_5min_loop, args=(coordinator,), daemon=True)
+    thread_30sec = threading.Thread(target=main_30sec_loop, args=(coordinator,), daemon=True)
 
     # Start the threads
     thread_5min.start()
@@ -243,3 +411,46 @@ if __name__ == "__main__":
             time.sleep(1)
     except KeyboardInterrupt:
         logger.info("[fetcher] Shutting down.")
+    finally:
+        coordinator.stop()
+
+
+def supervise(processes):
+    """
+    Run ``processes`` worker processes sharing COORDINATION_DIR, restarting any that die.
+    Their jobs move to the surviving workers until the replacement joins.
+    """
+    if not Config.COORDINATION_DIR:
+        Config.COORDINATION_DIR = os.path.join(tempfile.gettempdir(), "fetcher-coordination")
+        os.environ["COORDINATION_DIR"] = Config.COORDINATION_DIR
+    logger.info(f"[fetcher] Starting {processes} workers coordinating in {Config.COORDINATION_DIR}")
+
+    def spawn(index):
+        process = multiprocessing.Process(target=run_worker, args=(index,), name=f"fetcher-{index}")
+        process.start()
+        return process
+
+    workers = {index: spawn(index) for index in range(processes)}
+    try:
+        while True:
+            time.sleep(1)
+            for index, process in workers.items():
+                if not process.is_alive():
+                    logger.warning(f"[fetcher] Worker {index} exited with {process.exitcode}, restarting it")
+                    workers[index] = spawn(index)
+    except KeyboardInterrupt:
+        logger.info("[fetcher] Shutting down workers.")
+        for process in workers.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGINT)
+        for process in workers.values():
+            process.join(10)
+            if process.is_alive():
+                process.terminate()
+
+
+if __name__ == "__main__":
+    if Config.FETCHER_PROCESSES > 1:
+        supervise(Config.FETCHER_PROCESSES)
+    else:
+        run_worker()
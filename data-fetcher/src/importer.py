@@ -0,0 +1,436 @@
+"""
+Bulk historical import.
+
+    python -m src.importer [--workers N] [--checkpoint FILE] [--kind KIND] [--dry-run] PATH [PATH ...]
+
+Imports local archive files into InfluxDB. Paths may be files or directories, which are
+walked recursively. Each file's kind comes from its name unless ``--kind`` is given:
+
+* ``*.csv``: aviationweather.gov METAR CSV (``raw_text,station_id,observation_time,...``)
+* ``*.txt``: raw METAR text. Each report needs a timestamp, either on the line before it
+  (NOAA cycle files: ``2024/11/18 11:50``) or in front of it (``2024-11-18T11:50:00Z ENZV ...``)
+* ``*_NO1.json`` .. ``*_NO5.json``: hvakosterstrommen.no day price files
+* any other ``*.json``: VATSIM datafeed snapshots
+
+Any of these may be gzipped (``.gz``).
+
+Files are parsed with the same decoders the providers use. Each parse runs in a
+process pool, and the results are written as gzipped line protocol with second
+precision, IMPORT_BATCH_SIZE lines per request.
+
+Uncompressed METAR files larger than IMPORT_CHUNK_BYTES are split into chunks at
+record boundaries, so one big archive still spreads across the pool. Every finished
+file or chunk is recorded in the checkpoint file, and a rerun skips it. A point is
+identified by its series and timestamp, so re-importing a chunk that was cut off
+half-way only overwrites the points it already wrote.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import msgspec
+
+from src.database.influx_client import write_lines
+from src.database.line_protocol import encode_line
+from src.providers.registry import METAR_FIELDS
+from src.utils.cadence import observation_epoch
+from src.utils.config import Config
+from src.utils.derived import derive_metar_fields
+from src.utils.logging_config import logger
+
+METAR_CSV = "metar-csv"
+METAR_RAW = "metar-raw"
+ENERGY_JSON = "energy-json"
+VATSIM_JSON = "vatsim-json"
+KINDS = (METAR_CSV, METAR_RAW, ENERGY_JSON, VATSIM_JSON)
+
+MEASUREMENTS = {
+    METAR_CSV: "metar",
+    METAR_RAW: "metar",
+    ENERGY_JSON: "energy_prices",
+    VATSIM_JSON: "vatsim_stats",
+}
+
+# METARs are decoded and derived in groups of this many
+_PARSE_BATCH = 5000
+
+_ENERGY_FILE = re.compile(r"_(NO[1-5])\.json(\.gz)?$", re.IGNORECASE)
+_NOAA_DATE = re.compile(rb"^\d{4}/\d{2}/\d{2} \d{2}:\d{2}\s*$")
+_ISO_PREFIX = re.compile(rb"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+
+def detect_kind(path: str):
+    name = os.path.basename(path).lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    if name.endswith(".csv"):
+        return METAR_CSV
+    if name.endswith(".txt"):
+        return METAR_RAW
+    if name.endswith(".json"):
+        return ENERGY_JSON if _ENERGY_FILE.search(path) else VATSIM_JSON
+    return None
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _csv_header(path: str):
+    """The METAR CSV column header and the offset of the first data line."""
+    with _open(path) as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return None, 0
+            # aviationweather.gov prefixes the header with a few lines of notes
+            if line.startswith(b"raw_text") or b"station_id" in line:
+                return next(csv.reader([line.decode("utf-8", "replace")])), f.tell()
+
+
+def _is_record_start(kind: str, line: bytes) -> bool:
+    if kind == METAR_RAW:
+        return bool(_NOAA_DATE.match(line) or _ISO_PREFIX.match(line))
+    return True
+
+
+def _chunk_ranges(path: str, kind: str, start: int, size: int, chunk_bytes: int):
+    """Split ``path`` from ``start`` into roughly ``chunk_bytes`` ranges ending on record boundaries."""
+    ranges = []
+    with open(path, "rb") as f:
+        pos = start
+        while pos < size:
+            end = size
+            if pos + chunk_bytes < size:
+                f.seek(pos + chunk_bytes)
+                f.readline()  # finish the line the target offset falls in
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    if _is_record_start(kind, line):
+                        end = offset
+                        break
+            ranges.append((pos, end))
+            pos = end
+    return ranges
+
+
+def plan_units(paths, kind: str = None, chunk_bytes: int = None):
+    """
+    Work units for the given files and directories: dicts with the file, its kind, the
+    byte range to import (None for the whole file) and a key identifying it in the
+    checkpoint.
+    """
+    chunk_bytes = chunk_bytes or Config.IMPORT_CHUNK_BYTES
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+
+    units = []
+    for path in sorted(files):
+        file_kind = kind or detect_kind(path)
+        if file_kind is None:
+            logger.warning(f"[import] Skipping {path}: unknown file kind")
+            continue
+        stat = os.stat(path)
+        base = {"path": os.path.abspath(path), "kind": file_kind, "header": None}
+        ranges = [None]
+        if file_kind in (METAR_CSV, METAR_RAW):
+            start = 0
+            if file_kind == METAR_CSV:
+                base["header"], start = _csv_header(path)
+                if base["header"] is None:
+                    logger.warning(f"[import] Skipping {path}: no CSV header found")
+                    continue
+            if not path.endswith(".gz") and stat.st_size - start > chunk_bytes:
+                ranges = _chunk_ranges(path, file_kind, start, stat.st_size, chunk_bytes)
+            elif file_kind == METAR_CSV:
+                # Skip the notes and header; a gzipped file's end offset isn't known up front
+                ranges = [(start, None)]
+        for byte_range in ranges:
+            span_text = f"{byte_range[0]}-{byte_range[1] or ''}" if byte_range else "all"
+            units.append(dict(base, range=byte_range,
+                              key=f"{base['path']}:{stat.st_size}:{int(stat.st_mtime)}:{span_text}"))
+    return units
+
+
+def _read_lines(unit):
+    """The unit's lines, as bytes."""
+    with _open(unit["path"]) as f:
+        if unit["range"] is None:
+            yield from f
+            return
+        start, end = unit["range"]
+        f.seek(start)
+        if end is None:
+            yield from f
+            return
+        pos = start
+        while pos < end:
+            line = f.readline()
+            if not line:
+                return
+            pos += len(line)
+            yield line
+
+
+def _blank_to_none(value):
+    return value if value not in (None, "") else None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _csv_metar_items(unit):
+    """Rows of an aviationweather.gov METAR CSV as items in the FAA JSON API's shape."""
+    header = unit["header"]
+    decoded = (line.decode("utf-8", "replace") for line in _read_lines(unit))
+    for cells in csv.reader(decoded):
+        if len(cells) < 3:
+            continue
+        row = dict(zip(header, cells))
+        altim_in_hg = _to_float(row.get("altim_in_hg"))
+        yield {
+            "icaoId": row.get("station_id"),
+            "reportTime": row.get("observation_time"),
+            "temp": _blank_to_none(row.get("temp_c")),
+            "dewp": _blank_to_none(row.get("dewpoint_c")),
+            "wdir": _blank_to_none(row.get("wind_dir_degrees")),
+            "wspd": _blank_to_none(row.get("wind_speed_kt")),
+            "visib": _blank_to_none(row.get("visibility_statute_mi")),
+            # The JSON API reports the altimeter in hPa
+            "altim": altim_in_hg / 0.02953 if altim_in_hg else None,
+            "elev": _blank_to_none(row.get("elevation_m")),
+            "rawOb": row.get("raw_text", ""),
+        }
+
+
+def _raw_metar_records(unit):
+    """(observation time, raw report) pairs from a raw METAR text dump."""
+    pending = None
+    for line in _read_lines(unit):
+        line = line.strip()
+        if not line:
+            continue
+        if _NOAA_DATE.match(line):
+            pending = datetime.strptime(line.decode(), "%Y/%m/%d %H:%M")
+            continue
+        text = line.decode("utf-8", "replace")
+        if _ISO_PREFIX.match(line):
+            stamp, _, text = text.partition(" ")
+            observed = datetime.fromisoformat(stamp.replace("Z", "+00:00")).replace(tzinfo=None)
+        else:
+            observed, pending = pending, None
+        for prefix in ("METAR ", "SPECI "):
+            if text.startswith(prefix):
+                text = text[len(prefix):]
+        yield observed, text
+
+
+def _metar_lines(metars):
+    lines = []
+    skipped = 0
+    for metar, derived in zip(metars, derive_metar_fields(metars)):
+        observed = observation_epoch(metar) if metar.get("observation_time") else None
+        if observed is None or not metar.get("station_id"):
+            skipped += 1
+            continue
+        fields = {field: metar[field] for field in METAR_FIELDS}
+        fields.update(derived)
+        line = encode_line("metar", {"station_id": metar["station_id"]}, fields, observed)
+        if line is None:
+            skipped += 1
+        else:
+            lines.append(line)
+    return lines, skipped
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _metar_batches(unit):
+    from src.providers.faa import parse_faa_metar
+    from src.providers.payloads import FaaMetar
+    from src.providers.vatsim import parse_vatsim_metar
+
+    if unit["kind"] == METAR_CSV:
+        for items in _batched(_csv_metar_items(unit), _PARSE_BATCH):
+            # Same typed items the JSON API decodes to; CSV cells are strings, hence lax
+            yield _metar_lines(parse_faa_metar(msgspec.convert(items, list[FaaMetar], strict=False)))
+        return
+
+    for records in _batched(_raw_metar_records(unit), _PARSE_BATCH):
+        metars = []
+        skipped = 0
+        for observed, raw in records:
+            metar = parse_vatsim_metar(raw) if observed else None
+            if metar is None:
+                skipped += 1
+                continue
+            metar["observation_time"] = observed.strftime("%Y-%m-%d %H:%M:%S")
+            metars.append(metar)
+        lines, unusable = _metar_lines(metars)
+        yield lines, skipped + unusable
+
+
+def _load_json(unit):
+    with _open(unit["path"]) as f:
+        return json.load(f)
+
+
+def _energy_batches(unit):
+    from src.providers.energy import parse_energy_prices
+
+    region = _ENERGY_FILE.search(unit["path"]).group(1).upper()
+    lines = [
+        encode_line("energy_prices", tags, fields, int(timestamp.timestamp()))
+        for fields, tags, timestamp in parse_energy_prices(_load_json(unit), region)
+    ]
+    yield lines, 0
+
+
+def _vatsim_batches(unit):
+    from src.providers.payloads import vatsim_datafeed_decoder
+    from src.providers.vatsim_traffic import parse_vatsim_data, vatsim_stats_row
+
+    with _open(unit["path"]) as f:
+        data = vatsim_datafeed_decoder.decode(f.read())
+    updated = data.general.update_timestamp
+    if not updated:
+        yield [], 1
+        return
+    fields, tags = vatsim_stats_row(parse_vatsim_data(data))
+    observed = datetime.fromisoformat(updated.replace("Z", "+00:00"))
+    if observed.tzinfo is None:
+        observed = observed.replace(tzinfo=timezone.utc)
+    yield [encode_line("vatsim_stats", tags, fields, int(observed.timestamp()))], 0
+
+
+_DECODERS = {
+    METAR_CSV: _metar_batches,
+    METAR_RAW: _metar_batches,
+    ENERGY_JSON: _energy_batches,
+    VATSIM_JSON: _vatsim_batches,
+}
+
+
+def import_unit(unit, batch_size: int, dry_run: bool = False):
+    """
+    Decode and write one unit. Runs in a pool worker; returns ``(key, rows, skipped)``.
+    """
+    measurement = MEASUREMENTS[unit["kind"]]
+    rows = skipped = 0
+    pending = []
+    for lines, bad in _DECODERS[unit["kind"]](unit):
+        skipped += bad
+        pending.extend(lines)
+        if len(pending) >= batch_size:
+            if not dry_run:
+                write_lines(measurement, pending, precision="s", batch_size=batch_size)
+            rows += len(pending)
+            pending = []
+    if pending and not dry_run:
+        write_lines(measurement, pending, precision="s", batch_size=batch_size)
+    rows += len(pending)
+    return unit["key"], rows, skipped
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"units": {}}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def run_import(paths, workers: int = None, checkpoint_path: str = None, kind: str = None,
+               batch_size: int = None, dry_run: bool = False):
+    workers = workers or Config.IMPORT_WORKERS or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or Config.IMPORT_CHECKPOINT
+    batch_size = batch_size or Config.IMPORT_BATCH_SIZE
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    done = checkpoint.setdefault("units", {})
+    units = plan_units(paths, kind)
+    todo = [unit for unit in units if unit["key"] not in done]
+    logger.info(f"[import] {len(units)} units, {len(units) - len(todo)} already done, "
+                f"{len(todo)} to import with {workers} workers")
+
+    started = time.perf_counter()
+    last_report = started
+    rows = skipped = failed = finished = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(import_unit, unit, batch_size, dry_run): unit for unit in todo}
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                key, unit_rows, unit_skipped = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"[import] Failed to import {unit['path']} {unit['range'] or ''}: {e}")
+                continue
+            finished += 1
+            rows += unit_rows
+            skipped += unit_skipped
+            if not dry_run:
+                done[key] = {"rows": unit_rows, "skipped": unit_skipped}
+                save_checkpoint(checkpoint_path, checkpoint)
+            now = time.perf_counter()
+            if now - last_report >= 5 or finished + failed == len(todo):
+                last_report = now
+                logger.info(f"[import] {finished + failed}/{len(todo)} units, {rows:,} rows, "
+                            f"{rows / (now - started):,.0f} rows/s")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"[import] Done: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s), "
+                f"{skipped:,} records skipped, {failed} units failed")
+    return {"rows": rows, "skipped": skipped, "failed": failed, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="archive files or directories")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default IMPORT_WORKERS or CPUs)")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default IMPORT_CHECKPOINT)")
+    parser.add_argument("--kind", choices=KINDS, help="file kind, instead of detecting it from the name")
+    parser.add_argument("--batch-size", type=int, default=None, help="lines per write (default IMPORT_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="parse and encode only; write nothing")
+    args = parser.parse_args()
+    result = run_import(args.paths, args.workers, args.checkpoint, args.kind, args.batch_size, args.dry_run)
+    raise SystemExit(1 if result["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
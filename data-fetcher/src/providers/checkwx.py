@@ -1,76 +1,72 @@
 import requests
+from src.providers.payloads import checkwx_decoder
+from src.utils.config import Config
+from src.utils.http import http_get
 from src.utils.logging_config import logger
-import os
-
-CHECKWX_API_KEY = os.getenv("CHECKWX_API_KEY", "")
+from src.utils.metrics import PARSE_SECONDS
+from src.utils.stations import fetch_batched
+from src.utils.tracing import span
 
 
 def fetch_checkwx_metar(stations):
     """
     Fetches METAR data from CheckWX for one or multiple stations.
-    If multiple stations are provided in a list, they are fetched in a single request by
-    joining them with commas.
+    Stations are requested CHECKWX_BATCH_SIZE at a time (comma-joined in the URL), with
+    the batches fetched in parallel.
     """
-    if isinstance(stations, list):
-        station_str = ",".join(stations)
-    else:
-        station_str = stations
+    return fetch_batched("checkwx", _fetch_checkwx_batch, stations, Config.CHECKWX_BATCH_SIZE)
+
+
+def _fetch_checkwx_batch(stations):
+    station_str = ",".join(stations)
 
-    url = f"https://api.checkwx.com/metar/{station_str}/decoded"
-    headers = {"X-API-Key": CHECKWX_API_KEY}
+    url = f"{Config.CHECKWX_API_URL}/metar/{station_str}/decoded"
+    headers = {"X-API-Key": Config.CHECKWX_API_KEY}
     logger.debug(f"Fetching METAR data from CheckWX: {url}")
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_get("checkwx", url, headers=headers)
         response.raise_for_status()
     except requests.RequestException as e:
         logger.error(f"Error fetching CheckWX METAR: {e}")
         return []
 
-    # Parse the response
-    data = response.json().get("data", [])
+    with PARSE_SECONDS.labels("checkwx").time():
+        with span("decode.checkwx"):
+            payload = checkwx_decoder.decode(response.content)
+        with span("transform.checkwx"):
+            return parse_checkwx_metar(payload)
+
+
+def parse_checkwx_metar(payload):
+    """
+    Convert a decoded CheckWX METAR response (``payloads.CheckwxResponse``) into our
+    METAR dictionaries.
+    """
+    # Unknown stations come back as message strings in the list
+    data = [item for item in payload.data if not isinstance(item, str)]
     if not data:
         logger.debug("No METAR data returned by CheckWX.")
         return []
 
     logger.debug(f"Received METAR data for {len(data)} station(s) from CheckWX")
 
-    # Helper for safe float conversion
-    def to_float(val):
-        try:
-            return float(val)
-        except:
-            return None
-
     metars = []
     for item in data:
-        raw_text = item.get("raw_text", "")
-        icao = item.get("icao")
-        observed = item.get("observed")  # ISO 8601 datetime string
-        temp_c = to_float(item.get("temperature", {}).get("celsius"))
-        dew_c = to_float(item.get("dewpoint", {}).get("celsius"))
-        wind_dir = to_float(item.get("wind", {}).get("degrees"))
-        wind_spd = to_float(item.get("wind", {}).get("speed_kts"))
-
-        # Barometer can be taken directly in hPa or inHg
-        altim_hpa = to_float(item.get("barometer", {}).get("hpa"))
-        altim_in_hg = to_float(item.get("barometer", {}).get("hg"))
-
-        # Visibility can be read from miles_float
-        visibility_mi = to_float(item.get("visibility", {}).get("miles_float"))
-
-        # Append to the results
+        # Barometer comes in both hPa and inHg; visibility as a float in miles;
+        # elevation is used for density altitude
         metars.append({
-            "station_id": icao,
-            "observation_time": observed,
-            "temp_c": temp_c,
-            "dewpoint_c": dew_c,
-            "wind_dir_deg": wind_dir,
-            "wind_speed_kt": wind_spd,
-            "altim_hpa": altim_hpa,
-            "altim_in_hg": altim_in_hg,
-            "visibility_statute_mi": visibility_mi,
-            "wx_string": raw_text
+            "station_id": item.icao,
+            "observation_time": item.observed,  # ISO 8601 datetime string
+            "temp_c": item.temperature.celsius,
+            "dewpoint_c": item.dewpoint.celsius,
+            "wind_dir_deg": item.wind.degrees,
+            "wind_speed_kt": item.wind.speed_kts,
+            "altim_hpa": item.barometer.hpa,
+            "altim_in_hg": item.barometer.hg,
+            "visibility_statute_mi": item.visibility.miles_float,
+            "elevation_m": item.elevation.meters,
+            "wx_string": item.raw_text
         })
 
-    return metars
\ No newline at end of file
+    return metars
@@ -1,6 +1,8 @@
 import datetime
 import requests
-from src.database.influx_client import write_measurement
+from src.database.influx_client import write_measurements
+from src.utils.config import Config
+from src.utils.http import http_get
 from src.utils.logging_config import logger
 
 def fetch_energy_prices():
@@ -31,14 +33,14 @@ def create_energy_price_url(date):
     """
     year = date.strftime("%Y")
     month_day = date.strftime("%m-%d")
-    return f"https://www.hvakosterstrommen.no/api/v1/prices/{year}/{month_day}_NO2.json"
+    return f"{Config.ENERGY_API_URL}/{year}/{month_day}_NO2.json"
 
 def fetch_day_prices(url):
     """
     Fetch energy prices for a given day from the API.
     """
     try:
-        response = requests.get(url)
+        response = http_get("energy", url)
         response.raise_for_status()
         logger.info(f"Fetched energy prices from {url}")
         return response.json()  # Assuming the API returns a JSON response
@@ -47,10 +49,12 @@ def fetch_day_prices(url):
         return []
 
 
-def store_energy_prices(prices):
+def parse_energy_prices(prices, region="NO2"):
     """
-    Store each hour's price data in InfluxDB as NOK/øre per kWh.
+    Convert a day of hvakosterstrommen.no prices into ``(fields, tags, timestamp)``
+    rows, with the price in øre per kWh.
     """
+    rows = []
     for entry in prices:
         # Parse the start time of the hourly period
         dt = datetime.datetime.fromisoformat(entry["time_start"])
@@ -62,13 +66,17 @@ def store_energy_prices(prices):
             continue
 
         # Convert NOK to øre
-        price_in_ore = round(nok_per_kwh * 100)
+        fields = {"price_per_kwh_ore": round(nok_per_kwh * 100)}
+        tags = {"region": region, "currency": "NOK"}
+        rows.append((fields, tags, dt))
+    return rows
 
-        # Prepare the data point
-        fields = {"price_per_kwh_ore": price_in_ore}  # Store price in øre
-        tags = {"region": "NO2", "currency": "NOK"}
 
-        # Write to InfluxDB with the specific timestamp
-        write_measurement("energy_prices", fields, tags, timestamp=dt)
+def store_energy_prices(prices):
+    """
+    Store each hour's price data in InfluxDB as NOK/øre per kWh.
+    """
+    # One request for the whole day, each hour at its own timestamp
+    write_measurements("energy_prices", parse_energy_prices(prices))
 
-    logger.info("Wrote hourly energy prices to InfluxDB")
\ No newline at end of file
+    logger.info("Wrote hourly energy prices to InfluxDB")
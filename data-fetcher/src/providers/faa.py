@@ -1,70 +1,89 @@
+from src.providers.payloads import faa_decoder
+from src.utils.config import Config
+from src.utils.http import http_get
 from src.utils.logging_config import logger
+from src.utils.metrics import PARSE_SECONDS
+from src.utils.stations import fetch_batched
+from src.utils.tracing import span
 import requests
 
 def fetch_faa_metar(stations):
-    # If stations is a list, join them by commas
-    if isinstance(stations, list):
-        station_str = ",".join(stations)
-    else:
-        station_str = stations
+    """
+    Fetch METARs from aviationweather.gov, FAA_BATCH_SIZE stations per request with the
+    batches fetched in parallel.
+    """
+    return fetch_batched("faa", _fetch_faa_batch, stations, Config.FAA_BATCH_SIZE)
 
-    url = f"https://aviationweather.gov/api/data/metar?ids={station_str}&format=json"
+
+def _fetch_faa_batch(stations):
+    station_str = ",".join(stations)
+
+    url = f"{Config.FAA_API_URL}?ids={station_str}&format=json"
     logger.debug(f"Fetching METAR data from {url}")
-    response = requests.get(url)
+    response = http_get("faa", url)
     try:
         response.raise_for_status()
     except requests.HTTPError as err:
         logger.error(f"HTTP error while fetching METAR data: {err}")
         return []
 
-    data = response.json()
-    if not data:
-        logger.debug("No METAR data returned by the API")
-        return []
+    with PARSE_SECONDS.labels("faa").time():
+        with span("decode.faa"):
+            items = faa_decoder.decode(response.content)
+        with span("transform.faa"):
+            return parse_faa_metar(items)
 
-    logger.debug(f"Received METAR data for {len(data)} stations")
 
+def _number(value):
+    """A float from a decoded number or numeric string, else None."""
+    if value is None or isinstance(value, float):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return None
 
 
-    # If there’s no data or it's empty, return empty list
-    if not data:
+def parse_faa_metar(items):
+    """
+    Convert decoded aviationweather.gov METARs (``payloads.FaaMetar``) into our METAR
+    dictionaries.
+    """
+    if not items:
+        logger.debug("No METAR data returned by the API")
         return []
 
-    metars = []
-    for item in data:
-        def to_float(val):
-            try:
-                return float(val)
-            except:
-                return None
+    logger.debug(f"Received METAR data for {len(items)} stations")
 
+    metars = []
+    for item in items:
         # Convert altimeter from hPa to inHg if desired
-        altim_hpa = item.get("altim")
-        altim_in_hg = (to_float(altim_hpa) * 0.02953) if altim_hpa is not None else None
+        altim_hpa = item.altim
+        altim_in_hg = altim_hpa * 0.02953 if altim_hpa is not None else None
 
         # Handle visibility
-        visib_raw = item.get("visib")
-        visib_str = str(visib_raw) if visib_raw is not None else None
-        if visib_str == "9999":
+        visib = item.visib
+        if visib == 9999 or visib == "9999":
             # 9999 typically means >=10km (~6.2 miles)
             visibility_statute_mi = 6.2
-        elif visib_str and visib_str.endswith('+'):
-            base_val = visib_str.rstrip('+')
-            visibility_statute_mi = to_float(base_val)
+        elif isinstance(visib, str):
+            # "10+" and the like
+            visibility_statute_mi = _number(visib.rstrip("+"))
         else:
-            visibility_statute_mi = to_float(visib_str)
+            visibility_statute_mi = visib
 
         metars.append({
-            "station_id": item.get("icaoId"),
-            "observation_time": item.get("reportTime"),
-            "temp_c": to_float(item.get("temp")),
-            "dewpoint_c": to_float(item.get("dewp")),
-            "wind_dir_deg": to_float(item.get("wdir")),
-            "wind_speed_kt": to_float(item.get("wspd")),
-            "altim_hpa": to_float(altim_hpa),
+            "station_id": item.icaoId,
+            "observation_time": item.reportTime,
+            "temp_c": item.temp,
+            "dewpoint_c": item.dewp,
+            "wind_dir_deg": _number(item.wdir),
+            "wind_speed_kt": item.wspd,
+            "altim_hpa": altim_hpa,
             "altim_in_hg": altim_in_hg,
             "visibility_statute_mi": visibility_statute_mi,
-            "wx_string": item.get("rawOb", "")
+            "elevation_m": item.elev,
+            "wx_string": item.rawOb
         })
 
-    return metars
\ No newline at end of file
+    return metars
@@ -1,34 +1,29 @@
 import os
 import json
 from datetime import datetime
+from src.providers.payloads import netatmo_decoder
+from src.utils.config import Config
+from src.utils.http import http_get, http_post
 from src.utils.logging_config import logger
-
-TOKEN_FILE = "/app/tokens/netatmo_tokens.json"
-
-NETATMO_CLIENT_ID = os.getenv("NETATMO_CLIENT_ID")
-NETATMO_CLIENT_SECRET = os.getenv("NETATMO_CLIENT_SECRET")
-NETATMO_USERNAME = os.getenv("NETATMO_USERNAME")
-NETATMO_PASSWORD = os.getenv("NETATMO_PASSWORD")
-
-# You might choose to not use the env tokens at all and rely solely on the file.
-initial_access_token = os.getenv("NETATMO_ACCESS_TOKEN", "")
-initial_refresh_token = os.getenv("NETATMO_REFRESH_TOKEN", "")
+from src.utils.metrics import PARSE_SECONDS
+from src.utils.tracing import span
 
 class NetatmoAuthError(Exception):
     pass
 
 def load_tokens():
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, "r") as f:
+    if os.path.exists(Config.NETATMO_TOKEN_FILE):
+        with open(Config.NETATMO_TOKEN_FILE, "r") as f:
             data = json.load(f)
             return data.get("access_token"), data.get("refresh_token")
     # If file doesn't exist, use initial tokens from env or return None
-    if initial_access_token and initial_refresh_token:
-        return initial_access_token, initial_refresh_token
+    # You might choose to not use the env tokens at all and rely solely on the file.
+    if Config.NETATMO_ACCESS_TOKEN and Config.NETATMO_REFRESH_TOKEN:
+        return Config.NETATMO_ACCESS_TOKEN, Config.NETATMO_REFRESH_TOKEN
     return None, None
 
 def save_tokens(access_token, refresh_token):
-    with open(TOKEN_FILE, "w") as f:
+    with open(Config.NETATMO_TOKEN_FILE, "w") as f:
         json.dump({
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -37,7 +32,6 @@ def save_tokens(access_token, refresh_token):
     logger.info("Netatmo tokens saved to file")
 
 def refresh_netatmo_token():
-    import requests
     access_token, refresh_token = load_tokens()
     if not refresh_token:
         raise NetatmoAuthError("No refresh token available")
@@ -45,11 +39,11 @@ def refresh_netatmo_token():
     payload = {
         "grant_type": "refresh_token",
         "refresh_token": refresh_token,
-        "client_id": NETATMO_CLIENT_ID,
-        "client_secret": NETATMO_CLIENT_SECRET
+        "client_id": Config.NETATMO_CLIENT_ID,
+        "client_secret": Config.NETATMO_CLIENT_SECRET
     }
 
-    response = requests.post("https://api.netatmo.com/oauth2/token", data=payload)
+    response = http_post("netatmo", f"{Config.NETATMO_API_URL}/oauth2/token", data=payload)
     if response.status_code != 200:
         raise NetatmoAuthError(f"Failed to refresh token: {response.text}")
 
@@ -71,7 +65,6 @@ def get_netatmo_token():
     return new_access_token
 
 def fetch_netatmo_data():
-    import requests
     token = get_netatmo_token()
     headers = {
         "Authorization": f"Bearer {token}"
@@ -80,33 +73,37 @@ def fetch_netatmo_data():
         "get_favorites": "false"
     }
 
-    response = requests.get("https://api.netatmo.com/api/getstationsdata", headers=headers, params=params)
+    response = http_get("netatmo", f"{Config.NETATMO_API_URL}/api/getstationsdata", headers=headers, params=params)
     response.raise_for_status()
-    data = response.json()
 
-    devices = data.get("body", {}).get("devices", [])
+    with PARSE_SECONDS.labels("netatmo").time():
+        with span("decode.netatmo"):
+            data = netatmo_decoder.decode(response.content)
+        with span("transform.netatmo"):
+            return parse_netatmo_data(data)
+
+
+def parse_netatmo_data(data):
+    """
+    Extract the main station's dashboard values from a decoded getstationsdata response
+    (``payloads.NetatmoStationsData``).
+    """
+    devices = data.body.devices
     if not devices:
         logger.warning("No Netatmo devices found")
         return None
 
     main_station = devices[0]
-    station_name = main_station.get("station_name", "Unknown Station")
-    dash_data = main_station.get("dashboard_data", {})
-
-    temperature = dash_data.get("Temperature")
-    humidity = dash_data.get("Humidity")
-    pressure = dash_data.get("Pressure", None)
-    rain = dash_data.get("Rain", 0.0)
-    wind_strength = dash_data.get("WindStrength", None)
-    wind_angle = dash_data.get("WindAngle", None)
+    station_name = main_station.station_name
+    dash_data = main_station.dashboard_data
 
     return {
         "station_name": station_name,
-        "temperature": temperature,
-        "humidity": humidity,
-        "pressure_hpa": pressure,
-        "rain_mm": rain,
-        "wind_strength_kmh": wind_strength,
-        "wind_angle_deg": wind_angle,
-        "time_utc": dash_data.get("time_utc")
+        "temperature": dash_data.Temperature,
+        "humidity": dash_data.Humidity,
+        "pressure_hpa": dash_data.Pressure,
+        "rain_mm": dash_data.Rain,
+        "wind_strength_kmh": dash_data.WindStrength,
+        "wind_angle_deg": dash_data.WindAngle,
+        "time_utc": dash_data.time_utc
     }
\ No newline at end of file
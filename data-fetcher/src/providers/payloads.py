@@ -0,0 +1,180 @@
+"""
+Typed decoders for provider payloads.
+
+Each JSON response is decoded straight from the response bytes into msgspec Structs
+(slotted, untracked by the GC). The Structs declare only the fields the parsers read,
+and the decoder skips everything else in the payload without building it. Numbers
+decode as floats, ints included, so the parsers need no ``to_float`` helpers. Nested
+objects that are missing decode to empty defaults, which replaces the chains of
+``.get(..., {})``.
+
+Decoding is lax (``strict=False``), so a number sent as a string still decodes as a
+float, as the old ``float()`` conversions allowed. Fields that really can be text
+(FAA ``wdir`` "VRB", ``visib`` "10+") are typed ``float | str``. A payload that doesn't
+match its schema raises ``msgspec.DecodeError``.
+"""
+
+import msgspec
+
+
+class _Payload(msgspec.Struct, gc=False):
+    pass
+
+
+# aviationweather.gov /api/data/metar?format=json
+class FaaMetar(_Payload):
+    icaoId: str | None = None
+    reportTime: str | None = None
+    temp: float | None = None
+    dewp: float | None = None
+    wdir: float | str | None = None
+    wspd: float | None = None
+    visib: float | str | None = None
+    altim: float | None = None
+    elev: float | None = None
+    rawOb: str | None = ""
+
+
+# CheckWX /metar/{ids}/decoded
+class CheckwxTemperature(_Payload):
+    celsius: float | None = None
+
+
+class CheckwxWind(_Payload):
+    degrees: float | None = None
+    speed_kts: float | None = None
+
+
+class CheckwxBarometer(_Payload):
+    hpa: float | None = None
+    hg: float | None = None
+
+
+class CheckwxVisibility(_Payload):
+    miles_float: float | None = None
+
+
+class CheckwxElevation(_Payload):
+    meters: float | None = None
+
+
+class CheckwxMetar(_Payload):
+    icao: str | None = None
+    observed: str | None = None
+    raw_text: str | None = ""
+    temperature: CheckwxTemperature = msgspec.field(default_factory=CheckwxTemperature)
+    dewpoint: CheckwxTemperature = msgspec.field(default_factory=CheckwxTemperature)
+    wind: CheckwxWind = msgspec.field(default_factory=CheckwxWind)
+    barometer: CheckwxBarometer = msgspec.field(default_factory=CheckwxBarometer)
+    visibility: CheckwxVisibility = msgspec.field(default_factory=CheckwxVisibility)
+    elevation: CheckwxElevation = msgspec.field(default_factory=CheckwxElevation)
+
+
+class CheckwxResponse(_Payload):
+    # Stations CheckWX doesn't know come back as a plain message string
+    data: list[CheckwxMetar | str] = []
+
+
+# api.met.no locationforecast/2.0/compact
+class YrInstantDetails(_Payload):
+    air_temperature: float | None = None
+    wind_speed: float | None = None
+    cloud_area_fraction: float | None = None
+    air_pressure_at_sea_level: float | None = None
+    relative_humidity: float | None = None
+
+
+class YrInstant(_Payload):
+    details: YrInstantDetails = msgspec.field(default_factory=YrInstantDetails)
+
+
+class YrPeriodDetails(_Payload):
+    precipitation_amount: float | None = None
+
+
+class YrPeriod(_Payload):
+    details: YrPeriodDetails = msgspec.field(default_factory=YrPeriodDetails)
+
+
+class YrStepData(_Payload):
+    instant: YrInstant = msgspec.field(default_factory=YrInstant)
+    next_1_hours: YrPeriod = msgspec.field(default_factory=YrPeriod)
+    next_6_hours: YrPeriod = msgspec.field(default_factory=YrPeriod)
+    next_12_hours: YrPeriod = msgspec.field(default_factory=YrPeriod)
+
+
+class YrStep(_Payload):
+    time: str | None = None
+    data: YrStepData = msgspec.field(default_factory=YrStepData)
+
+
+class YrMeta(_Payload):
+    updated_at: str | None = None
+
+
+class YrProperties(_Payload):
+    meta: YrMeta = msgspec.field(default_factory=YrMeta)
+    timeseries: list[YrStep] = []
+
+
+class YrForecast(_Payload):
+    properties: YrProperties = msgspec.field(default_factory=YrProperties)
+
+
+# Netatmo /api/getstationsdata
+class NetatmoDashboard(_Payload):
+    Temperature: float | None = None
+    Humidity: float | None = None
+    Pressure: float | None = None
+    Rain: float | None = None
+    WindStrength: float | None = None
+    WindAngle: float | None = None
+    time_utc: float | None = None
+
+
+class NetatmoDevice(_Payload):
+    station_name: str | None = "Unknown Station"
+    dashboard_data: NetatmoDashboard = msgspec.field(default_factory=NetatmoDashboard)
+
+
+class NetatmoBody(_Payload):
+    devices: list[NetatmoDevice] = []
+
+
+class NetatmoStationsData(_Payload):
+    body: NetatmoBody = msgspec.field(default_factory=NetatmoBody)
+
+
+# VATSIM v3 data feed
+class VatsimGeneral(_Payload):
+    update_timestamp: str | None = None
+
+
+class VatsimFlightPlan(_Payload):
+    aircraft: str | None = "Unknown"
+    departure: str | None = "Unknown"
+    arrival: str | None = "Unknown"
+
+
+class VatsimPilot(_Payload):
+    # Pilots without a filed flight plan have "flight_plan": null
+    flight_plan: VatsimFlightPlan | None = None
+
+
+class VatsimController(_Payload):
+    rating: int = 0
+
+
+class VatsimDatafeed(_Payload):
+    general: VatsimGeneral = msgspec.field(default_factory=VatsimGeneral)
+    pilots: list[VatsimPilot] = []
+    controllers: list[VatsimController] = []
+    atis: list[VatsimController] = []
+
+
+# Decoders are built once; each holds the compiled schema for its type
+faa_decoder = msgspec.json.Decoder(list[FaaMetar], strict=False)
+checkwx_decoder = msgspec.json.Decoder(CheckwxResponse, strict=False)
+yr_decoder = msgspec.json.Decoder(YrForecast, strict=False)
+netatmo_decoder = msgspec.json.Decoder(NetatmoStationsData, strict=False)
+vatsim_datafeed_decoder = msgspec.json.Decoder(VatsimDatafeed, strict=False)
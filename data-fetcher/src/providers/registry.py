@@ -0,0 +1,132 @@
+"""
+Provider registry.
+
+Each provider declares where its entry point lives, which loop runs it and how often,
+the config it needs, and the measurement and fields it writes. Provider modules are
+only imported when a provider is enabled (listed in ENABLED_PROVIDERS with its required
+config set) and first used. A module that fails to import is logged once and
+disabled, so one broken provider can't take the fetcher down.
+"""
+
+import importlib
+import threading
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import FETCH_ERRORS
+
+METAR_FIELDS = ("temp_c", "dewpoint_c", "wind_dir_deg", "wind_speed_kt", "altim_in_hg", "altim_hpa",
+                "visibility_statute_mi")
+# Computed at ingest by src.utils.derived
+DERIVED_METAR_FIELDS = ("flight_category", "ceiling_ft", "relative_humidity_percent", "dewpoint_spread_c",
+                        "wind_u_kt", "wind_v_kt", "density_altitude_ft")
+YR_FORECAST_FIELDS = ("temp_c", "wind_speed_m_s", "cloud_fraction_percent", "pressure_hpa",
+                      "relative_humidity_percent", "precip_1h_mm", "precip_6h_mm", "precip_12h_mm")
+NETATMO_FIELDS = ("temperature_c", "humidity_percent", "pressure_hpa", "rain_mm")
+
+
+class Provider:
+    """
+    A data source the fetcher can run.
+
+    ``role`` is "metar" for providers in the METAR cascade (tried in registry order) or
+    "job" for providers that run as their own job on ``loop`` every ``interval`` (a
+    Config attribute name) seconds.
+    """
+
+    def __init__(self, name, module, function, role, loop="5min", interval="FETCH_INTERVAL", requires=(),
+                 measurement=None, fields=()):
+        self.name = name
+        self.module = module
+        self.function = function
+        self.role = role
+        self.loop = loop
+        self.interval = interval
+        self.requires = tuple(requires)
+        self.measurement = measurement
+        self.fields = tuple(fields)
+
+    @property
+    def interval_seconds(self):
+        return getattr(Config, self.interval)
+
+    def missing_config(self):
+        return [key for key in self.requires if not getattr(Config, key, None)]
+
+
+PROVIDERS = [
+    Provider("faa", "src.providers.faa", "fetch_faa_metar", "metar", measurement="metar",
+             fields=METAR_FIELDS + DERIVED_METAR_FIELDS),
+    Provider("checkwx", "src.providers.checkwx", "fetch_checkwx_metar", "metar", requires=("CHECKWX_API_KEY",),
+             measurement="metar", fields=METAR_FIELDS + DERIVED_METAR_FIELDS),
+    Provider("vatsim", "src.providers.vatsim", "fetch_vatsim_metar", "metar", measurement="metar",
+             fields=METAR_FIELDS + DERIVED_METAR_FIELDS),
+    Provider("yrno", "src.providers.yrno", "fetch_yr_forecast", "job", measurement="yr_forecast",
+             fields=YR_FORECAST_FIELDS),
+    Provider("netatmo", "src.providers.netatmo", "fetch_netatmo_data", "job",
+             requires=("NETATMO_CLIENT_ID", "NETATMO_CLIENT_SECRET"), measurement="netatmo", fields=NETATMO_FIELDS),
+    Provider("energy", "src.providers.energy", "fetch_energy_prices", "job", measurement="energy_prices",
+             fields=("price_per_kwh_ore",)),
+    Provider("vatsim_traffic", "src.providers.vatsim_traffic", "fetch_and_store_vatsim_traffic", "job",
+             loop="30sec", interval="VATSIM_TRAFFIC_INTERVAL", measurement="vatsim_stats",
+             fields=("total_clients", "pilot_count", "controller_count", "atis_count", "supervisor_count")),
+]
+_BY_NAME = {p.name: p for p in PROVIDERS}
+
+_loaded = {}
+_broken = set()
+_warned = set()
+_lock = threading.Lock()
+
+
+def get_provider(name: str) -> Provider:
+    return _BY_NAME[name]
+
+
+def is_enabled(name: str) -> bool:
+    """Listed in ENABLED_PROVIDERS, has its required config, and hasn't failed to load."""
+    enabled = {n.strip() for n in Config.ENABLED_PROVIDERS.split(",") if n.strip()}
+    if name not in enabled or name in _broken:
+        return False
+    missing = _BY_NAME[name].missing_config()
+    if missing:
+        if name not in _warned:
+            _warned.add(name)
+            logger.warning(f"[providers] {name} disabled, missing config: {', '.join(missing)}")
+        return False
+    return True
+
+
+def enabled_providers(role: str = None, loop: str = None):
+    """Enabled providers in registry order, optionally filtered by role and loop."""
+    return [
+        p for p in PROVIDERS
+        if (role is None or p.role == role) and (loop is None or p.loop == loop) and is_enabled(p.name)
+    ]
+
+
+def load(name: str):
+    """
+    Import a provider's module on first use and return its entry point, or None if the
+    provider is disabled or its module failed to import.
+    """
+    entry = _loaded.get(name)
+    if entry is not None:
+        return entry
+    if not is_enabled(name):
+        return None
+    provider = _BY_NAME[name]
+    with _lock:
+        if name in _loaded:
+            return _loaded[name]
+        try:
+            entry = getattr(importlib.import_module(provider.module), provider.function)
+        except Exception as e:
+            _broken.add(name)
+            FETCH_ERRORS.labels(name, "import").inc()
+            logger.error(f"[providers] Failed to load {name} from {provider.module}, disabling it: {e}",
+                         exc_info=True)
+            return None
+        _loaded[name] = entry
+        logger.debug(f"[providers] Loaded {name}")
+        return entry
@@ -1,120 +1,152 @@
+import re
+from datetime import datetime, timezone
+
 import requests
+from src.utils.cadence import observation_epoch
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.config import Config
+from src.utils.http import http_get
 from src.utils.logging_config import logger
+from src.utils.metrics import PARSE_SECONDS
+from src.utils.stations import fetch_batched
+from src.utils.tracing import span
+
+
+_TEMPERATURE_GROUP = re.compile(r"^(M?\d{2})/(M?\d{2})?$")
+
+
+def _signed(value):
+    # METAR temperatures write minus as a leading "M"
+    return -float(value[1:]) if value.startswith("M") else float(value)
 
 
 def fetch_vatsim_metar(stations):
     """
     Fetches METARs from VATSIM. The endpoint only supports one station at a time:
     https://metar.vatsim.net/metar.php?id=KJFK
+    so stations are requested individually, in parallel.
 
     Returns a list of METAR dictionaries, one for each station.
     """
     if isinstance(stations, str):
         stations = [stations]
 
-    metars = []
-
-    for icao in stations:
-        url = f"https://metar.vatsim.net/metar.php?id={icao}"
-        logger.debug(f"Fetching METAR from VATSIM for {icao}: {url}")
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-        except requests.RequestException as e:
-            logger.error(f"Error fetching VATSIM METAR for {icao}: {e}")
-            continue
-
-        raw_text = response.text.strip()
-        # VATSIM returns just the raw METAR string, e.g. "KJFK 171451Z 25011KT ..."
-
-        # We need to parse this METAR string. For simplicity, let’s do minimal parsing:
-        # We'll use a simplified parser or just store raw for now.
-        # In a real scenario, you might integrate a METAR parsing library.
-        # For demonstration, let’s just extract a few fields using regex or assumptions.
-
-        # This is a quick and dirty parse. For robust parsing, use a METAR library like python-metar.
-        import re
-        # A naive approach: split by space
-        parts = raw_text.split()
-        # Typically:
-        # KJFK 171451Z 25011KT 8SM BKN012 ...
-        # parts[0] = station
-        # parts[1] = time like 171451Z (day=17 hour=14 min=51)
-        station_id = parts[0]
-        # Construct an observation time (naive, you can convert properly to a datetime)
-        # Just store raw for now or store day/hour/min from parts[1]
-        observation_time = None  # Not provided by VATSIM METAR directly with full date
-        # For demonstration, leave None or parse from parts[1] if you know UTC date.
-
-        # Find temperature: often after some fields like "12/10" for temp/dew
-        temp_c = None
-        dewpoint_c = None
-        for p in parts:
-            if "/" in p and len(p.split("/")) == 2:
-                # e.g. "12/10" -> temp=12, dew=10
-                t, d = p.split("/")
-                try:
-                    temp_c = float(t)
-                    dewpoint_c = float(d)
-                    break
-                except:
-                    pass
-
-        # Wind:
-        # e.g. "25011KT"
-        wind_dir_deg = None
-        wind_speed_kt = None
-        for p in parts:
-            if p.endswith("KT"):
-                # format: dddffKT or dddffGggKT
-                wind_match = re.match(r"(\d{3})(\d{2})", p)
-                if wind_match:
-                    wind_dir_deg = float(wind_match.group(1))
-                    wind_speed_kt = float(wind_match.group(2))
-                break
-
-        # Altimeter might appear as Axxxx for inHg or Qxxxx for hPa
-        altim_in_hg = None
-        altim_hpa = None
-        for p in parts:
-            if p.startswith("A") and len(p) == 5:
-                # A3014 means 30.14 inHg
-                try:
-                    alt = float(p[1:]) / 100.0
-                    altim_in_hg = alt
-                except:
-                    pass
-            elif p.startswith("Q") and len(p) == 5:
-                # Q1014 means 1014 hPa
-                try:
-                    q = float(p[1:])
-                    altim_hpa = q
-                    altim_in_hg = q * 0.02953
-                except:
-                    pass
-
-        # Visibility: e.g. "8SM"
-        visibility_statute_mi = None
-        for p in parts:
-            if p.endswith("SM"):
-                # e.g. "8SM"
-                v = p.replace("SM", "")
-                try:
-                    visibility_statute_mi = float(v)
-                except:
-                    pass
-
-        metars.append({
-            "station_id": station_id,
-            "observation_time": observation_time,
-            "temp_c": temp_c,
-            "dewpoint_c": dewpoint_c,
-            "wind_dir_deg": wind_dir_deg,
-            "wind_speed_kt": wind_speed_kt,
-            "altim_in_hg": altim_in_hg,
-            "altim_hpa": altim_hpa,
-            "visibility_statute_mi": visibility_statute_mi,
-            "wx_string": raw_text
-        })
-
-    return metars
\ No newline at end of file
+    return fetch_batched("vatsim_metar", _fetch_vatsim_station, stations, 1)
+
+
+def _fetch_vatsim_station(batch):
+    icao = batch[0]
+    url = f"{Config.VATSIM_METAR_URL}?id={icao}"
+    logger.debug(f"Fetching METAR from VATSIM for {icao}: {url}")
+    try:
+        response = http_get("vatsim_metar", url)
+        response.raise_for_status()
+    except CircuitOpenError:
+        return []
+    except requests.RequestException as e:
+        logger.error(f"Error fetching VATSIM METAR for {icao}: {e}")
+        return []
+
+    with PARSE_SECONDS.labels("vatsim_metar").time(), span("transform.vatsim_metar"):
+        metar = parse_vatsim_metar(response.text)
+    return [metar] if metar else []
+
+
+def parse_vatsim_metar(raw_text):
+    """
+    Parse a raw METAR string as returned by VATSIM into our METAR dictionary.
+    Returns None for an empty response.
+    """
+    raw_text = raw_text.strip()
+    if not raw_text:
+        return None
+
+    # VATSIM returns just the raw METAR string, e.g. "KJFK 171451Z 25011KT ..."
+
+    # We need to parse this METAR string. For simplicity, let’s do minimal parsing:
+    # We'll use a simplified parser or just store raw for now.
+    # In a real scenario, you might integrate a METAR parsing library.
+    # For demonstration, let’s just extract a few fields using regex or assumptions.
+
+    # This is a quick and dirty parse. For robust parsing, use a METAR library like python-metar.
+    # A naive approach: split by space
+    parts = raw_text.split()
+    # Typically:
+    # KJFK 171451Z 25011KT 8SM BKN012 ...
+    # parts[0] = station
+    # parts[1] = time like 171451Z (day=17 hour=14 min=51)
+    station_id = parts[0]
+    # The report only carries day/hour/minute; the month and year are the most recent
+    # ones that make it a past observation
+    observed = observation_epoch({"wx_string": raw_text})
+    observation_time = (
+        datetime.fromtimestamp(observed, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") if observed is not None else None
+    )
+
+    # Find temperature: often after some fields like "12/10" for temp/dew. An "M"
+    # prefix is minus ("M03/M07" -> temp=-3, dew=-7); the dewpoint may be missing ("12/")
+    temp_c = None
+    dewpoint_c = None
+    for p in parts:
+        temp_match = _TEMPERATURE_GROUP.match(p)
+        if temp_match:
+            temp_c = _signed(temp_match.group(1))
+            dewpoint_c = _signed(temp_match.group(2)) if temp_match.group(2) else None
+            break
+
+    # Wind:
+    # e.g. "25011KT"
+    wind_dir_deg = None
+    wind_speed_kt = None
+    for p in parts:
+        if p.endswith("KT"):
+            # format: dddffKT or dddffGggKT
+            wind_match = re.match(r"(\d{3})(\d{2})", p)
+            if wind_match:
+                wind_dir_deg = float(wind_match.group(1))
+                wind_speed_kt = float(wind_match.group(2))
+            break
+
+    # Altimeter might appear as Axxxx for inHg or Qxxxx for hPa
+    altim_in_hg = None
+    altim_hpa = None
+    for p in parts:
+        if p.startswith("A") and len(p) == 5:
+            # A3014 means 30.14 inHg
+            try:
+                alt = float(p[1:]) / 100.0
+                altim_in_hg = alt
+            except:
+                pass
+        elif p.startswith("Q") and len(p) == 5:
+            # Q1014 means 1014 hPa
+            try:
+                q = float(p[1:])
+                altim_hpa = q
+                altim_in_hg = q * 0.02953
+            except:
+                pass
+
+    # Visibility: e.g. "8SM"
+    visibility_statute_mi = None
+    for p in parts:
+        if p.endswith("SM"):
+            # e.g. "8SM"
+            v = p.replace("SM", "")
+            try:
+                visibility_statute_mi = float(v)
+            except:
+                pass
+
+    return {
+        "station_id": station_id,
+        "observation_time": observation_time,
+        "temp_c": temp_c,
+        "dewpoint_c": dewpoint_c,
+        "wind_dir_deg": wind_dir_deg,
+        "wind_speed_kt": wind_speed_kt,
+        "altim_in_hg": altim_in_hg,
+        "altim_hpa": altim_hpa,
+        "visibility_statute_mi": visibility_statute_mi,
+        "wx_string": raw_text
+    }
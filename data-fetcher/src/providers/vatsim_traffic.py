@@ -2,18 +2,31 @@
 providers/vatsim_traffic.py
 
 This module fetches VATSIM traffic data and stores it in InfluxDB.
-It does NOT modify existing config.py or influx_client.py.
 """
 
 import logging
+import math
 import time
 from collections import Counter
+from datetime import datetime, timezone
 
 import requests
 
-# Import your existing config and influx client
-from src.utils import config
-from src.database.influx_client import influx_client  # or get_influx_client
+from src.providers.payloads import VatsimDatafeed, VatsimFlightPlan, vatsim_datafeed_decoder
+from src.utils.cadence import JOB_CADENCE
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.config import Config
+from src.database.influx_client import write_measurement
+from src.utils.http import http_get
+from src.utils.metrics import FETCH_ERRORS, PARSE_SECONDS
+from src.utils.tracing import span
+
+# update_timestamp of the last feed snapshot stored
+_last_update = None
+
+# Pilots without a filed flight plan count as "Unknown" aircraft, departure and arrival
+_NO_FLIGHT_PLAN = VatsimFlightPlan()
+
 
 def fetch_and_store_vatsim_traffic(measurement_name: str = "vatsim_stats") -> None:
     """
@@ -22,59 +35,108 @@ def fetch_and_store_vatsim_traffic(measurement_name: str = "vatsim_stats") -> No
     Args:
         measurement_name (str): The name of the measurement in InfluxDB.
     """
+    global _last_update
     try:
         # 1. Fetch the data
         data = _fetch_vatsim_data()
 
+        # The feed is regenerated every ~15s; don't store the same snapshot twice
+        updated = data.general.update_timestamp
+        if updated and updated == _last_update:
+            logging.info(f"[vatsim_traffic] Feed unchanged since {updated}, skipping.")
+            if Config.ADAPTIVE_POLLING:
+                # The snapshot we waited for is late; look again on the next tick
+                JOB_CADENCE.schedule("vatsim_traffic", time.time())
+            return
+        if Config.ADAPTIVE_POLLING:
+            next_poll = next_poll_time(feed_epoch(updated))
+            if next_poll is not None:
+                JOB_CADENCE.schedule("vatsim_traffic", next_poll)
+
         # 2. Parse the data
-        stats = _parse_vatsim_data(data)
+        with PARSE_SECONDS.labels("vatsim_datafeed").time(), span("transform.vatsim_datafeed"):
+            stats = parse_vatsim_data(data)
 
         # 3. Write to InfluxDB
         _store_to_influx(stats, measurement_name)
+        _last_update = updated
 
         logging.info("[vatsim_traffic] Successfully stored VATSIM traffic stats.")
     except Exception as exc:
+        FETCH_ERRORS.labels("vatsim_datafeed", "cycle").inc()
         logging.error(f"[vatsim_traffic] Error fetching/storing VATSIM traffic data: {exc}")
 
 
-def _fetch_vatsim_data() -> dict:
+def feed_epoch(update_timestamp):
+    """
+    Epoch seconds of the feed's ``update_timestamp`` (e.g. "2024-11-18T11:50:12.3456789Z",
+    with more fractional digits than ``fromisoformat`` takes), or None.
+    """
+    if not update_timestamp:
+        return None
+    try:
+        text = update_timestamp.rstrip("Z").split(".")[0]
+        return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def next_poll_time(updated):
     """
-    Fetch the VATSIM data feed using exponential backoff,
-    leveraging configuration from config.py (if available).
+    When to fetch the feed next, given the epoch of the snapshot just stored: just
+    after the first regeneration at least VATSIM_TRAFFIC_INTERVAL later. None if the
+    snapshot time is unknown.
+    """
+    if updated is None:
+        return None
+    refresh = Config.VATSIM_REFRESH_INTERVAL
+    snapshots = max(1, math.ceil(Config.VATSIM_TRAFFIC_INTERVAL / refresh))
+    return updated + snapshots * refresh + Config.VATSIM_POLL_LAG
+
+
+def _fetch_vatsim_data() -> VatsimDatafeed:
+    """
+    Fetch the VATSIM data feed using exponential backoff. Retries stop once the next
+    wait would exceed VATSIM_RETRY_BUDGET seconds in total, or as soon as the provider's
+    circuit is open, so a dead feed can't stretch the 30-second cycle.
 
     Returns:
-        dict: Parsed JSON from VATSIM data feed.
+        VatsimDatafeed: The decoded data feed.
     """
-    # Example references to config variables; adjust to your real keys:
-    url = config.VATSIM_DATAFEED_URL  # e.g. "https://data.vatsim.net/v3/vatsim-data.json"
-    max_retries = getattr(config, "VATSIM_MAX_RETRIES", 5)
-    initial_backoff = getattr(config, "VATSIM_INITIAL_BACKOFF", 5)
+    url = Config.VATSIM_URL
+    max_retries = Config.VATSIM_MAX_RETRIES
+    initial_backoff = Config.VATSIM_INITIAL_BACKOFF
 
     backoff = initial_backoff
+    slept = 0.0
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, timeout=10)
+            response = http_get("vatsim_datafeed", url, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            with span("decode.vatsim_datafeed"):
+                data = vatsim_datafeed_decoder.decode(response.content)
             return data
 
+        except CircuitOpenError:
+            raise
         except (requests.exceptions.RequestException, ValueError) as err:
             logging.warning(
                 f"[vatsim_traffic] Attempt {attempt+1}/{max_retries} failed: {err}"
             )
-            if attempt == max_retries - 1:
-                # Re-raise if we're on the last attempt
+            if attempt == max_retries - 1 or slept + backoff > Config.VATSIM_RETRY_BUDGET:
+                # Re-raise if we're on the last attempt or out of retry budget
                 raise
             time.sleep(backoff)
+            slept += backoff
             backoff *= 2
 
     # Should never reach here because we raise on the last attempt.
     raise RuntimeError("[vatsim_traffic] Failed to fetch VATSIM data after max retries.")
 
 
-def _parse_vatsim_data(data: dict) -> dict:
+def parse_vatsim_data(data: VatsimDatafeed) -> dict:
     """
-    Parse raw VATSIM JSON data to extract relevant statistics.
+    Extract the statistics we store from a decoded VATSIM data feed.
 
     Returns:
         dict: {
@@ -88,9 +150,9 @@ def _parse_vatsim_data(data: dict) -> dict:
             "most_popular_arr": str
         }
     """
-    pilots = data.get("pilots", [])
-    controllers = data.get("controllers", [])
-    atis = data.get("atis", [])
+    pilots = data.pilots
+    controllers = data.controllers
+    atis = data.atis
 
     pilot_count = len(pilots)
     controller_count = len(controllers)
@@ -100,10 +162,10 @@ def _parse_vatsim_data(data: dict) -> dict:
     # Supervisors/Administrators typically rating >= 7
     supervisor_count = 0
     for ctrl in controllers:
-        if ctrl.get("rating", 0) >= 7:
+        if ctrl.rating >= 7:
             supervisor_count += 1
     for a in atis:
-        if a.get("rating", 0) >= 7:
+        if a.rating >= 7:
             supervisor_count += 1
 
     # Identify most popular aircraft/dep/arr among pilots
@@ -112,14 +174,10 @@ def _parse_vatsim_data(data: dict) -> dict:
     arr_counter = Counter()
 
     for pilot in pilots:
-        fp = pilot.get("flight_plan", {})
-        ac = fp.get("aircraft", "Unknown")
-        dep = fp.get("departure", "Unknown")
-        arr = fp.get("arrival", "Unknown")
-
-        ac_counter[ac] += 1
-        dep_counter[dep] += 1
-        arr_counter[arr] += 1
+        fp = pilot.flight_plan or _NO_FLIGHT_PLAN
+        ac_counter[fp.aircraft] += 1
+        dep_counter[fp.departure] += 1
+        arr_counter[fp.arrival] += 1
 
     most_popular_ac = ac_counter.most_common(1)[0][0] if ac_counter else "N/A"
     most_popular_dep = dep_counter.most_common(1)[0][0] if dep_counter else "N/A"
@@ -137,36 +195,33 @@ def _parse_vatsim_data(data: dict) -> dict:
     }
 
 
+def vatsim_stats_row(stats: dict):
+    """
+    Split parsed VATSIM statistics into InfluxDB ``(fields, tags)``.
+    """
+    fields = {
+        "total_clients": stats["total_clients"],
+        "pilot_count": stats["pilot_count"],
+        "controller_count": stats["controller_count"],
+        "atis_count": stats["atis_count"],
+        "supervisor_count": stats["supervisor_count"],
+    }
+    # Store these as tags if you want to query/filter on them
+    tags = {
+        "most_popular_ac": stats["most_popular_ac"],
+        "most_popular_dep": stats["most_popular_dep"],
+        "most_popular_arr": stats["most_popular_arr"],
+    }
+    return fields, tags
+
+
 def _store_to_influx(stats: dict, measurement: str):
     """
-    Write the parsed statistics to InfluxDB using the existing influx_client.
+    Write the parsed statistics to InfluxDB.
 
     Args:
         stats (dict): The dictionary of parsed VATSIM stats.
         measurement (str): The Influx measurement to store data in.
     """
-
-    # If your existing client is a global variable 'influx_client', just use it directly
-    # Otherwise, if you have get_influx_client() or something, call that instead.
-    # e.g. client = get_influx_client()
-
-    json_body = [
-        {
-            "measurement": measurement,
-            "fields": {
-                "total_clients": stats["total_clients"],
-                "pilot_count": stats["pilot_count"],
-                "controller_count": stats["controller_count"],
-                "atis_count": stats["atis_count"],
-                "supervisor_count": stats["supervisor_count"],
-            },
-            # Store these as tags if you want to query/filter on them
-            "tags": {
-                "most_popular_ac": stats["most_popular_ac"],
-                "most_popular_dep": stats["most_popular_dep"],
-                "most_popular_arr": stats["most_popular_arr"],
-            },
-        }
-    ]
-
-    influx_client.write_points(json_body)
\ No newline at end of file
+    fields, tags = vatsim_stats_row(stats)
+    write_measurement(measurement, fields, tags)
@@ -0,0 +1,257 @@
+"""
+Threshold alert rules, evaluated on every point as it is written.
+
+Rules come from ALERT_RULES_FILE, a JSON list of objects:
+
+    [
+      {"name": "enzv_wind", "measurement": "metar", "field": "wind_speed_kt",
+       "tags": {"station_id": "ENZV"}, "above": 25, "clear": 20, "for": 2},
+      {"name": "ifr", "measurement": "metar", "field": "flight_category", "in": ["IFR", "LIFR"]},
+      {"name": "no2_price_spike", "measurement": "energy_prices", "field": "price_per_kwh_ore",
+       "tags": {"region": "NO2"}, "above": 300, "clear": 250, "severity": "info"},
+      {"name": "humidity_high", "measurement": "netatmo", "field": "humidity_percent", "above": 60, "clear": 55}
+    ]
+
+Each rule has one condition:
+
+* ``above``: the value is greater than the threshold.
+* ``below``: the value is less than the threshold.
+* ``in``: the value is one of a list.
+
+The other keys:
+
+* ``tags``: the rule only sees points with these tag values.
+* ``clear``: hysteresis. A firing rule resolves only once the value is back past
+  ``clear``, not merely past the threshold.
+* ``for``: debounce. The rule fires after this many matching points in a row.
+* ``severity``: defaults to "warning".
+
+Rules are compiled once into closures, indexed by measurement. ``write_measurements``
+hands every point to ``AlertEngine.evaluate``, which costs a dict lookup plus the
+measurement's rules per point; Grafana no longer needs to re-query InfluxDB on a timer.
+
+State is kept per rule and series. A series is the point's tag set, so ``ifr`` fires
+and resolves per station. A point that is no newer than the last one seen for its
+series is skipped, so a report written again doesn't count twice. "Newer" goes by the
+observation time the writer passes along (METARs, Netatmo), since those points are
+stamped with the time they were fetched. Otherwise it goes by the point's timestamp
+(a re-written price curve keeps its timestamps). The state lives in memory, per process.
+
+Every firing/resolved event is:
+
+* written to the ``alerts`` measurement
+* appended as a JSON line to ALERT_FILE, if set
+* POSTed to ALERT_WEBHOOK_URL, if set, from a background thread so a slow receiver
+  doesn't hold up the fetch cycle
+"""
+
+import json
+import queue
+import threading
+from datetime import datetime, timezone
+
+import requests
+
+from src.utils.config import Config
+from src.utils.http import http_post
+from src.utils.logging_config import logger
+from src.utils.metrics import ALERT_EVENTS
+
+_CONDITIONS = ("above", "below", "in")
+
+
+class Rule:
+    def __init__(self, spec: dict):
+        self.name = spec["name"]
+        self.measurement = spec["measurement"]
+        self.field = spec["field"]
+        self.tags = tuple(sorted((spec.get("tags") or {}).items()))
+        self.severity = spec.get("severity", "warning")
+        self.debounce = max(1, int(spec.get("for", 1)))
+        self.matches, self.clears, self.threshold = _compile(spec)
+
+    def applies_to(self, tags: dict) -> bool:
+        return all(tags.get(key) == value for key, value in self.tags)
+
+
+def _compile(spec: dict):
+    """(trigger predicate, clear predicate, threshold) for a rule's condition."""
+    conditions = [c for c in _CONDITIONS if c in spec]
+    if len(conditions) != 1:
+        raise ValueError(f"alert rule {spec.get('name')!r} needs exactly one of {', '.join(_CONDITIONS)}")
+    condition = conditions[0]
+    if condition == "in":
+        values = frozenset(spec["in"])
+        cleared = frozenset(spec["clear"]) if "clear" in spec else None
+        matches = values.__contains__
+        clears = (lambda v: v in cleared) if cleared is not None else (lambda v: v not in values)
+        return matches, clears, "|".join(sorted(map(str, values)))
+
+    threshold = float(spec[condition])
+    clear = float(spec.get("clear", threshold))
+    if condition == "above":
+        return (lambda v: v > threshold), (lambda v: v <= clear), threshold
+    return (lambda v: v < threshold), (lambda v: v >= clear), threshold
+
+
+class _SeriesState:
+    __slots__ = ("firing", "streak", "last_time")
+
+    def __init__(self):
+        self.firing = False
+        self.streak = 0
+        self.last_time = None
+
+
+class AlertEngine:
+    def __init__(self, rules):
+        self.rules = {}  # measurement -> [Rule]
+        for rule in rules:
+            self.rules.setdefault(rule.measurement, []).append(rule)
+        self._state = {}  # (rule name, series tags) -> _SeriesState
+        self._lock = threading.Lock()
+
+    def evaluate(self, measurement: str, tags: dict, fields: dict, timestamp: int, observed: float = None):
+        """
+        Run the measurement's rules on one point; returns the events it raised.
+        ``observed`` is the source's observation time, when the point's timestamp is
+        the fetch time.
+        """
+        seen = timestamp if observed is None else observed
+        rules = self.rules.get(measurement)
+        if not rules:
+            return []
+        tags = tags or {}
+        events = []
+        for rule in rules:
+            value = fields.get(rule.field)
+            if value is None or not rule.applies_to(tags):
+                continue
+            key = (rule.name, tuple(sorted(tags.items())))
+            with self._lock:
+                state = self._state.get(key)
+                if state is None:
+                    state = self._state[key] = _SeriesState()
+                if state.last_time is not None and seen <= state.last_time:
+                    continue
+                state.last_time = seen
+                status = _step(rule, state, value)
+            if status is not None:
+                events.append(_event(rule, status, measurement, tags, value, timestamp))
+        return events
+
+
+def _step(rule: Rule, state: _SeriesState, value):
+    """Advance a series' state by one value; returns "firing", "resolved" or None."""
+    try:
+        matched = rule.matches(value)
+        cleared = rule.clears(value)
+    except TypeError:
+        # A value of the wrong kind for the rule (text compared to a number)
+        return None
+    if state.firing:
+        if cleared:
+            state.firing = False
+            state.streak = 0
+            return "resolved"
+        return None
+    state.streak = state.streak + 1 if matched else 0
+    if state.streak >= rule.debounce:
+        state.firing = True
+        return "firing"
+    return None
+
+
+def _event(rule, status, measurement, tags, value, timestamp):
+    return {
+        "rule": rule.name,
+        "status": status,
+        "severity": rule.severity,
+        "measurement": measurement,
+        "field": rule.field,
+        "value": value,
+        "threshold": rule.threshold,
+        "tags": dict(tags),
+        "time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z"),
+        "timestamp": timestamp,
+    }
+
+
+def alert_rows(events):
+    """``alerts`` measurement rows for events, for ``write_measurements``."""
+    rows = []
+    for event in events:
+        value = event["value"]
+        fields = {
+            "firing": event["status"] == "firing",
+            "message": f"{event['rule']} {event['status']}: {event['field']}={value} (threshold {event['threshold']})",
+        }
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            fields["value"] = value
+        tags = {**event["tags"], "rule": event["rule"], "severity": event["severity"], "source": event["measurement"]}
+        rows.append((fields, tags, event["timestamp"]))
+    return rows
+
+
+class _Webhook:
+    """POSTs events to ALERT_WEBHOOK_URL from one daemon thread, dropping them if it falls behind."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._queue = queue.Queue(maxsize=1000)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def send(self, event: dict):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="alert-webhook", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning(f"[alerts] Webhook queue full, dropping {event['rule']} {event['status']}")
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                http_post("alerts", self.url, json=event).raise_for_status()
+            except requests.RequestException as e:
+                logger.error(f"[alerts] Webhook delivery of {event['rule']} {event['status']} failed: {e}")
+
+
+def dispatch(events):
+    """Send events to the file and webhook sinks. Never raises."""
+    for event in events:
+        ALERT_EVENTS.labels(event["rule"], event["status"]).inc()
+        logger.info(f"[alerts] {event['rule']} {event['status']}: {event['measurement']}.{event['field']}="
+                    f"{event['value']} {event['tags']}")
+    if Config.ALERT_FILE:
+        try:
+            with open(Config.ALERT_FILE, "a") as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+        except OSError as e:
+            logger.error(f"[alerts] Failed to append to {Config.ALERT_FILE}: {e}")
+    if _webhook is not None:
+        for event in events:
+            _webhook.send(event)
+
+
+def load_rules(path: str):
+    """Compile the rules in ``path``; a missing or invalid file means no rules."""
+    if not path:
+        return []
+    try:
+        with open(path) as f:
+            rules = [Rule(spec) for spec in json.load(f)]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.error(f"[alerts] No alert rules loaded from {path}: {e}")
+        return []
+    logger.info(f"[alerts] Loaded {len(rules)} alert rules from {path}")
+    return rules
+
+
+ALERTS = AlertEngine(load_rules(Config.ALERT_RULES_FILE))
+_webhook = _Webhook(Config.ALERT_WEBHOOK_URL) if Config.ALERT_WEBHOOK_URL else None
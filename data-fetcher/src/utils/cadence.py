@@ -0,0 +1,180 @@
+"""
+Adaptive polling cadence.
+
+With ADAPTIVE_POLLING on, the 5-minute loop ticks every CADENCE_TICK seconds and each
+job decides whether it is due:
+
+* METAR stations are polled according to their learned issuance pattern. Routine
+  reports come out at the same minutes every hour (e.g. :20 and :50), so each new
+  ``observation_time`` is added to a per-station history. Minutes seen at least twice
+  count as issuance minutes. After a new report the station is not polled again until
+  CADENCE_ISSUE_LAG seconds past its next issuance minute. If the expected report has not
+  shown up yet, the station is re-polled each tick with an exponential backoff. No station goes
+  longer than CADENCE_MAX_INTERVAL unpolled, so SPECIs and pattern changes are still
+  picked up.
+* Other jobs run every FETCH_INTERVAL unless the job reschedules itself, as the yr.no
+  forecast does from its ``Expires`` header.
+* The VATSIM data feed is polled from the 30-second loop, which ticks every VATSIM_TICK.
+  After each fetch the next poll is set from the feed's ``update_timestamp``: just after
+  the first snapshot at least VATSIM_TRAFFIC_INTERVAL newer than the one stored.
+
+State is kept per process. After partitions move between workers, the new owner
+polls everything it has no history for until it has learned the pattern again.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import CADENCE_DECISIONS, METAR_INGEST_LAG
+
+
+def observation_epoch(metar, now: datetime = None):
+    """
+    Observation time of a METAR dict as epoch seconds: from ``observation_time`` when
+    the provider gives one, else from the raw report's DDHHMMZ group. None if unknown.
+    """
+    observed = metar.get("observation_time")
+    if observed:
+        text = str(observed).replace("T", " ").rstrip("Z")[:19]
+        try:
+            return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            pass
+    parts = (metar.get("wx_string") or "").split()
+    group = next((p for p in parts[1:3] if len(p) == 7 and p.endswith("Z") and p[:6].isdigit()), None)
+    if group is None:
+        return None
+    now = datetime.now(timezone.utc) if now is None else now
+    day, hour, minute = int(group[:2]), int(group[2:4]), int(group[4:6])
+    # This month, or last month for a day still to come (or missing) in this one: on the
+    # 1st, a report from the 31st is from the end of last month
+    last_month = now.replace(day=1) - timedelta(days=1)
+    for month in (now, last_month):
+        try:
+            when = month.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
+        except ValueError:
+            continue
+        if when <= now + timedelta(hours=1):
+            return when.timestamp()
+    return None
+
+
+class Cadence:
+    """Next-due times for named jobs."""
+
+    def __init__(self):
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def due(self, key: str, now: float = None, tick: float = None) -> bool:
+        # Half a tick of slack so a job scheduled a few seconds past the next tick still
+        # runs on it rather than one tick later
+        now = time.time() if now is None else now
+        tick = Config.CADENCE_TICK if tick is None else tick
+        return self._next.get(key, 0.0) <= now + tick / 2
+
+    def schedule(self, key: str, when: float):
+        with self._lock:
+            self._next[key] = when
+
+
+class _StationState:
+    __slots__ = ("minutes", "last_obs", "next_poll", "retry")
+
+    def __init__(self):
+        self.minutes = deque(maxlen=Config.CADENCE_HISTORY)
+        self.last_obs = None
+        self.next_poll = 0.0
+        self.retry = Config.CADENCE_TICK
+
+
+class IssuanceTracker:
+    """Learns each station's METAR issuance minutes and decides when to poll it."""
+
+    def __init__(self):
+        self._stations = {}
+        self._lock = threading.Lock()
+
+    def _state(self, icao):
+        state = self._stations.get(icao)
+        if state is None:
+            with self._lock:
+                state = self._stations.setdefault(icao, _StationState())
+        return state
+
+    def due_stations(self, stations, now: float = None):
+        """The subset of ``stations`` that should be polled now."""
+        now = time.time() if now is None else now
+        horizon = now + Config.CADENCE_TICK / 2
+        due = [icao for icao in stations if self._state(icao).next_poll <= horizon]
+        CADENCE_DECISIONS.labels("metar", "poll").inc(len(due))
+        CADENCE_DECISIONS.labels("metar", "skip").inc(len(stations) - len(due))
+        return due
+
+    @staticmethod
+    def _next_issue(state, after: float):
+        counts = Counter(state.minutes)
+        minutes = sorted(m for m, c in counts.items() if c >= 2)
+        if not minutes:
+            return None
+        hour_start = after - after % 3600
+        for offset in (0, 3600):
+            for minute in minutes:
+                issue = hour_start + offset + minute * 60
+                if issue > after:
+                    return issue
+        return None
+
+    def next_issue(self, icao: str, after: float = None):
+        """Expected time of the station's next routine report, or None if not learned yet."""
+        return self._next_issue(self._state(icao), time.time() if after is None else after)
+
+    def observe(self, polled, metars, now: float = None):
+        """
+        Update the schedule of every station in ``polled`` from the METARs the poll
+        returned (a dict keyed by station id; missing stations count as no news).
+        """
+        now = time.time() if now is None else now
+        for icao in polled:
+            state = self._state(icao)
+            metar = metars.get(icao)
+            observed = observation_epoch(metar) if metar else None
+            if observed is not None and (state.last_obs is None or observed > state.last_obs):
+                METAR_INGEST_LAG.observe(max(now - observed, 0.0))
+                state.minutes.append(int(observed % 3600 // 60))
+                state.last_obs = observed
+                state.retry = Config.CADENCE_TICK
+                issue = self._next_issue(state, observed)
+                state.next_poll = issue + Config.CADENCE_ISSUE_LAG if issue else now + Config.FETCH_INTERVAL
+            else:
+                # The expected report isn't out yet: poll again soon, backing off
+                state.next_poll = now + state.retry
+                state.retry = min(state.retry * 2, Config.CADENCE_MAX_INTERVAL)
+            state.next_poll = min(state.next_poll, now + Config.CADENCE_MAX_INTERVAL)
+        logger.debug(f"[cadence] Updated schedule for {len(polled)} stations")
+
+
+# Shared per-process schedules
+JOB_CADENCE = Cadence()
+METAR_CADENCE = IssuanceTracker()
+
+
+def run_if_due(key: str, job, interval: float = None, tick: float = None):
+    """
+    Run ``job`` if ``key`` is due, scheduling it ``interval`` (FETCH_INTERVAL by
+    default) ahead first; the job may reschedule itself (e.g. from an Expires header)
+    while it runs. ``tick`` is how often the calling loop checks (CADENCE_TICK by
+    default).
+    """
+    if Config.ADAPTIVE_POLLING:
+        now = time.time()
+        if not JOB_CADENCE.due(key, now, tick):
+            CADENCE_DECISIONS.labels(key, "skip").inc()
+            return
+        CADENCE_DECISIONS.labels(key, "poll").inc()
+        JOB_CADENCE.schedule(key, now + (Config.FETCH_INTERVAL if interval is None else interval))
+    job()
@@ -0,0 +1,143 @@
+"""
+Per-provider circuit breakers.
+
+A breaker starts closed. BREAKER_FAILURE_THRESHOLD consecutive failures (connection
+errors, timeouts, 5xx) open it for BREAKER_RESET_SECONDS. A 429, or a 503 with a
+``Retry-After`` header, opens it straight away until the upstream says to come back.
+While open, calls fail instantly with ``CircuitOpenError``. Once the wait is over the
+breaker goes half-open and lets a single probe through: success closes it, failure
+re-opens it with the wait doubled (capped at BREAKER_MAX_RESET_SECONDS).
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import BREAKER_STATE
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling a provider whose breaker is open."""
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str, failure_threshold: int = None, reset_seconds: float = None):
+        self.provider = provider
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or Config.BREAKER_RESET_SECONDS
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self._backoff = self.reset_seconds
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.info(f"[breaker] {self.provider}: {self.state} -> {state}")
+            self.state = state
+            BREAKER_STATE.labels(self.provider).set(_STATE_VALUES[state])
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open and not yet due for a probe)."""
+        return self.state == OPEN and time.monotonic() < self.open_until
+
+    def allow(self) -> bool:
+        """
+        True if a call would go through now: closed, or due for a probe that nobody has
+        taken yet. Unlike ``before_call`` it doesn't take the probe.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() < self.open_until:
+                return False
+            return not self._probing
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            wait = max(self.open_until - time.monotonic(), 0.0)
+        raise CircuitOpenError(f"{self.provider} circuit is open, retrying in {wait:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self._probing = False
+            self.failures = 0
+            self._backoff = self.reset_seconds
+            self._set_state(CLOSED)
+
+    def record_failure(self, retry_after: float = None):
+        """
+        Count a failure. ``retry_after`` (from a 429/503) opens the breaker at once for at
+        least that long.
+        """
+        with self._lock:
+            self._probing = False
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self._backoff = min(self._backoff * 2, Config.BREAKER_MAX_RESET_SECONDS)
+            elif retry_after is None and self.failures < self.failure_threshold:
+                return
+            wait = self._backoff
+            if retry_after is not None:
+                wait = min(max(retry_after, 1.0), Config.BREAKER_MAX_RESET_SECONDS)
+            self.open_until = time.monotonic() + wait
+            if self.state != OPEN:
+                logger.warning(f"[breaker] {self.provider}: opening for {wait:.0f}s after {self.failures} failures")
+            self._set_state(OPEN)
+
+    def record_response(self, response):
+        """Classify an HTTP response: 429 and 5xx are failures, anything else a success."""
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if response.status_code == 429 and retry_after is None:
+                retry_after = self._backoff
+            self.record_failure(retry_after)
+        else:
+            self.record_success()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider))
+    return breaker
@@ -0,0 +1,234 @@
+"""
+Work partitioning across fetcher worker processes, on one host or several.
+
+Every cycle is a wall-clock slot (``time // interval``) holding a set of named jobs
+(``metar:3``, ``forecast:Home``, ``netatmo``, ...). Workers share COORDINATION_DIR (a
+local directory, or a shared volume for several hosts) and coordinate through it:
+
+* Membership: each worker touches ``members/<worker id>`` every HEARTBEAT_INTERVAL.
+  Members whose heartbeat is older than LEASE_TTL are considered dead and pruned.
+* Ownership: jobs are assigned to live members by a consistent-hash ring, so a worker
+  joining or leaving only moves the jobs it owned.
+* Claims: before running a job a worker creates ``claims/<loop>/<slot>/<job>`` with
+  O_EXCL, so two workers with briefly different membership views can never both run it.
+  A ``.done`` marker is written when the job finishes.
+* Takeover: from part-way through the slot until its end, every worker sweeps the
+  slot's jobs every HEARTBEAT_INTERVAL. Unclaimed jobs, and jobs claimed by a worker
+  that has since died without finishing, are claimed (again with O_EXCL, as
+  ``<job>.retry<n>``) and run, so a dead owner's work is not skipped. A claimant only
+  counts as dead once its heartbeat is LEASE_TTL old, hence the repeated sweeps; and a
+  worker that dies while running a taken-over job is itself taken over.
+
+Slots are derived from wall-clock time, so hosts sharing a directory need synced clocks.
+Without COORDINATION_DIR the fetcher uses ``LocalCoordinator``, which owns every job.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import CLUSTER_MEMBERS
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with ``replicas`` virtual nodes per member."""
+
+    def __init__(self, members, replicas: int = 64):
+        self.members = tuple(sorted(members))
+        points = sorted((_hash(f"{member}#{i}"), member) for member in self.members for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class LocalCoordinator:
+    """Single-worker coordinator: owns and runs every job."""
+
+    clustered = False
+    worker_id = "local"
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def refresh(self):
+        return [self.worker_id]
+
+    def owns(self, key: str) -> bool:
+        return True
+
+    def claim(self, loop: str, slot: int, key: str) -> bool:
+        return True
+
+    def complete(self, loop: str, slot: int, key: str):
+        pass
+
+    def orphaned(self, loop: str, slot: int, keys):
+        return []
+
+    def prune(self, loop: str, slot: int):
+        pass
+
+
+class FileCoordinator:
+    """Membership, ownership and per-slot job claims kept in a shared directory."""
+
+    clustered = True
+
+    def __init__(self, root: str, worker_id: str = None):
+        self.root = root
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.members_dir = os.path.join(root, "members")
+        self.claims_dir = os.path.join(root, "claims")
+        self._ring = HashRing([self.worker_id])
+        self._stop = threading.Event()
+
+    def start(self):
+        os.makedirs(self.members_dir, exist_ok=True)
+        os.makedirs(self.claims_dir, exist_ok=True)
+        self.heartbeat()
+        threading.Thread(target=self._heartbeat_loop, name="cluster-heartbeat", daemon=True).start()
+        logger.info(f"[cluster] Worker {self.worker_id} joined {self.root}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        try:
+            os.remove(os.path.join(self.members_dir, self.worker_id))
+        except FileNotFoundError:
+            pass
+
+    def heartbeat(self):
+        path = os.path.join(self.members_dir, self.worker_id)
+        with open(path, "w") as f:
+            json.dump({"host": socket.gethostname(), "pid": os.getpid(), "heartbeat": time.time()}, f)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(Config.HEARTBEAT_INTERVAL):
+            try:
+                self.heartbeat()
+            except OSError as e:
+                logger.error(f"[cluster] Heartbeat failed: {e}")
+
+    def members(self):
+        """Live members, pruning heartbeat files older than LEASE_TTL."""
+        now = time.time()
+        alive = []
+        for name in os.listdir(self.members_dir):
+            path = os.path.join(self.members_dir, name)
+            try:
+                age = now - os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if age <= Config.LEASE_TTL:
+                alive.append(name)
+            elif name != self.worker_id:
+                logger.warning(f"[cluster] Worker {name} missed its heartbeat for {age:.0f}s, removing it")
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if self.worker_id not in alive:
+            alive.append(self.worker_id)
+        return alive
+
+    def refresh(self):
+        """Rebuild the hash ring from the current membership. Called once per cycle."""
+        members = self.members()
+        if tuple(sorted(members)) != self._ring.members:
+            logger.info(f"[cluster] Membership changed: {sorted(members)}")
+            self._ring = HashRing(members)
+        CLUSTER_MEMBERS.set(len(members))
+        return members
+
+    def owns(self, key: str) -> bool:
+        return self._ring.owner(key) == self.worker_id
+
+    def _claim_path(self, loop: str, slot: int, key: str) -> str:
+        return os.path.join(self.claims_dir, loop, str(slot), key.replace(os.sep, "_"))
+
+    def _create(self, path: str) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(self.worker_id)
+        return True
+
+    def claim(self, loop: str, slot: int, key: str) -> bool:
+        path = self._claim_path(loop, slot, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return self._create(path)
+
+    def complete(self, loop: str, slot: int, key: str):
+        self._create(self._claim_path(loop, slot, key) + ".done")
+
+    def orphaned(self, loop: str, slot: int, keys):
+        """
+        Claim and return the slot's jobs that nobody claimed, or whose claimant died
+        before finishing them.
+        """
+        alive = set(self.members())
+        taken = []
+        for key in keys:
+            path = self._claim_path(loop, slot, key)
+            if self.claim(loop, slot, key):
+                taken.append(key)
+                continue
+            if os.path.exists(path + ".done"):
+                continue
+            # The latest claim is the original or the newest takeover of it
+            attempt = 1
+            while os.path.exists(f"{path}.retry{attempt}"):
+                attempt += 1
+            latest = f"{path}.retry{attempt - 1}" if attempt > 1 else path
+            try:
+                with open(latest) as f:
+                    claimant = f.read().strip()
+            except FileNotFoundError:
+                continue
+            # A half-written claim reads as empty; treat it as still in progress
+            if claimant and claimant not in alive and self._create(f"{path}.retry{attempt}"):
+                logger.warning(f"[cluster] Taking over {key} from dead worker {claimant}")
+                taken.append(key)
+        return taken
+
+    def prune(self, loop: str, slot: int):
+        """Drop claim directories more than two slots old."""
+        loop_dir = os.path.join(self.claims_dir, loop)
+        try:
+            names = os.listdir(loop_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.isdigit() and int(name) < slot - 2:
+                shutil.rmtree(os.path.join(loop_dir, name), ignore_errors=True)
+
+
+def get_coordinator(worker_index: int = None):
+    """FileCoordinator on COORDINATION_DIR when set, else a LocalCoordinator."""
+    if not Config.COORDINATION_DIR:
+        return LocalCoordinator()
+    worker_id = None
+    if worker_index is not None:
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-w{worker_index}"
+    return FileCoordinator(Config.COORDINATION_DIR, worker_id)
@@ -2,9 +2,119 @@ import os
 
 class Config:
     INFLUX_HOST = os.getenv("INFLUX_HOST", "influxdb")
+    INFLUX_URL = os.getenv("INFLUX_URL", f"http://{INFLUX_HOST}:8086")
     INFLUX_BUCKET = os.getenv("INFLUX_BUCKET", "weather")
     INFLUX_TOKEN = os.getenv("INFLUX_TOKEN", "your_influx_token")
     INFLUX_ORG = os.getenv("INFLUX_ORG", "myorg")
     FAA_API_KEY = os.getenv("FAA_API_KEY", "")
+    CHECKWX_API_KEY = os.getenv("CHECKWX_API_KEY", "")
     VATSIM_MAX_RETRIES = int(os.getenv("VATSIM_MAX_RETRIES", 5))
-    VATSIM_INITIAL_BACKOFF = int(os.getenv("VATSIM_INITIAL_BACKOFF", 5))
\ No newline at end of file
+    VATSIM_INITIAL_BACKOFF = int(os.getenv("VATSIM_INITIAL_BACKOFF", 5))
+    # Upper bound on time spent retrying the VATSIM data feed within one cycle
+    VATSIM_RETRY_BUDGET = float(os.getenv("VATSIM_RETRY_BUDGET", 10))
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 9102))
+
+    # Providers to run (see src/providers/registry.py); only these are ever imported
+    ENABLED_PROVIDERS = os.getenv("ENABLED_PROVIDERS", "faa,checkwx,vatsim,yrno,netatmo,energy,vatsim_traffic")
+
+    # yr.no
+    YR_LATITUDE = os.getenv("YR_LATITUDE", "58.9959")
+    YR_LONGITUDE = os.getenv("YR_LONGITUDE", "5.6799")
+    YR_USER_AGENT = os.getenv("YR_USER_AGENT", "MyWeatherApp/1.0 https://github.com/kmoberg")
+
+    # Netatmo (tokens from env seed the token file on first run)
+    NETATMO_CLIENT_ID = os.getenv("NETATMO_CLIENT_ID")
+    NETATMO_CLIENT_SECRET = os.getenv("NETATMO_CLIENT_SECRET")
+    NETATMO_USERNAME = os.getenv("NETATMO_USERNAME")
+    NETATMO_PASSWORD = os.getenv("NETATMO_PASSWORD")
+    NETATMO_ACCESS_TOKEN = os.getenv("NETATMO_ACCESS_TOKEN", "")
+    NETATMO_REFRESH_TOKEN = os.getenv("NETATMO_REFRESH_TOKEN", "")
+    NETATMO_TOKEN_FILE = os.getenv("NETATMO_TOKEN_FILE", "/app/tokens/netatmo_tokens.json")
+
+    # Upstream base URLs, overridable to point the fetcher at local stand-ins
+    FAA_API_URL = os.getenv("FAA_API_URL", "https://aviationweather.gov/api/data/metar")
+    CHECKWX_API_URL = os.getenv("CHECKWX_API_URL", "https://api.checkwx.com")
+    VATSIM_METAR_URL = os.getenv("VATSIM_METAR_URL", "https://metar.vatsim.net/metar.php")
+    VATSIM_URL = os.getenv("VATSIM_URL", "https://data.vatsim.net/v3/vatsim-data.json")
+    YRNO_API_URL = os.getenv("YRNO_API_URL", "https://api.met.no/weatherapi/locationforecast/2.0/compact")
+    NETATMO_API_URL = os.getenv("NETATMO_API_URL", "https://api.netatmo.com")
+    ENERGY_API_URL = os.getenv("ENERGY_API_URL", "https://www.hvakosterstrommen.no/api/v1/prices")
+
+    # METAR stations: a file with one ICAO id per line wins over the comma-separated list
+    METAR_STATIONS = os.getenv("METAR_STATIONS", "ENZV,KJFK,ENGM,KLAX")
+    METAR_STATIONS_FILE = os.getenv("METAR_STATIONS_FILE", "")
+    FAA_BATCH_SIZE = int(os.getenv("FAA_BATCH_SIZE", 200))
+    CHECKWX_BATCH_SIZE = int(os.getenv("CHECKWX_BATCH_SIZE", 20))
+    # A METAR observed longer ago than this is re-requested from the next provider
+    METAR_STALE_AFTER = float(os.getenv("METAR_STALE_AFTER", 5400))
+    MAX_STATION_QUERY_CHARS = int(os.getenv("MAX_STATION_QUERY_CHARS", 1500))
+    FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", 8))
+    WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", 5000))
+
+    # Bulk historical import (python -m src.importer); 0 workers means one per CPU
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", 0))
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 50000))
+    IMPORT_CHUNK_BYTES = int(os.getenv("IMPORT_CHUNK_BYTES", 64 * 1024 * 1024))
+    IMPORT_CHECKPOINT = os.getenv("IMPORT_CHECKPOINT", "import-checkpoint.json")
+
+    # Forecast locations as name:lat:lon, comma-separated
+    FORECAST_LOCATIONS = os.getenv("FORECAST_LOCATIONS", "Home:59.9112:10.7579")
+
+    # Forecast verification: forecast locations verified against a nearby METAR station
+    # (location=ICAO, comma-separated) and the location the Netatmo station is at
+    VERIFY_SITES = os.getenv("VERIFY_SITES", "Home=ENGM")
+    VERIFY_NETATMO_LOCATION = os.getenv("VERIFY_NETATMO_LOCATION", "Home")
+    # Lead-time bucket edges in hours; forecasts further ahead than VERIFY_MAX_LEAD_HOURS are not kept
+    VERIFY_LEAD_BUCKETS = os.getenv("VERIFY_LEAD_BUCKETS", "3,6,12,24,48")
+    VERIFY_MAX_LEAD_HOURS = float(os.getenv("VERIFY_MAX_LEAD_HOURS", 72))
+    # An observation verifies the forecast for the nearest hour if it is this close to it
+    VERIFY_MATCH_MINUTES = float(os.getenv("VERIFY_MATCH_MINUTES", 30))
+    VERIFY_STATE_FILE = os.getenv("VERIFY_STATE_FILE", "verification-state.json")
+
+    # Alert rules evaluated on ingest (see utils/alerts.py); events also go to the
+    # ``alerts`` measurement
+    ALERT_RULES_FILE = os.getenv("ALERT_RULES_FILE", "")
+    ALERT_FILE = os.getenv("ALERT_FILE", "")
+    ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+
+    # Worker processes and partitioning. With COORDINATION_DIR set, every worker sharing
+    # the directory (on this host or others) splits the jobs by consistent hashing.
+    FETCHER_PROCESSES = int(os.getenv("FETCHER_PROCESSES", 1))
+    COORDINATION_DIR = os.getenv("COORDINATION_DIR", "")
+    HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", 5))
+    LEASE_TTL = float(os.getenv("LEASE_TTL", 20))
+    # Fraction of the interval after which workers start sweeping for unclaimed jobs
+    TAKEOVER_DELAY = float(os.getenv("TAKEOVER_DELAY", 0.5))
+    METAR_SHARDS = int(os.getenv("METAR_SHARDS", 16))
+
+    # Upstream HTTP timeout and per-provider circuit breakers
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 60))
+    BREAKER_MAX_RESET_SECONDS = float(os.getenv("BREAKER_MAX_RESET_SECONDS", 900))
+
+    # Loop intervals in seconds
+    FETCH_INTERVAL = int(os.getenv("FETCH_INTERVAL", 300))
+    VATSIM_TRAFFIC_INTERVAL = int(os.getenv("VATSIM_TRAFFIC_INTERVAL", 30))
+    # With adaptive polling the 30-second loop ticks every VATSIM_TICK and the data feed
+    # is fetched VATSIM_POLL_LAG seconds after the snapshot due next, going by the feed's
+    # update_timestamp and its regeneration interval (VATSIM_REFRESH_INTERVAL)
+    VATSIM_TICK = int(os.getenv("VATSIM_TICK", 5))
+    VATSIM_REFRESH_INTERVAL = float(os.getenv("VATSIM_REFRESH_INTERVAL", 15))
+    VATSIM_POLL_LAG = float(os.getenv("VATSIM_POLL_LAG", 2))
+
+    # Adaptive polling: the 5-minute loop ticks every CADENCE_TICK and polls each METAR
+    # station just after its learned issuance minutes (ADAPTIVE_POLLING=0 polls
+    # everything every FETCH_INTERVAL)
+    ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "1") not in ("0", "false", "False", "")
+    CADENCE_TICK = int(os.getenv("CADENCE_TICK", 60))
+    CADENCE_ISSUE_LAG = float(os.getenv("CADENCE_ISSUE_LAG", 120))
+    CADENCE_MAX_INTERVAL = float(os.getenv("CADENCE_MAX_INTERVAL", 1800))
+    CADENCE_HISTORY = int(os.getenv("CADENCE_HISTORY", 24))
+
+    # Tracing and on-demand profiling (TRACE_SAMPLE_RATE=0 disables tracing)
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+    TRACE_FILE = os.getenv("TRACE_FILE", "")
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+    PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", 30))
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.01))
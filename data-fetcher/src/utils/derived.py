@@ -0,0 +1,108 @@
+"""
+Derived METAR fields, computed once per cycle at ingest.
+
+Clients and dashboards used to work these out on every query. Instead they are computed
+in one vectorized NumPy pass over the cycle's whole station batch and written as extra
+fields alongside the reported values:
+
+* ``flight_category``: VFR / MVFR / IFR / LIFR from ceiling and visibility (FAA limits)
+* ``ceiling_ft``: lowest broken/overcast layer or vertical visibility, from the raw report
+* ``relative_humidity_percent``: from temperature and dewpoint (Magnus formula)
+* ``dewpoint_spread_c``: temperature minus dewpoint
+* ``wind_u_kt`` / ``wind_v_kt``: eastward / northward wind components
+* ``density_altitude_ft``: from field elevation, altimeter setting and temperature
+
+A field is left out when its inputs are missing (no dewpoint, variable wind, a provider
+without station elevation, ...), since InfluxDB can't store NaN.
+"""
+
+import math
+import re
+
+# Cloud groups that form a ceiling: broken, overcast, or vertical visibility (hundreds of
+# feet), with an optional cloud type (CB, TCU, or /// when an automatic station can't tell)
+_CEILING_GROUP = re.compile(r"\b(?:BKN|OVC|VV)(\d{3})(?:CB|TCU|///)?\b")
+
+FLIGHT_CATEGORIES = ("LIFR", "IFR", "MVFR", "VFR")
+
+M_TO_FT = 3.28084
+STANDARD_ALTIMETER_IN_HG = 29.92
+
+
+def ceiling_ft(raw: str) -> float:
+    """Height of the lowest ceiling layer in a raw METAR, or inf if there is none."""
+    heights = [int(h) * 100 for h in _CEILING_GROUP.findall(raw or "")]
+    return float(min(heights)) if heights else math.inf
+
+
+def derive_metar_fields(metars) -> list[dict]:
+    """
+    Derived fields for a list of METAR dicts, returned as one dict per METAR in the
+    same order.
+    """
+    if not metars:
+        return []
+    # NumPy is only needed once METARs are being written, so keep it off the import path
+    import numpy as np
+
+    def column(key):
+        return np.array([m.get(key) for m in metars], dtype=float)
+
+    temp = column("temp_c")
+    dewpoint = column("dewpoint_c")
+    wind_dir = column("wind_dir_deg")
+    wind_speed = column("wind_speed_kt")
+    altimeter = column("altim_in_hg")
+    visibility = column("visibility_statute_mi")
+    elevation_ft = column("elevation_m") * M_TO_FT
+    ceiling = np.array([ceiling_ft(m.get("wx_string")) for m in metars], dtype=float)
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        # FAA categories: the worse of the ceiling and visibility conditions wins. Missing
+        # visibility counts as unrestricted so the ceiling alone decides.
+        vis = np.where(np.isnan(visibility), np.inf, visibility)
+        category = np.select(
+            [(ceiling < 500) | (vis < 1), (ceiling < 1000) | (vis < 3), (ceiling <= 3000) | (vis <= 5)],
+            [0, 1, 2],
+            default=3,
+        )
+        known = ~(np.isnan(visibility) & np.isinf(ceiling))
+
+        # Magnus formula: RH is the ratio of saturation vapour pressures at Td and T
+        humidity = np.clip(100.0 * np.exp(17.625 * dewpoint / (243.04 + dewpoint)
+                                          - 17.625 * temp / (243.04 + temp)), 0.0, 100.0)
+        spread = temp - dewpoint
+
+        # Meteorological direction is where the wind blows from
+        radians = np.radians(wind_dir)
+        wind_u = -wind_speed * np.sin(radians)
+        wind_v = -wind_speed * np.cos(radians)
+
+        pressure_altitude = elevation_ft + (STANDARD_ALTIMETER_IN_HG - altimeter) * 1000.0
+        isa_temp = 15.0 - 2.0 * pressure_altitude / 1000.0
+        density_altitude = pressure_altitude + 120.0 * (temp - isa_temp)
+
+    numeric = {
+        "ceiling_ft": ceiling,
+        "relative_humidity_percent": np.round(humidity, 1),
+        "dewpoint_spread_c": np.round(spread, 1),
+        "wind_u_kt": np.round(wind_u, 1),
+        "wind_v_kt": np.round(wind_v, 1),
+        "density_altitude_ft": np.round(density_altitude),
+    }
+    # One pass back to Python floats, then per-row dicts without the missing values
+    columns = {name: values.tolist() for name, values in numeric.items()}
+    categories = category.tolist()
+    known = known.tolist()
+
+    derived = []
+    for i in range(len(metars)):
+        fields = {}
+        if known[i]:
+            fields["flight_category"] = FLIGHT_CATEGORIES[categories[i]]
+        for name, values in columns.items():
+            value = values[i]
+            if math.isfinite(value):
+                fields[name] = value
+        derived.append(fields)
+    return derived
@@ -0,0 +1,52 @@
+import requests
+import time
+from src.utils.circuit_breaker import CircuitOpenError, get_breaker
+from src.utils.config import Config
+from src.utils.metrics import FETCH_ERRORS, FETCH_SECONDS, RESPONSE_BYTES
+from src.utils.tracing import span
+
+
+def _request(method, provider, url, **kwargs):
+    breaker = get_breaker(provider)
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        FETCH_ERRORS.labels(provider, "circuit_open").inc()
+        raise
+
+    kwargs.setdefault("timeout", Config.HTTP_TIMEOUT)
+    start = time.perf_counter()
+    try:
+        with span(f"fetch.{provider}"):
+            response = requests.request(method, url, **kwargs)
+    except requests.RequestException:
+        FETCH_ERRORS.labels(provider, "fetch").inc()
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Don't leave a half-open breaker waiting on a probe that never reports back
+        breaker.record_failure()
+        raise
+    finally:
+        FETCH_SECONDS.labels(provider).observe(time.perf_counter() - start)
+
+    breaker.record_response(response)
+
+    RESPONSE_BYTES.labels(provider).inc(len(response.content))
+    if response.status_code >= 400:
+        FETCH_ERRORS.labels(provider, "http").inc()
+    return response
+
+
+def http_get(provider, url, **kwargs):
+    """
+    requests.get wrapper that records latency, response size and errors for ``provider``
+    and goes through its circuit breaker: raises CircuitOpenError (a RequestException)
+    without calling out while the provider's breaker is open. Callers still handle the
+    response (raise_for_status etc.) as before.
+    """
+    return _request("GET", provider, url, **kwargs)
+
+
+def http_post(provider, url, **kwargs):
+    return _request("POST", provider, url, **kwargs)
@@ -0,0 +1,64 @@
+"""
+The data-fetcher's metrics, and ``start_metrics_server`` to expose them over HTTP. The
+registry itself is in ``prometheus.py``.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.prometheus import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood stderr
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Serve /metrics from a daemon thread. Returns the server, or None if disabled (port 0)."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Service metrics
+FETCH_SECONDS = Histogram("fetcher_fetch_duration_seconds", "Upstream HTTP request latency", ("provider",))
+RESPONSE_BYTES = Counter("fetcher_response_bytes_total", "Bytes received from upstream providers", ("provider",))
+PARSE_SECONDS = Histogram(
+    "fetcher_parse_duration_seconds", "Time spent decoding provider payloads", ("provider",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+FETCH_ERRORS = Counter("fetcher_errors_total", "Provider errors by stage", ("provider", "stage"))
+POINTS_WRITTEN = Counter("fetcher_points_written_total", "Points written to InfluxDB", ("measurement",))
+WRITE_SECONDS = Histogram("fetcher_write_duration_seconds", "Blocking InfluxDB write latency", ("measurement",))
+CYCLE_SECONDS = Histogram(
+    "fetcher_cycle_duration_seconds", "Duration of each fetch loop cycle", ("loop",),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+CYCLE_OVERRUNS = Counter("fetcher_cycle_overruns_total", "Cycles that took longer than their interval", ("loop",))
+JOBS_RUN = Counter("fetcher_jobs_total", "Jobs run by this worker, by how it got them", ("loop", "kind"))
+CLUSTER_MEMBERS = Gauge("fetcher_cluster_members", "Live fetcher workers seen by this worker")
+BREAKER_STATE = Gauge("fetcher_circuit_state", "Provider circuit breaker state (0 closed, 1 half-open, 2 open)",
+                      ("provider",))
+CADENCE_DECISIONS = Counter("fetcher_cadence_total", "Adaptive polling decisions per job", ("job", "decision"))
+METAR_INGEST_LAG = Histogram(
+    "fetcher_metar_ingest_lag_seconds", "Time from METAR observation to ingestion",
+    buckets=(60.0, 120.0, 300.0, 600.0, 900.0, 1200.0, 1800.0, 2700.0, 3600.0, 7200.0)
+)
+ALERT_EVENTS = Counter("fetcher_alert_events_total", "Alert rule events raised on ingest", ("rule", "status"))
+METAR_SOURCE = Counter("fetcher_metar_source_total", "Provider each stored METAR was resolved from", ("provider",))
@@ -0,0 +1,107 @@
+"""
+On-demand sampling profiler.
+
+Nothing runs until a capture is requested. A capture starts one background thread that
+samples the stacks of every other thread via ``sys._current_frames()`` at a fixed
+interval for N seconds, then writes the counts in collapsed-stack format (one
+``frame;frame;frame count`` line per unique stack), which flamegraph.pl, speedscope and
+inferno read directly.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+
+_capture_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def _sample(stacks: Counter, own_ident: int, thread_names: dict):
+    for ident, frame in sys._current_frames().items():
+        if ident == own_ident:
+            continue
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.append(thread_names.get(ident, f"thread-{ident}"))
+        stacks[";".join(reversed(labels))] += 1
+
+
+def _capture(seconds: float, interval: float, path: str):
+    stacks = Counter()
+    own_ident = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    samples = 0
+    try:
+        while time.monotonic() < deadline:
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            _sample(stacks, own_ident, thread_names)
+            samples += 1
+            time.sleep(interval)
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"[profile] Wrote {samples} samples ({len(stacks)} unique stacks) to {path}")
+    except Exception as e:
+        logger.error(f"[profile] Profile capture failed: {e}", exc_info=True)
+    finally:
+        _capture_lock.release()
+
+
+def start_profile(seconds: float = None, interval: float = None, service: str = "data-fetcher"):
+    """
+    Start a background profile capture. Returns the output path, or None if a capture
+    is already running.
+    """
+    seconds = Config.PROFILE_SECONDS if seconds is None else seconds
+    interval = Config.PROFILE_INTERVAL if interval is None else interval
+    if not _capture_lock.acquire(blocking=False):
+        logger.warning("[profile] A profile capture is already running")
+        return None
+    try:
+        os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(Config.PROFILE_DIR, f"{service}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.collapsed")
+        logger.info(f"[profile] Capturing {seconds}s profile to {path}")
+        threading.Thread(target=_capture, args=(seconds, interval, path), name="profiler", daemon=True).start()
+    except BaseException:
+        # The capture thread releases the lock when it finishes; it never started
+        _capture_lock.release()
+        raise
+    return path
+
+
+def _wait_for_requests(requested: threading.Event, service: str):
+    while True:
+        requested.wait()
+        requested.clear()
+        try:
+            start_profile(service=service)
+        except OSError as e:
+            logger.error(f"[profile] Could not start a profile capture: {e}")
+
+
+def install_signal_handler(signum=None, service: str = "data-fetcher"):
+    """
+    Start a capture whenever the process receives ``signum`` (SIGUSR1 by default). The
+    handler only sets an event; a daemon thread starts the capture, so no logging or
+    file I/O runs inside the signal handler.
+    """
+    import signal
+
+    signum = signal.SIGUSR1 if signum is None else signum
+    requested = threading.Event()
+    threading.Thread(target=_wait_for_requests, args=(requested, service), name="profile-trigger",
+                     daemon=True).start()
+    signal.signal(signum, lambda *_: requested.set())
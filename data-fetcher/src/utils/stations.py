@@ -0,0 +1,127 @@
+"""
+METAR station registry and batched, parallel fetching.
+
+Stations come from METAR_STATIONS_FILE (one ICAO id per line, ``#`` comments allowed)
+or the comma-separated METAR_STATIONS. Multi-station providers are queried in batches
+capped both by station count and by URL length, and the batches run concurrently on a
+small thread pool so a cycle scales with the number of batches, not the station count.
+"""
+
+import contextvars
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.circuit_breaker import CircuitOpenError, get_breaker
+from src.utils.config import Config
+from src.utils.logging_config import logger
+
+
+def _normalize(ids):
+    stations = []
+    seen = set()
+    for icao in ids:
+        icao = icao.strip().upper()
+        if icao and icao not in seen:
+            seen.add(icao)
+            stations.append(icao)
+    return stations
+
+
+def load_stations():
+    """
+    Return the configured station ids, upper-cased and de-duplicated in their original
+    order.
+    """
+    if Config.METAR_STATIONS_FILE:
+        with open(Config.METAR_STATIONS_FILE) as f:
+            stations = _normalize(line.split("#", 1)[0] for line in f)
+        logger.debug(f"Loaded {len(stations)} stations from {Config.METAR_STATIONS_FILE}")
+        return stations
+    return _normalize(Config.METAR_STATIONS.split(","))
+
+
+def load_forecast_locations():
+    """Return the configured forecast locations as (name, lat, lon) tuples."""
+    locations = []
+    for entry in Config.FORECAST_LOCATIONS.split(","):
+        if entry.strip():
+            name, lat, lon = entry.strip().split(":")
+            locations.append((name, lat, lon))
+    return locations
+
+
+def shard_stations(stations, shards):
+    """
+    Group stations into ``shards`` stable buckets keyed ``metar:<n>``. crc32 rather than
+    hash() so every worker process puts a station in the same shard.
+    """
+    grouped = {}
+    for icao in stations:
+        grouped.setdefault(f"metar:{zlib.crc32(icao.encode()) % shards}", []).append(icao)
+    return grouped
+
+
+def batches(stations, size, max_chars=None):
+    """
+    Split ``stations`` into lists of at most ``size`` ids whose comma-joined length stays
+    within ``max_chars`` (MAX_STATION_QUERY_CHARS by default).
+    """
+    max_chars = Config.MAX_STATION_QUERY_CHARS if max_chars is None else max_chars
+    batch = []
+    length = 0
+    for icao in stations:
+        extra = len(icao) + (1 if batch else 0)
+        if batch and (len(batch) >= size or length + extra > max_chars):
+            yield batch
+            batch = []
+            extra = len(icao)
+            length = 0
+        batch.append(icao)
+        length += extra
+    if batch:
+        yield batch
+
+
+def fetch_batched(provider, fetch_batch, stations, batch_size):
+    """
+    Call ``fetch_batch(batch)`` for every batch of ``stations`` on up to FETCH_WORKERS
+    threads and concatenate the returned METAR lists. A failing batch is logged and
+    skipped so the rest of the cycle still lands; a provider whose circuit is open is
+    skipped entirely.
+    """
+    if isinstance(stations, str):
+        stations = stations.split(",")
+    station_batches = list(batches(stations, batch_size))
+    if not station_batches:
+        return []
+    breaker = get_breaker(provider)
+    if breaker.is_open():
+        # Skip the whole provider at once instead of failing every batch
+        logger.warning(f"Skipping {provider} for {len(stations)} stations, its circuit is open")
+        return []
+    if len(station_batches) == 1:
+        return fetch_batch(station_batches[0])
+
+    def run(batch):
+        # Once the circuit opens mid-cycle, or while a half-open probe is out, the
+        # remaining batches are skipped without calling out
+        if not breaker.allow():
+            return []
+        try:
+            return fetch_batch(batch)
+        except CircuitOpenError:
+            return []
+        except Exception as e:
+            logger.error(f"Error fetching {provider} METAR batch {batch[0]}..{batch[-1]}: {e}")
+            return []
+
+    workers = min(Config.FETCH_WORKERS, len(station_batches))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fetch-{provider}") as pool:
+        # Each task runs in a copy of the caller's context so spans join the active trace
+        futures = [pool.submit(contextvars.copy_context().run, run, batch) for batch in station_batches]
+        metars = []
+        for future in futures:
+            metars.extend(future.result())
+
+    logger.debug(f"Fetched {len(metars)} METARs from {provider} in {len(station_batches)} batches")
+    return metars
@@ -0,0 +1,125 @@
+"""
+Opt-in, sampled span tracing.
+
+A root ``trace()`` wraps one unit of work (a fetcher cycle, an API request). Inside it,
+``span()`` blocks time the individual steps (fetch, decode, transform, write, query).
+When the root is sampled out (``TRACE_SAMPLE_RATE``, default 0 = off) ``span()`` is a
+single ContextVar lookup returning a shared no-op, so instrumented code costs close to
+nothing. Finished traces are logged as one line, exported to the span histogram, and
+optionally appended as JSON lines to ``TRACE_FILE``.
+"""
+
+import contextvars
+import json
+import random
+import threading
+import time
+
+from src.utils.config import Config
+from src.utils.logging_config import logger
+from src.utils.metrics import Histogram
+
+SPAN_SECONDS = Histogram(
+    "fetcher_span_duration_seconds", "Duration of sampled trace spans", ("span",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+_active = contextvars.ContextVar("active_trace", default=None)
+_file_lock = threading.Lock()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def rename(self, name: str):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Trace:
+    __slots__ = ("name", "start", "wall_start", "spans", "token")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.spans = []
+
+    def __enter__(self):
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.token = _active.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _active.reset(self.token)
+        _finish(self, duration, exc_type is not None)
+        return False
+
+    def rename(self, name: str):
+        self.name = name
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        # list.append is atomic, so spans may finish on worker threads
+        self.trace.spans.append((self.name, self.start - self.trace.start, end - self.start, exc_type is not None))
+        return False
+
+
+def trace(name: str, sample_rate: float = None):
+    """Start a root trace, sampled at ``sample_rate`` (defaults to TRACE_SAMPLE_RATE)."""
+    rate = Config.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return _NOOP
+    return Trace(name)
+
+
+def span(name: str):
+    """Time a step of the active trace; a no-op when there is no sampled trace."""
+    current = _active.get()
+    if current is None:
+        return _NOOP
+    return _Span(current, name)
+
+
+def _finish(t: Trace, duration: float, failed: bool):
+    totals = {}
+    for name, _, span_duration, _ in t.spans:
+        totals[name] = totals.get(name, 0.0) + span_duration
+        SPAN_SECONDS.labels(name).observe(span_duration)
+    SPAN_SECONDS.labels(t.name).observe(duration)
+
+    breakdown = ", ".join(f"{n}={d * 1000:.1f}ms" for n, d in sorted(totals.items(), key=lambda kv: -kv[1]))
+    logger.info(f"[trace] {t.name} {duration * 1000:.1f}ms{' (failed)' if failed else ''}: {breakdown}")
+
+    if Config.TRACE_FILE:
+        record = {
+            "trace": t.name,
+            "start": t.wall_start,
+            "duration_s": duration,
+            "failed": failed,
+            "spans": [
+                {"name": n, "offset_s": offset, "duration_s": d, "failed": f} for n, offset, d, f in t.spans
+            ],
+        }
+        with _file_lock, open(Config.TRACE_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
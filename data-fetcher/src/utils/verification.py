@@ -0,0 +1,254 @@
+"""
+Incremental verification of yr.no forecasts against observations.
+
+Every forecast fetch records the forecast's steps (valid time -> forecast values)
+together with the time the forecast was issued (``meta.updated_at``). When an
+observation for a verified site arrives, it is matched with every recorded forecast
+for the nearest whole hour within VERIFY_MATCH_MINUTES. There is one forecast per
+issue time, so one per lead time. Each forecast-minus-observed error updates a
+running accumulator per (location, source, variable, lead-time bucket): Welford's
+mean for the bias, plus running means of |error| and the variance for MAE and RMSE.
+Nothing is ever re-scanned. Each valid hour is verified once per source, with the
+first matching observation.
+
+Sites:
+
+* METARs: VERIFY_SITES maps forecast locations to their nearby METAR station
+  (``Home=ENGM``). Verified are temperature, wind speed, sea-level pressure (QNH)
+  and relative humidity.
+* Netatmo: the station verifies VERIFY_NETATMO_LOCATION, on pressure only. The main
+  module's temperature and humidity are indoor readings.
+
+Accumulators and pending forecasts are saved to VERIFY_STATE_FILE after every
+update. The current statistics are written to the ``forecast_verification``
+measurement, which the api-service serves. As with the polling cadence, state is kept
+per process: with several fetcher workers, the forecast job and the station it is
+verified against should land on the same worker.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from src.utils.cadence import observation_epoch
+from src.utils.config import Config
+from src.utils.logging_config import logger
+
+HOUR = 3600
+KT_TO_M_S = 0.514444
+
+# Observation fields per source, keyed by the forecast variable they verify
+OBSERVED = {
+    "metar": {
+        "temp_c": "temp_c",
+        "wind_speed_m_s": "wind_speed_kt",
+        "pressure_hpa": "altim_hpa",
+        "relative_humidity_percent": "relative_humidity_percent",
+    },
+    "netatmo": {
+        "pressure_hpa": "pressure_hpa",
+    },
+}
+_SCALE = {("metar", "wind_speed_m_s"): KT_TO_M_S}
+
+
+def parse_epoch(value):
+    """Epoch seconds of an ISO timestamp (UTC unless it says otherwise), or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def lead_buckets(spec: str):
+    """Bucket labels for comma-separated lead-time edges in hours: "3,6" -> 0-3h, 3-6h, 6h+."""
+    edges = sorted(float(e) for e in spec.split(",") if e.strip())
+    labels = []
+    low = 0.0
+    for edge in edges:
+        labels.append((edge, f"{low:g}-{edge:g}h"))
+        low = edge
+    labels.append((math.inf, f"{low:g}h+"))
+    return labels
+
+
+class ErrorStats:
+    """Running bias, MAE and RMSE of a stream of errors (Welford's algorithm)."""
+
+    __slots__ = ("count", "mean", "m2", "mean_abs")
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, mean_abs=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.mean_abs = mean_abs
+
+    def add(self, error: float):
+        self.count += 1
+        delta = error - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (error - self.mean)
+        self.mean_abs += (abs(error) - self.mean_abs) / self.count
+
+    @property
+    def rmse(self) -> float:
+        # Mean squared error is the (population) variance plus the squared mean
+        return math.sqrt(max(self.m2 / self.count + self.mean * self.mean, 0.0)) if self.count else 0.0
+
+    def to_fields(self) -> dict:
+        return {"count": self.count, "bias": round(self.mean, 4), "mae": round(self.mean_abs, 4),
+                "rmse": round(self.rmse, 4)}
+
+
+class ForecastVerifier:
+    def __init__(self, sites: dict, netatmo_location: str, buckets, state_file: str = None):
+        self.sites = sites  # METAR station -> forecast location
+        self.netatmo_location = netatmo_location
+        self.buckets = buckets
+        self.state_file = state_file
+        # location -> {valid hour epoch -> {issued epoch -> {variable: value}}}
+        self._forecasts = {}
+        # location -> {source -> last valid hour verified}
+        self._verified = {}
+        self._stats = {}  # (location, source, variable, bucket) -> ErrorStats
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _bucket(self, lead_hours: float) -> str:
+        for edge, label in self.buckets:
+            if lead_hours < edge:
+                return label
+        return self.buckets[-1][1]
+
+    def add_forecast(self, location: str, issued: float, steps, now: float = None):
+        """Record a forecast's steps (dicts with "time" and the forecast variables)."""
+        now = time.time() if now is None else now
+        self._load()
+        horizon = issued + Config.VERIFY_MAX_LEAD_HOURS * HOUR
+        with self._lock:
+            pending = self._forecasts.setdefault(location, {})
+            for step in steps:
+                valid = parse_epoch(step.get("time"))
+                if valid is None or valid < issued or valid > horizon or valid % HOUR:
+                    continue
+                values = {k: v for k, v in step.items() if k != "time" and v is not None}
+                pending.setdefault(valid, {})[issued] = values
+            # Forecasts for hours that can no longer be matched are dropped
+            cutoff = now - HOUR - Config.VERIFY_MATCH_MINUTES * 60
+            for valid in [v for v in pending if v < cutoff]:
+                del pending[valid]
+        self._save()
+
+    def observe(self, source: str, location: str, observed: float, values: dict):
+        """
+        Verify the forecasts for the hour nearest ``observed`` against ``values``.
+        Returns the updated stats as ``((location, source, variable, bucket), ErrorStats)``.
+        """
+        if location is None or observed is None:
+            return []
+        self._load()
+        valid = round(observed / HOUR) * HOUR
+        if abs(observed - valid) > Config.VERIFY_MATCH_MINUTES * 60:
+            return []
+        updated = {}
+        with self._lock:
+            verified = self._verified.setdefault(location, {})
+            forecasts = self._forecasts.get(location, {}).get(valid)
+            if not forecasts or verified.get(source, 0) >= valid:
+                return []
+            verified[source] = valid
+            for variable, field in OBSERVED[source].items():
+                observed_value = values.get(field)
+                if observed_value is None:
+                    continue
+                observed_value *= _SCALE.get((source, variable), 1.0)
+                for issued, forecast in forecasts.items():
+                    forecast_value = forecast.get(variable)
+                    if forecast_value is None:
+                        continue
+                    key = (location, source, variable, self._bucket((valid - issued) / HOUR))
+                    stats = self._stats.get(key)
+                    if stats is None:
+                        stats = self._stats[key] = ErrorStats()
+                    stats.add(forecast_value - observed_value)
+                    updated[key] = stats
+        if updated:
+            self._save()
+        return list(updated.items())
+
+    def observe_metars(self, metars):
+        """Verify against the METARs (dicts with derived fields) of the verified stations."""
+        updated = []
+        for metar in metars:
+            location = self.sites.get(metar.get("station_id"))
+            if location is not None:
+                updated.extend(self.observe("metar", location, observation_epoch(metar), metar))
+        return updated
+
+    def stats(self):
+        self._load()
+        with self._lock:
+            return dict(self._stats)
+
+    def _load(self):
+        if self._loaded or not self.state_file:
+            self._loaded = True
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.state_file) as f:
+                    state = json.load(f)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as e:
+                logger.error(f"[verification] Ignoring unreadable state file {self.state_file}: {e}")
+                return
+            for location, pending in state.get("forecasts", {}).items():
+                self._forecasts[location] = {
+                    float(valid): {float(issued): values for issued, values in issues.items()}
+                    for valid, issues in pending.items()
+                }
+            self._verified = state.get("verified", {})
+            for entry in state.get("stats", []):
+                self._stats[tuple(entry["key"])] = ErrorStats(*entry["state"])
+
+    def _save(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {
+                "forecasts": self._forecasts,
+                "verified": self._verified,
+                "stats": [{"key": list(key), "state": [s.count, s.mean, s.m2, s.mean_abs]}
+                          for key, s in self._stats.items()],
+            }
+            tmp = f"{self.state_file}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_file)
+            except OSError as e:
+                logger.error(f"[verification] Failed to save state to {self.state_file}: {e}")
+
+
+def parse_sites(spec: str) -> dict:
+    """VERIFY_SITES ("Home=ENGM,Cabin=ENZV") as METAR station -> forecast location."""
+    sites = {}
+    for entry in spec.split(","):
+        location, _, station = entry.strip().partition("=")
+        if location and station:
+            sites[station.strip().upper()] = location.strip()
+    return sites
+
+
+VERIFIER = ForecastVerifier(parse_sites(Config.VERIFY_SITES), Config.VERIFY_NETATMO_LOCATION,
+                            lead_buckets(Config.VERIFY_LEAD_BUCKETS), Config.VERIFY_STATE_FILE)
@@ -0,0 +1,115 @@
+import pytest
+
+import src.database.influx_client as influx_client
+from src.fetcher import store_metars_in_influxdb
+from src.utils.alerts import AlertEngine, Rule, alert_rows
+
+
+class _WriteApi:
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def write(self, bucket, record, write_precision):
+        self.bodies.append(record)
+
+
+class StubInflux:
+    """Stands in for InfluxDBClient and keeps every write body."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def __call__(self, enable_gzip=False):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def write_api(self, write_options=None):
+        return _WriteApi(self.bodies)
+
+
+def engine(*specs):
+    return AlertEngine([Rule(spec) for spec in specs])
+
+
+WIND = {"name": "wind", "measurement": "metar", "field": "wind_speed_kt", "tags": {"station_id": "ENZV"},
+        "above": 25, "clear": 20, "for": 2}
+
+
+def run(alerts, values, measurement="metar", tags=None, field="wind_speed_kt"):
+    tags = tags or {"station_id": "ENZV"}
+    return [[e["status"] for e in alerts.evaluate(measurement, tags, {field: v}, 1000 + 300 * i)]
+            for i, v in enumerate(values)]
+
+
+def test_debounce_needs_consecutive_matches():
+    assert run(engine(WIND), [30, 10, 30, 30, 30]) == [[], [], [], ["firing"], []]
+
+
+def test_hysteresis_resolves_only_past_clear():
+    assert run(engine(WIND), [30, 30, 22, 21, 20, 30]) == [[], ["firing"], [], [], ["resolved"], []]
+
+
+def test_tag_filter_and_series_state():
+    alerts = engine({**WIND, "for": 1})
+    assert run(alerts, [30], tags={"station_id": "ENGM"}) == [[]]
+    ifr = engine({"name": "ifr", "measurement": "metar", "field": "flight_category", "in": ["IFR", "LIFR"]})
+    assert run(ifr, ["IFR"], field="flight_category") == [["firing"]]
+    # Another station is its own series
+    assert run(ifr, ["LIFR", "VFR"], tags={"station_id": "ENGM"}, field="flight_category") == [["firing"], ["resolved"]]
+
+
+def test_below_and_wrong_value_type():
+    dry = engine({"name": "dry", "measurement": "netatmo", "field": "humidity_percent", "below": 30, "clear": 35})
+    assert run(dry, [25, "n/a", 33, 36], measurement="netatmo", tags={"station_name": "Home"},
+               field="humidity_percent") == [["firing"], [], [], ["resolved"]]
+
+
+def test_point_no_newer_than_last_is_skipped():
+    alerts = engine(WIND)
+    tags = {"station_id": "ENZV"}
+    assert alerts.evaluate("metar", tags, {"wind_speed_kt": 30}, 100, observed=50) == []
+    # Same report (observation time) fetched again later
+    assert alerts.evaluate("metar", tags, {"wind_speed_kt": 30}, 400, observed=50) == []
+    assert [e["status"] for e in alerts.evaluate("metar", tags, {"wind_speed_kt": 30}, 700, observed=60)] == ["firing"]
+
+
+def test_rule_needs_one_condition():
+    with pytest.raises(ValueError):
+        Rule({"name": "x", "measurement": "metar", "field": "temp_c", "above": 1, "below": 0})
+
+
+def test_alert_rows_types():
+    events = engine({**WIND, "for": 1}).evaluate("metar", {"station_id": "ENZV"}, {"wind_speed_kt": 30}, 5)
+    (fields, tags, timestamp), = alert_rows(events)
+    assert fields["firing"] is True and fields["value"] == 30
+    assert tags == {"station_id": "ENZV", "rule": "wind", "severity": "warning", "source": "metar"}
+    assert timestamp == 5
+
+
+def _metar(wind, observed):
+    return {"station_id": "ENZV", "observation_time": observed, "wx_string": "ENZV 20030KT", "temp_c": 5.0, "dewpoint_c": 1.0,
+            "wind_dir_deg": 200.0, "wind_speed_kt": wind, "altim_in_hg": 29.9, "altim_hpa": 1012.0,
+            "visibility_statute_mi": 6.2, "elevation_m": 9.0}
+
+
+def test_metar_polled_twice_counts_once(monkeypatch):
+    stub = StubInflux()
+    alerts = engine(WIND)
+    monkeypatch.setattr(influx_client, "get_influx_client", stub)
+    monkeypatch.setattr(influx_client, "ALERTS", alerts)
+    fired = []
+    monkeypatch.setattr(influx_client, "dispatch", fired.extend)
+
+    report = _metar(30.0, "2024-11-01T11:50:00Z")
+    store_metars_in_influxdb({"ENZV": report})
+    store_metars_in_influxdb({"ENZV": dict(report)})
+    assert fired == []
+
+    store_metars_in_influxdb({"ENZV": _metar(30.0, "2024-11-01T12:20:00Z")})
+    assert [(e["rule"], e["status"]) for e in fired] == [("wind", "firing")]
+    assert any(body.startswith("alerts,") for body in stub.bodies)
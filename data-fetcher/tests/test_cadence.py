@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.utils.cadence import observation_epoch
+
+
+def _epoch(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.mark.parametrize("group, now, expected", [
+    ("151150Z", datetime(2024, 11, 15, 12, 5, tzinfo=timezone.utc), _epoch(2024, 11, 15, 11, 50)),
+    # Day 31 seen in a 30-day month is from the end of the previous one
+    ("312350Z", datetime(2024, 11, 1, 0, 10, tzinfo=timezone.utc), _epoch(2024, 10, 31, 23, 50)),
+    ("302350Z", datetime(2024, 12, 1, 0, 10, tzinfo=timezone.utc), _epoch(2024, 11, 30, 23, 50)),
+    ("292350Z", datetime(2024, 3, 1, 0, 10, tzinfo=timezone.utc), _epoch(2024, 2, 29, 23, 50)),
+    ("312350Z", datetime(2025, 1, 1, 0, 10, tzinfo=timezone.utc), _epoch(2024, 12, 31, 23, 50)),
+    # A day neither month has is not a valid report
+    ("312350Z", datetime(2024, 3, 1, 0, 10, tzinfo=timezone.utc), None),
+])
+def test_observation_epoch_from_raw_group(group, now, expected):
+    assert observation_epoch({"wx_string": f"ENGM {group} 20005KT CAVOK"}, now) == expected
+
+
+def test_observation_epoch_prefers_observation_time():
+    metar = {"observation_time": "2024-11-15T11:50:00Z", "wx_string": "ENGM 010000Z"}
+    assert observation_epoch(metar) == _epoch(2024, 11, 15, 11, 50)
+    assert observation_epoch({"wx_string": "ENGM 20005KT"}) is None
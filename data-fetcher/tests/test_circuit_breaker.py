@@ -0,0 +1,101 @@
+import pytest
+
+import src.utils.circuit_breaker as circuit_breaker
+import src.utils.stations as stations
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, parse_retry_after
+from src.utils.config import Config
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    monkeypatch.setattr(Config, "BREAKER_MAX_RESET_SECONDS", 100)
+    return clock
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def test_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker("faa", failure_threshold=3, reset_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.is_open() and not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.before_call()  # the probe
+    assert breaker.state == HALF_OPEN and not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_failed_probe_doubles_the_wait_up_to_the_cap(clock):
+    breaker = CircuitBreaker("faa", failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    waits = []
+    for _ in range(3):
+        waits.append(breaker.open_until - clock.now)
+        clock.now = breaker.open_until
+        breaker.before_call()
+        breaker.record_failure()
+    waits.append(breaker.open_until - clock.now)
+    assert waits == [30, 60, 100, 100]
+
+
+def test_rate_limits_open_at_once(clock):
+    breaker = CircuitBreaker("checkwx", failure_threshold=5, reset_seconds=30)
+    breaker.record_response(Response(503, {"Retry-After": "45"}))
+    assert breaker.state == OPEN and breaker.open_until == clock.now + 45
+    breaker = CircuitBreaker("checkwx", failure_threshold=5, reset_seconds=30)
+    breaker.record_response(Response(429))
+    assert breaker.state == OPEN and breaker.open_until == clock.now + 30
+    breaker = CircuitBreaker("checkwx", failure_threshold=5, reset_seconds=30)
+    breaker.record_response(Response(404))
+    assert breaker.state == CLOSED
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_batches_skip_quietly_behind_a_half_open_probe(clock, monkeypatch):
+    breaker = CircuitBreaker("test_provider", failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock.now += 30
+    monkeypatch.setitem(circuit_breaker._breakers, "test_provider", breaker)
+    monkeypatch.setattr(Config, "FETCH_WORKERS", 1)
+    errors = []
+    monkeypatch.setattr(stations.logger, "error", errors.append)
+    calls = []
+
+    def fetch_batch(batch):
+        calls.append(batch)
+        breaker.before_call()
+        breaker.record_failure()  # the probe fails
+        raise circuit_breaker.requests.ConnectionError("down")
+
+    assert stations.fetch_batched("test_provider", fetch_batch, ["ENGM", "ENZV", "ENBR", "ENVA"], 1) == []
+    assert calls == [["ENGM"]]
+    assert len(errors) == 1
@@ -0,0 +1,92 @@
+import os
+import time
+
+import src.fetcher as fetcher
+from src.utils.cluster import FileCoordinator, HashRing
+
+KEYS = [f"metar:{i}" for i in range(16)] + ["forecast:Home", "netatmo", "energy", "vatsim_traffic"]
+
+
+def test_ring_moves_only_the_keys_of_a_joining_or_leaving_member():
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+    moved = [key for key in KEYS if before.owner(key) != after.owner(key)]
+    assert moved and all(after.owner(key) == "d" for key in moved)
+
+    without_b = HashRing(["a", "c"])
+    assert all(without_b.owner(key) == before.owner(key) for key in KEYS if before.owner(key) != "b")
+    assert HashRing([]).owner("netatmo") is None
+
+
+def _worker(root, name):
+    worker = FileCoordinator(str(root), name)
+    os.makedirs(worker.members_dir, exist_ok=True)
+    os.makedirs(worker.claims_dir, exist_ok=True)
+    worker.heartbeat()
+    return worker
+
+
+def _die(worker, seconds_ago=60):
+    path = os.path.join(worker.members_dir, worker.worker_id)
+    past = time.time() - seconds_ago
+    os.utime(path, (past, past))
+
+
+def test_ring_follows_membership(tmp_path):
+    a = _worker(tmp_path, "a")
+    b = _worker(tmp_path, "b")
+    a.refresh()
+    assert {key for key in KEYS if a.owns(key)} == {key for key in KEYS if HashRing(["a", "b"]).owner(key) == "a"}
+    _die(b)
+    a.refresh()
+    assert all(a.owns(key) for key in KEYS)
+
+
+def test_takeover_of_unclaimed_and_dead_workers_jobs(tmp_path):
+    a, b, c = _worker(tmp_path, "a"), _worker(tmp_path, "b"), _worker(tmp_path, "c")
+    assert a.claim("5min", 1, "metar:0")
+    assert a.claim("5min", 1, "metar:1")
+    a.complete("5min", 1, "metar:1")
+
+    # a is alive: only the unclaimed job is taken over
+    assert b.orphaned("5min", 1, ["metar:0", "metar:1", "netatmo"]) == ["netatmo"]
+
+    _die(a)
+    assert b.orphaned("5min", 1, ["metar:0", "metar:1"]) == ["metar:0"]
+    assert c.orphaned("5min", 1, ["metar:0"]) == []
+
+    # The worker that took it over dies as well
+    _die(b)
+    assert c.orphaned("5min", 1, ["metar:0"]) == ["metar:0"]
+    c.complete("5min", 1, "metar:0")
+    assert c.orphaned("5min", 1, ["metar:0"]) == []
+
+
+class _Coordinator:
+    """Reports ``key`` orphaned from the ``at``-th sweep on."""
+
+    def __init__(self, at):
+        self.at = at
+        self.sweeps = 0
+
+    def orphaned(self, loop, slot, keys):
+        self.sweeps += 1
+        return ["metar:0"] if self.sweeps == self.at else []
+
+    def complete(self, loop, slot, key):
+        pass
+
+
+def test_takeover_sweeps_until_the_slot_ends(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(fetcher.time, "time", lambda: clock[0])
+    monkeypatch.setattr(fetcher, "_sleep_until", lambda deadline: clock.__setitem__(0, max(clock[0], deadline)))
+    monkeypatch.setattr(fetcher.Config, "TAKEOVER_DELAY", 0.5)
+    monkeypatch.setattr(fetcher.Config, "HEARTBEAT_INTERVAL", 5)
+    ran = []
+    coordinator = _Coordinator(at=3)
+
+    fetcher.take_over(coordinator, "5min", 1, 60.0, 60, {"metar:0": lambda: ran.append(clock[0])})
+    # Sweeps at 90, 95, 100, ... 115; the dead owner is noticed on the third
+    assert ran == [100.0]
+    assert coordinator.sweeps == 6
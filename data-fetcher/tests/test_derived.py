@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from src.utils.derived import ceiling_ft, derive_metar_fields
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("ENZV 181150Z 20012KT 9999 FEW020 SCT035 05/01 Q1012", math.inf),
+    ("ENZV 181150Z 20012KT 9999 SCT008 BKN015 OVC030 05/01 Q1012", 1500.0),
+    ("ENZV 181150Z 20012KT 4000 TSRA BKN008CB 05/01 Q1012", 800.0),
+    ("ENZV 181150Z 20012KT 9999 SCT020 BKN012TCU 05/01 Q1012", 1200.0),
+    ("ENZV 181150Z AUTO 20012KT 9999 BKN008/// 05/01 Q1012", 800.0),
+    ("ENZV 181150Z 00000KT 0100 FG VV002 05/05 Q1012", 200.0),
+    # Vertical visibility not measured: no ceiling height to use
+    ("ENZV 181150Z AUTO 00000KT 0100 FG VV/// 05/05 Q1012", math.inf),
+    ("ENZV 181150Z AUTO 00000KT 0100 FG VV/// BKN004/// 05/05 Q1012", 400.0),
+    ("", math.inf),
+    (None, math.inf),
+])
+def test_ceiling_ft(raw, expected):
+    assert ceiling_ft(raw) == expected
+
+
+def test_thunderstorm_layer_sets_flight_category():
+    metar = {"temp_c": 18.0, "dewpoint_c": 16.0, "wind_dir_deg": 200.0, "wind_speed_kt": 12.0, "altim_in_hg": 29.8,
+             "visibility_statute_mi": 6.2, "elevation_m": 9.0,
+             "wx_string": "ENZV 181150Z 20012KT 9999 TS BKN008CB 18/16 Q1009"}
+    derived, = derive_metar_fields([metar])
+    assert derived["ceiling_ft"] == 800.0
+    assert derived["flight_category"] == "IFR"
+
+
+def test_missing_inputs_are_left_out():
+    derived, = derive_metar_fields([{"temp_c": 5.0, "wx_string": "ENZV 181150Z VRB02KT CAVOK 05/M01 Q1020"}])
+    assert "relative_humidity_percent" not in derived
+    assert "flight_category" not in derived
+    assert "wind_u_kt" not in derived
@@ -0,0 +1,90 @@
+import math
+from datetime import datetime, timezone
+
+import pytest
+from influxdb_client import Point
+
+from src.database.line_protocol import LineBuffer, encode_line, epoch_seconds, format_field, format_typed
+
+
+@pytest.mark.parametrize("tags", [
+    {"station_id": "ENGM"},
+    {"station name": "Home, main", "a=b": "c=d"},
+    {"path": "C:\\temp", "quote": 'say "hi"'},
+])
+def test_escaping_matches_the_client_library(tags):
+    fields = {"note": 'a "quoted" \\ value, with = signs', "temp_c": 1.5}  # Point sorts its fields
+    point = Point("metar").time(1_700_000_000, "s")
+    for key, value in sorted(tags.items()):
+        point.tag(key, value)
+    for key, value in fields.items():
+        point.field(key, value)
+    assert encode_line("metar", tags, fields, 1_700_000_000) == point.to_line_protocol()
+
+
+def test_measurement_and_key_escapes():
+    line = encode_line("my measurement,x", {"k": "v w"}, {"f 1": 2.5})
+    assert line == "my\\ measurement\\,x,k=v\\ w f\\ 1=2.5"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, "true"),
+    (False, "false"),
+    (3, "3i"),
+    (-7.0, "-7"),
+    (0.1, "0.1"),
+    (1e16, "1e+16"),
+    (math.nan, None),
+    (math.inf, None),
+    ("x", '"x"'),
+    (None, None),
+    ([1], None),
+])
+def test_format_field(value, expected):
+    assert format_field(value) == expected
+
+
+@pytest.mark.parametrize("value, kind, expected", [
+    (5, float, "5"),
+    ("5.5", float, "5.5"),
+    (41.6, int, "42i"),
+    ("17", int, "17i"),
+    ("n/a", int, None),
+    (math.inf, int, None),
+    (3, str, '"3"'),
+    (True, bool, "true"),
+    (1, bool, None),
+])
+def test_format_typed(value, kind, expected):
+    assert format_typed(value, kind) == expected
+
+
+def test_declared_types_are_applied():
+    # energy prices are integers and VATSIM counts stay integers even if sent as floats
+    assert encode_line("energy_prices", {"region": "NO1"}, {"price_per_kwh_ore": 81.6}, 60) == \
+        "energy_prices,region=NO1 price_per_kwh_ore=82i 60"
+    assert encode_line("vatsim_stats", None, {"pilot_count": 1200.0}) == "vatsim_stats pilot_count=1200i"
+    # A yr.no temperature of 5 is written without an "i", so the field stays a float
+    assert encode_line("yr_forecast", {}, {"temp_c": 5}) == "yr_forecast temp_c=5"
+
+
+def test_unwritable_fields_and_empty_tags_are_dropped():
+    assert encode_line("metar", {"station_id": "ENGM", "empty": "", "none": None},
+                       {"temp_c": None, "wind_speed_kt": "calm", "altim_hpa": 1012}) == \
+        "metar,station_id=ENGM altim_hpa=1012"
+    assert encode_line("metar", {"station_id": "ENGM"}, {"temp_c": None}) is None
+
+
+def test_line_buffer_reuse():
+    buffer = LineBuffer()
+    assert buffer.add("netatmo", {"station_name": "Home"}, {"pressure_hpa": 1012}, 10)
+    assert not buffer.add("netatmo", {}, {"pressure_hpa": None}, 10)
+    assert len(buffer) == 1 and buffer.getvalue() == "netatmo,station_name=Home pressure_hpa=1012 10\n"
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.getvalue() == ""
+
+
+def test_epoch_seconds():
+    assert epoch_seconds(datetime(2024, 11, 18, tzinfo=timezone.utc)) == 1731888000
+    assert epoch_seconds(1731888000.9) == 1731888000
+    assert isinstance(epoch_seconds(), int)
@@ -0,0 +1,34 @@
+import os
+import signal
+import time
+
+import pytest
+
+import src.utils.profiling as profiling
+from src.utils.config import Config
+
+
+def test_failed_setup_releases_the_capture_lock(monkeypatch, tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(blocker / "profiles"))
+    with pytest.raises(OSError):
+        profiling.start_profile(seconds=0.01)
+    assert not profiling._capture_lock.locked()
+
+
+def test_signal_starts_a_capture_from_a_thread(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "PROFILE_SECONDS", 0.05)
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        profiling.install_signal_handler()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        deadline = time.monotonic() + 5
+        while not os.listdir(tmp_path) or profiling._capture_lock.locked():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
+    path, = os.listdir(tmp_path)
+    assert path.startswith("data-fetcher-") and path.endswith(".collapsed")
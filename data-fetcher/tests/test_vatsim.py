@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.providers.vatsim import parse_vatsim_metar
+from src.utils.cadence import observation_epoch
+
+
+def test_observation_time_from_report_group():
+    observed = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=20)
+    raw = f"ENGM {observed:%d%H%M}Z 20005KT 9999 FEW030 05/01 Q1012"
+    metar = parse_vatsim_metar(raw)
+    assert metar["observation_time"] == observed.strftime("%Y-%m-%dT%H:%M:%SZ")
+    assert observation_epoch(metar) == observed.timestamp()
+    assert metar["temp_c"] == 5.0 and metar["altim_hpa"] == 1012.0
+
+
+def test_observation_time_unknown_without_group():
+    assert parse_vatsim_metar("ENGM NIL")["observation_time"] is None
+    assert parse_vatsim_metar("  ") is None
+
+
+@pytest.mark.parametrize("group, temp_c, dewpoint_c", [
+    ("M03/M07", -3.0, -7.0),
+    ("02/M01", 2.0, -1.0),
+    ("M00/M00", 0.0, 0.0),
+    ("12/10", 12.0, 10.0),
+    ("M05/", -5.0, None),
+])
+def test_temperature_group(group, temp_c, dewpoint_c):
+    metar = parse_vatsim_metar(f"ENGM 150120Z 36008KT R01L/1200N 9999 -SN BKN012 {group} Q1002")
+    assert (metar["temp_c"], metar["dewpoint_c"]) == (temp_c, dewpoint_c)
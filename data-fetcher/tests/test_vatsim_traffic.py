@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import src.providers.vatsim_traffic as vatsim_traffic
+from src.providers.payloads import VatsimDatafeed, VatsimGeneral
+from src.utils.cadence import JOB_CADENCE
+from src.utils.config import Config
+
+UPDATED = datetime(2024, 11, 18, 11, 50, 12, tzinfo=timezone.utc).timestamp()
+
+
+def test_feed_epoch_takes_seven_fractional_digits():
+    assert vatsim_traffic.feed_epoch("2024-11-18T11:50:12.3456789Z") == UPDATED
+    assert vatsim_traffic.feed_epoch("2024-11-18T11:50:12Z") == UPDATED
+    assert vatsim_traffic.feed_epoch("") is None
+    assert vatsim_traffic.feed_epoch("not a time") is None
+
+
+def test_next_poll_waits_for_the_snapshot_an_interval_later(monkeypatch):
+    monkeypatch.setattr(Config, "VATSIM_REFRESH_INTERVAL", 15)
+    monkeypatch.setattr(Config, "VATSIM_POLL_LAG", 2)
+    monkeypatch.setattr(Config, "VATSIM_TRAFFIC_INTERVAL", 30)
+    assert vatsim_traffic.next_poll_time(UPDATED) == UPDATED + 32
+    # An interval that is not a multiple of the refresh rounds up to the next snapshot
+    monkeypatch.setattr(Config, "VATSIM_TRAFFIC_INTERVAL", 20)
+    assert vatsim_traffic.next_poll_time(UPDATED) == UPDATED + 32
+    monkeypatch.setattr(Config, "VATSIM_TRAFFIC_INTERVAL", 5)
+    assert vatsim_traffic.next_poll_time(UPDATED) == UPDATED + 17
+    assert vatsim_traffic.next_poll_time(None) is None
+
+
+def test_fetch_schedules_from_update_timestamp(monkeypatch):
+    feed = VatsimDatafeed(general=VatsimGeneral(update_timestamp="2024-11-18T11:50:12.3456789Z"))
+    monkeypatch.setattr(Config, "ADAPTIVE_POLLING", True)
+    monkeypatch.setattr(vatsim_traffic, "_fetch_vatsim_data", lambda: feed)
+    monkeypatch.setattr(vatsim_traffic, "_last_update", None)
+    stored = []
+    monkeypatch.setattr(vatsim_traffic, "write_measurement", lambda *args: stored.append(args))
+
+    vatsim_traffic.fetch_and_store_vatsim_traffic()
+    assert len(stored) == 1
+    assert JOB_CADENCE._next["vatsim_traffic"] == vatsim_traffic.next_poll_time(UPDATED)
+
+    # The same snapshot again: nothing stored, and due again on the next tick
+    vatsim_traffic.fetch_and_store_vatsim_traffic()
+    assert len(stored) == 1
+    assert JOB_CADENCE.due("vatsim_traffic", tick=Config.VATSIM_TICK)
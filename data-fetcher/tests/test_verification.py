@@ -0,0 +1,60 @@
+import math
+import statistics
+
+import pytest
+
+from src.utils.config import Config
+from src.utils.verification import ErrorStats, ForecastVerifier, lead_buckets, parse_sites
+
+ERRORS = [1.5, -0.5, 2.0, 0.0, -3.25, 1.0, 0.75]
+
+
+def test_welford_matches_batch_statistics():
+    stats = ErrorStats()
+    for error in ERRORS:
+        stats.add(error)
+    assert stats.count == len(ERRORS)
+    assert stats.mean == pytest.approx(statistics.fmean(ERRORS))
+    assert stats.m2 / stats.count == pytest.approx(statistics.pvariance(ERRORS))
+    assert stats.mean_abs == pytest.approx(statistics.fmean(abs(e) for e in ERRORS))
+    assert stats.rmse == pytest.approx(math.sqrt(statistics.fmean(e * e for e in ERRORS)))
+
+
+def test_welford_is_stable_with_a_large_offset():
+    stats = ErrorStats()
+    for error in ERRORS:
+        stats.add(1e9 + error)
+    assert stats.m2 / stats.count == pytest.approx(statistics.pvariance(ERRORS), rel=1e-6)
+
+
+def test_empty_and_restored_stats():
+    assert ErrorStats().rmse == 0.0
+    stats = ErrorStats()
+    for error in ERRORS[:3]:
+        stats.add(error)
+    restored = ErrorStats(stats.count, stats.mean, stats.m2, stats.mean_abs)
+    for error in ERRORS[3:]:
+        stats.add(error)
+        restored.add(error)
+    assert restored.to_fields() == stats.to_fields()
+
+
+def test_lead_buckets_and_sites():
+    assert [label for _, label in lead_buckets("3,6")] == ["0-3h", "3-6h", "6h+"]
+    assert parse_sites("Home=engm, Cabin=ENZV") == {"ENGM": "Home", "ENZV": "Cabin"}
+
+
+def test_observation_verifies_each_issue_once(monkeypatch):
+    monkeypatch.setattr(Config, "VERIFY_MATCH_MINUTES", 30)
+    monkeypatch.setattr(Config, "VERIFY_MAX_LEAD_HOURS", 48)
+    verifier = ForecastVerifier({"ENGM": "Home"}, "Home", lead_buckets("3,6"))
+    valid = 1_700_002_800  # a whole hour
+    step = {"time": "2023-11-14T23:00:00Z", "temp_c": 5.0}
+    verifier.add_forecast("Home", valid - 2 * 3600, [step], now=valid - 3600)
+    verifier.add_forecast("Home", valid - 5 * 3600, [{**step, "temp_c": 3.0}], now=valid - 3600)
+
+    updated = dict(verifier.observe("metar", "Home", valid + 600, {"temp_c": 4.0}))
+    assert updated[("Home", "metar", "temp_c", "0-3h")].to_fields()["bias"] == 1.0
+    assert updated[("Home", "metar", "temp_c", "3-6h")].to_fields()["bias"] == -1.0
+    # A later observation for the same hour is not counted again
+    assert verifier.observe("metar", "Home", valid + 900, {"temp_c": 9.0}) == []
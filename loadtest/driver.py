@@ -0,0 +1,294 @@
+"""
+End-to-end load driver. Starts the fake upstreams, runs the data-fetcher and the
+api-service against them as real subprocesses, hammers the API with concurrent
+clients, and reports fetcher cycle times, Influx write rates and API latency
+percentiles. Everything runs offline on localhost.
+
+    python loadtest/driver.py --duration 60 --clients 200 --fetch-interval 20 \
+        --latency-ms 40 --error-rate 0.01 --stations 3000 --output loadtest-report.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from fake_upstreams import FakeUpstreamServer, UpstreamSettings, station_ids
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_ROUTES = [
+    "/api/weather/metar/ENZV",
+    "/api/weather/forecast",
+    "/api/weather/netatmo",
+    "/api/weather/current",
+    "/api/energy/current",
+    "/api/energy/future",
+    "/api/energy/cheapest?hours=3",
+    "/api/energy/history",
+    "/api/weather/history/metar/temp_c?station_id=ENZV",
+    "/api/weather/history/netatmo/temperature_c",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def parse_prometheus(text):
+    """Parse Prometheus text format into {(name, labels-frozenset): value}."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = re.match(r"([a-zA-Z_:][\w:]*)(\{[^}]*\})? (\S+)", line)
+        if not m:
+            continue
+        labels = frozenset(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', m.group(2) or ""))
+        samples[(m.group(1), labels)] = float(m.group(3))
+    return samples
+
+
+def fetcher_cycle_summary(metrics_texts):
+    """Summarize the fetcher metrics, summed over every worker process."""
+    samples = {}
+    for text in metrics_texts:
+        for key, value in parse_prometheus(text).items():
+            samples[key] = samples.get(key, 0.0) + value
+    summary = {}
+    for (name, labels), value in samples.items():
+        if name == "fetcher_cycle_duration_seconds_count":
+            loop = dict(labels)["loop"]
+            total = samples.get(("fetcher_cycle_duration_seconds_sum", labels), 0.0)
+            summary.setdefault(loop, {})["cycles"] = int(value)
+            summary[loop]["mean_s"] = total / value if value else None
+        if name == "fetcher_cycle_overruns_total":
+            summary.setdefault(dict(labels)["loop"], {})["overruns"] = int(value)
+    points = sum(v for (name, _), v in samples.items() if name == "fetcher_points_written_total")
+    errors = {
+        f"{dict(labels)['provider']}/{dict(labels)['stage']}": int(v)
+        for (name, labels), v in samples.items() if name == "fetcher_errors_total"
+    }
+    jobs = {
+        f"{dict(labels)['loop']}/{dict(labels)['kind']}": int(v)
+        for (name, labels), v in samples.items() if name == "fetcher_jobs_total"
+    }
+    return {"loops": summary, "jobs": jobs, "points_written": int(points), "errors": errors}
+
+
+class ApiLoad:
+    def __init__(self, base_url, clients, duration):
+        self.base_url = base_url
+        self.clients = clients
+        self.duration = duration
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def _client(self, index, stop_at):
+        i = index
+        while time.time() < stop_at:
+            route = API_ROUTES[i % len(API_ROUTES)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self.base_url + route, timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, OSError):
+                status = "error"
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.latencies[route].append(elapsed)
+                self.statuses[route][status] += 1
+
+    def run(self):
+        stop_at = time.time() + self.duration
+        threads = [threading.Thread(target=self._client, args=(i, stop_at), daemon=True) for i in range(self.clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def summary(self):
+        routes = {}
+        all_latencies = []
+        for route, values in self.latencies.items():
+            values.sort()
+            all_latencies.extend(values)
+            routes[route] = {
+                "requests": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "statuses": {str(k): v for k, v in self.statuses[route].items()},
+            }
+        all_latencies.sort()
+        return {
+            "clients": self.clients,
+            "duration_s": self.duration,
+            "requests": len(all_latencies),
+            "requests_per_s": len(all_latencies) / self.duration,
+            "p50_ms": percentile(all_latencies, 50) * 1000 if all_latencies else None,
+            "p99_ms": percentile(all_latencies, 99) * 1000 if all_latencies else None,
+            "routes": routes,
+        }
+
+
+def start_service(args, env, cwd, log_path):
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT), log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of API load")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent API clients")
+    parser.add_argument("--fetch-interval", type=int, default=20, help="fetcher METAR/forecast cycle interval")
+    parser.add_argument("--traffic-interval", type=int, default=5, help="fetcher VATSIM traffic interval")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds the fetcher runs before API load starts")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--influx-latency-ms", type=float, default=0.0)
+    parser.add_argument("--pilots", type=int, default=1500)
+    parser.add_argument("--stations", type=int, default=0,
+                        help="METAR stations the fetcher polls (0 keeps its configured default)")
+    parser.add_argument("--fetcher-processes", type=int, default=1, help="data-fetcher worker processes")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    settings = UpstreamSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.influx_latency_ms,
+                                args.pilots)
+    upstreams = FakeUpstreamServer(("127.0.0.1", free_port()), settings).start()
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    metrics_port = free_port()
+    api_port = free_port()
+
+    env = dict(os.environ, **upstreams.service_env())
+    if args.stations:
+        stations_file = os.path.join(workdir, "stations.txt")
+        with open(stations_file, "w") as f:
+            f.write("\n".join(station_ids(random.Random(1), args.stations)) + "\n")
+        env["METAR_STATIONS_FILE"] = stations_file
+    env.update({
+        "LOG_LEVEL": "WARNING",
+        "INFLUX_TOKEN": "loadtest",
+        "CHECKWX_API_KEY": "loadtest",
+        "NETATMO_TOKEN_FILE": os.path.join(workdir, "netatmo_tokens.json"),
+        "NETATMO_ACCESS_TOKEN": "fake-access",
+        "NETATMO_REFRESH_TOKEN": "fake-refresh",
+        "NETATMO_CLIENT_ID": "loadtest",
+        "NETATMO_CLIENT_SECRET": "loadtest",
+        "METRICS_PORT": str(metrics_port),
+        "FETCH_INTERVAL": str(args.fetch_interval),
+        "CADENCE_TICK": str(args.fetch_interval),
+        "VATSIM_TRAFFIC_INTERVAL": str(args.traffic_interval),
+        "VATSIM_TICK": str(args.traffic_interval),
+        "FETCHER_PROCESSES": str(args.fetcher_processes),
+        "COORDINATION_DIR": os.path.join(workdir, "coordination") if args.fetcher_processes > 1 else "",
+        "PYTHONUNBUFFERED": "1",
+    })
+
+    processes = []
+    try:
+        fetcher = start_service([sys.executable, "-m", "src.fetcher"], env,
+                                os.path.join(REPO_ROOT, "data-fetcher"), os.path.join(workdir, "fetcher.log"))
+        processes.append(fetcher)
+        api = start_service(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(api_port),
+             "--workers", str(args.api_workers), "--log-level", "warning"],
+            env, os.path.join(REPO_ROOT, "api-service"), os.path.join(workdir, "api.log"))
+        processes.append(api)
+
+        # Fetcher worker i serves metrics on METRICS_PORT + i
+        fetcher_metrics_urls = [f"http://127.0.0.1:{metrics_port + i}/metrics" for i in range(args.fetcher_processes)]
+        for url in fetcher_metrics_urls:
+            wait_for(url)
+        wait_for(f"http://127.0.0.1:{api_port}/metrics")
+        print(f"services up, logs in {workdir}; warming up for {args.warmup}s", file=sys.stderr)
+        time.sleep(args.warmup)
+
+        writes_before = upstreams.influx.stats()
+        load = ApiLoad(f"http://127.0.0.1:{api_port}", args.clients, args.duration)
+        load_started = time.time()
+        load.run()
+        load_elapsed = time.time() - load_started
+        writes_after = upstreams.influx.stats()
+
+        fetcher_metrics = [urllib.request.urlopen(url).read().decode() for url in fetcher_metrics_urls]
+        report = {
+            "settings": vars(args),
+            "fetcher": fetcher_cycle_summary(fetcher_metrics),
+            "influx": {
+                **writes_after,
+                "lines_per_s": (writes_after["lines_written"] - writes_before["lines_written"]) / load_elapsed,
+                "write_requests_per_s": (writes_after["write_requests"] - writes_before["write_requests"]) / load_elapsed,
+            },
+            "upstream_requests": upstreams.stats()["requests"],
+            "api": load.summary(),
+        }
+    finally:
+        for proc, log in processes:
+            proc.send_signal(signal.SIGINT)
+        for proc, log in processes:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            log.close()
+        upstreams.shutdown()
+
+    data = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(data + "\n")
+    print(data)
+
+    api_summary = report["api"]
+    print(
+        f"\nAPI: {api_summary['requests']} requests, {api_summary['requests_per_s']:.0f} req/s, "
+        f"p50 {api_summary['p50_ms']:.1f} ms, p99 {api_summary['p99_ms']:.1f} ms",
+        file=sys.stderr,
+    )
+    for loop, stats in report["fetcher"]["loops"].items():
+        print(f"fetcher {loop}: {stats.get('cycles')} cycles, mean {stats.get('mean_s') or 0:.2f}s, "
+              f"{stats.get('overruns', 0)} overruns", file=sys.stderr)
+    print(f"influx: {report['influx']['lines_per_s']:.1f} lines/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
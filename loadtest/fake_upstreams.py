@@ -0,0 +1,463 @@
+"""
+Local stand-ins for every upstream the stack talks to, served from one HTTP server:
+
+    /faa/metar                     aviationweather.gov METAR JSON (FAA_API_URL)
+    /checkwx/metar/<ids>/decoded   CheckWX decoded METAR (CHECKWX_API_URL)
+    /vatsim/metar.php?id=          VATSIM raw METAR (VATSIM_METAR_URL)
+    /vatsim/v3/vatsim-data.json    VATSIM datafeed (VATSIM_URL)
+    /metno/compact                 met.no locationforecast (YRNO_API_URL)
+    /netatmo/oauth2/token          Netatmo token refresh (NETATMO_API_URL)
+    /netatmo/api/getstationsdata   Netatmo station data
+    /energy/<yyyy>/<mm-dd>_NO2.json hvakosterstrommen day prices (ENERGY_API_URL)
+    /api/v2/write, /api/v2/query   InfluxDB v2 write and (minimal) Flux query
+
+Every upstream answer can be delayed (``--latency-ms`` plus jitter) and failed at a
+configurable rate. The Influx stand-in keeps what it is sent in memory, so the
+api-service can query back what the data-fetcher wrote.
+
+    python loadtest/fake_upstreams.py --port 18080 --latency-ms 50 --error-rate 0.02
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from record_fixtures import (  # noqa: E402
+    station_ids,
+    synthesize_energy_prices,
+    synthesize_metars,
+    synthesize_netatmo,
+    synthesize_vatsim_datafeed,
+    synthesize_yr_forecast,
+)
+
+
+class UpstreamSettings:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, influx_latency_ms=0.0,
+                 pilots=1500, forecast_steps=85):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.influx_latency_ms = influx_latency_ms
+        self.pilots = pilots
+        self.forecast_steps = forecast_steps
+
+
+class Payloads:
+    """Generates upstream payloads on demand, deterministically per station."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._metars = {}
+        self._lock = threading.Lock()
+        self._datafeed = None
+        self._datafeed_at = 0.0
+
+    def _anchor(self):
+        return datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+    def metar(self, icao):
+        entry = self._metars.get(icao)
+        if entry is None:
+            rng = random.Random(zlib.crc32(icao.encode()))
+            faa, checkwx, raw = synthesize_metars(rng, [icao], anchor=self._anchor())
+            entry = self._metars[icao] = (faa[0], checkwx["data"][0], raw.strip())
+        return entry
+
+    def datafeed(self):
+        # Like the real feed, the content changes every 15 seconds
+        with self._lock:
+            if self._datafeed is None or time.time() - self._datafeed_at > 15:
+                rng = random.Random(int(time.time() // 15))
+                stations = station_ids(random.Random(1))
+                feed = synthesize_vatsim_datafeed(rng, stations, pilots=self.settings.pilots, anchor=self._anchor())
+                self._datafeed = json.dumps(feed).encode()
+                self._datafeed_at = time.time()
+            return self._datafeed
+
+    def forecast(self):
+        anchor = self._anchor().replace(minute=0)
+        return json.dumps(synthesize_yr_forecast(random.Random(anchor.hour), self.settings.forecast_steps, anchor)).encode()
+
+    def netatmo(self):
+        return json.dumps(synthesize_netatmo(random.Random(), anchor=self._anchor())).encode()
+
+    def energy(self, day):
+        anchor = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        return json.dumps(synthesize_energy_prices(random.Random(day.toordinal()), anchor=anchor)).encode()
+
+
+def _unescape(value):
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def _split_unescaped(text, sep):
+    parts, current, escaped, quoted = [], [], False, False
+    for ch in text:
+        if escaped:
+            current.append("\\" + ch)
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+            current.append(ch)
+        elif ch == sep and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return parts
+
+
+def _field_value(raw):
+    if raw.startswith('"'):
+        return _unescape(raw[1:-1])
+    if raw in ("t", "T", "true", "True", "TRUE"):
+        return True
+    if raw in ("f", "F", "false", "False", "FALSE"):
+        return False
+    if raw.endswith("i") or raw.endswith("u"):
+        return int(raw[:-1])
+    return float(raw)
+
+
+_PRECISION_TO_NS = {"ns": 1, "us": 1_000, "ms": 1_000_000, "s": 1_000_000_000}
+
+
+class FakeInflux:
+    """
+    In-memory InfluxDB v2 stand-in. Accepts line protocol writes and answers the Flux
+    shapes the api-service builds (filter by measurement/tags/fields, optional last()/first()
+    and pivot()/pivot_series()) with annotated CSV.
+    """
+
+    MAX_POINTS_PER_SERIES = 2000
+
+    def __init__(self):
+        self._series = defaultdict(list)  # (measurement, tags tuple) -> [(ts_ns, {field: value})]
+        self._lock = threading.Lock()
+        self.lines_written = 0
+        self.write_requests = 0
+        self.write_bytes = 0
+        self.query_requests = 0
+
+    def write(self, body, precision="ns"):
+        scale = _PRECISION_TO_NS.get(precision, 1)
+        now_ns = time.time_ns()
+        parsed = []
+        for line in body.decode().splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            sections = _split_unescaped(line, " ")
+            key, fields_raw = sections[0], sections[1]
+            ts = int(sections[2]) * scale if len(sections) > 2 and sections[2] else now_ns
+            key_parts = _split_unescaped(key, ",")
+            measurement = _unescape(key_parts[0])
+            tags = tuple(sorted(tuple(_unescape(p) for p in kv.split("=", 1)) for kv in key_parts[1:]))
+            fields = {}
+            for kv in _split_unescaped(fields_raw, ","):
+                name, raw = kv.split("=", 1)
+                fields[_unescape(name)] = _field_value(raw)
+            parsed.append(((measurement, tags), ts, fields))
+
+        with self._lock:
+            for series, ts, fields in parsed:
+                points = self._series[series]
+                points.append((ts, fields))
+                if len(points) > self.MAX_POINTS_PER_SERIES:
+                    del points[: len(points) - self.MAX_POINTS_PER_SERIES]
+            self.lines_written += len(parsed)
+            self.write_requests += 1
+            self.write_bytes += len(body)
+
+    def query(self, flux):
+        self.query_requests += 1
+        measurement = re.search(r'r\._measurement == "([^"]+)"', flux).group(1)
+        tag_filters = {}
+        for k, v in re.findall(r'r\["([^"]+)"\] == "([^"]*)"', flux):
+            tag_filters.setdefault(k, set()).add(v)
+        fields = set(re.findall(r'r\._field == "([^"]+)"', flux))
+        start, stop = self._range(flux)
+        want_last = "last()" in flux
+        want_first = "first()" in flux
+        pivot = "pivot(" in flux
+        # pivot_series() drops the bookkeeping columns first and keeps every tag
+        per_series = pivot and "drop(columns" in flux
+
+        with self._lock:
+            series = [
+                (dict(tags), list(points)) for (m, tags), points in self._series.items()
+                if m == measurement and all(dict(tags).get(k) in vs for k, vs in tag_filters.items())
+            ]
+
+        records = []  # (ts, tags, field, value)
+        for tags, points in series:
+            latest = {}
+            for ts, values in points:
+                if not start <= ts < stop:
+                    continue
+                for field, value in values.items():
+                    if fields and field not in fields:
+                        continue
+                    if want_last or (want_first and field not in latest):
+                        latest[field] = (ts, value)
+                    else:
+                        records.append((ts, tags, field, value))
+            records.extend((ts, tags, field, value) for field, (ts, value) in latest.items())
+        records.sort(key=lambda r: r[0])
+
+        tag_columns = sorted({k for _, tags, _, _ in records for k in tags} if per_series else tag_filters)
+        if pivot:
+            rows = {}
+            for ts, tags, field, value in records:
+                key = (ts, tuple(sorted(tags.items()))) if per_series else ts
+                row = rows.setdefault(key, {"_time": ts, **{k: tags.get(k, "") for k in tag_columns}})
+                row[field] = value
+            columns = tag_columns + sorted({r[2] for r in records})
+            return _annotated_csv(columns, sorted(rows.values(), key=lambda r: r["_time"]))
+        rows = [{"_time": ts, "_field": field, "_value": value} for ts, tags, field, value in records]
+        return _annotated_csv(["_field", "_value"], rows)
+
+    @staticmethod
+    def _range(flux):
+        now = time.time_ns()
+        m = re.search(r"range\(start: ([^,)]+)(?:, stop: ([^)]+))?\)", flux)
+        return _flux_bound(m.group(1), now), _flux_bound(m.group(2), now) if m.group(2) else now + 1
+
+    def stats(self):
+        return {
+            "lines_written": self.lines_written,
+            "write_requests": self.write_requests,
+            "write_bytes": self.write_bytes,
+            "query_requests": self.query_requests,
+            "series": len(self._series),
+        }
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _flux_bound(text, now_ns):
+    text = text.strip()
+    m = re.fullmatch(r"(-?)(\d+)([smhdw])", text)
+    if m:
+        seconds = int(m.group(2)) * _DURATION_UNITS[m.group(3)]
+        return now_ns + (-seconds if m.group(1) else seconds) * 1_000_000_000
+    if text == "now()":
+        return now_ns
+    return int(datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp() * 1e9)
+
+
+def _csv_type(value):
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "double"
+    return "string"
+
+
+def _annotated_csv(columns, rows):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\r\n")
+    types = []
+    for c in columns:
+        sample = next((r[c] for r in rows if r.get(c) is not None), "")
+        types.append(_csv_type(sample))
+    writer.writerow(["#datatype", "string", "long", "dateTime:RFC3339", *types])
+    writer.writerow(["#group", "false", "false", "false", *["false"] * len(columns)])
+    writer.writerow(["#default", "_result", "", "", *[""] * len(columns)])
+    writer.writerow(["", "result", "table", "_time", *columns])
+    for r in rows:
+        ts = datetime.fromtimestamp(r["_time"] / 1e9, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        values = ["" if r.get(c) is None else ("true" if r[c] is True else "false" if r[c] is False else r[c])
+                  for c in columns]
+        writer.writerow(["", "", 0, ts, *values])
+    out.write("\r\n")
+    return out.getvalue().encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "fake-upstreams"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def _upstream_delay_or_error(self):
+        settings = self.server.settings
+        delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        if settings.error_rate and random.random() < settings.error_rate:
+            self._send(503, b'{"error": "injected failure"}')
+            return True
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+        payloads = self.server.payloads
+        self.server.requests[path.split("/")[1]] += 1
+
+        if path in ("/ping", "/health"):
+            self._send(204 if path == "/ping" else 200, b"" if path == "/ping" else b'{"status":"pass"}')
+            return
+        if path == "/stats":
+            self._send(200, json.dumps(self.server.stats()).encode())
+            return
+        if self._upstream_delay_or_error():
+            return
+
+        if path == "/faa/metar":
+            ids = [i for i in query.get("ids", [""])[0].split(",") if i]
+            self._send(200, json.dumps([payloads.metar(i)[0] for i in ids]).encode())
+        elif path.startswith("/checkwx/metar/") and path.endswith("/decoded"):
+            ids = [i for i in unquote(path.split("/")[3]).split(",") if i]
+            data = [payloads.metar(i)[1] for i in ids]
+            self._send(200, json.dumps({"results": len(data), "data": data}).encode())
+        elif path == "/vatsim/metar.php":
+            self._send(200, payloads.metar(query["id"][0])[2].encode(), content_type="text/plain")
+        elif path == "/vatsim/v3/vatsim-data.json":
+            self._send(200, payloads.datafeed())
+        elif path == "/metno/compact":
+            expires = datetime.now(timezone.utc) + timedelta(minutes=30)
+            self._send(200, payloads.forecast(),
+                       headers={"Expires": expires.strftime("%a, %d %b %Y %H:%M:%S GMT")})
+        elif path == "/netatmo/api/getstationsdata":
+            self._send(200, payloads.netatmo())
+        elif path.startswith("/energy/"):
+            m = re.match(r"/energy/(\d{4})/(\d{2})-(\d{2})_", path)
+            day = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+            self._send(200, payloads.energy(day))
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        path = url.path
+        body = self._body()
+        self.server.requests[path.split("/")[1]] += 1
+        influx = self.server.influx
+
+        if path == "/api/v2/write":
+            if self.server.settings.influx_latency_ms:
+                time.sleep(self.server.settings.influx_latency_ms / 1000)
+            precision = parse_qs(url.query).get("precision", ["ns"])[0]
+            influx.write(body, precision)
+            self._send(204, content_type="text/plain")
+        elif path == "/api/v2/query":
+            if self.server.settings.influx_latency_ms:
+                time.sleep(self.server.settings.influx_latency_ms / 1000)
+            flux = json.loads(body)["query"]
+            try:
+                self._send(200, influx.query(flux), content_type="text/csv; charset=utf-8")
+            except Exception as e:  # malformed/unsupported query shape
+                self._send(400, json.dumps({"code": "invalid", "message": str(e)}).encode())
+        elif path == "/netatmo/oauth2/token":
+            if self._upstream_delay_or_error():
+                return
+            self._send(200, json.dumps({"access_token": "fake-access", "refresh_token": "fake-refresh",
+                                        "expires_in": 10800}).encode())
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, _Handler)
+        self.settings = settings
+        self.payloads = Payloads(settings)
+        self.influx = FakeInflux()
+        self.requests = defaultdict(int)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def service_env(self):
+        """Environment variables that point both services at this server."""
+        base = self.base_url
+        return {
+            "INFLUX_URL": base,
+            "FAA_API_URL": f"{base}/faa/metar",
+            "CHECKWX_API_URL": f"{base}/checkwx",
+            "VATSIM_METAR_URL": f"{base}/vatsim/metar.php",
+            "VATSIM_URL": f"{base}/vatsim/v3/vatsim-data.json",
+            "YRNO_API_URL": f"{base}/metno/compact",
+            "NETATMO_API_URL": f"{base}/netatmo",
+            "ENERGY_API_URL": f"{base}/energy",
+        }
+
+    def stats(self):
+        return {"influx": self.influx.stats(), "requests": dict(self.requests)}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-upstreams", daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added delay per upstream request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra delay, 0..jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests answered 503")
+    parser.add_argument("--influx-latency-ms", type=float, default=0.0, help="added delay per Influx write/query")
+    parser.add_argument("--pilots", type=int, default=1500, help="pilots in the VATSIM datafeed")
+    parser.add_argument("--forecast-steps", type=int, default=85, help="timeseries entries in the yr.no forecast")
+    args = parser.parse_args()
+
+    settings = UpstreamSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.influx_latency_ms,
+                                args.pilots, args.forecast_steps)
+    server = FakeUpstreamServer((args.host, args.port), settings)
+    print(f"Serving fake upstreams on {server.base_url}")
+    for k, v in server.service_env().items():
+        print(f"  {k}={v}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()